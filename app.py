@@ -2,13 +2,27 @@ import streamlit as st
 import pandas as pd
 import numpy as np
 import io
+import time
 import matplotlib.pyplot as plt
 import seaborn as sns
 import plotly.express as px
 import plotly.graph_objects as go
-from utils.calculations import ForestryCalculator
-from utils.statistics import StatisticsAnalyzer
-from utils.report_generator import ReportGenerator
+from utils.statistics import (
+    SIMPLE_RANDOM_SAMPLING, STRATIFIED_SAMPLING, T_CI, BOOTSTRAP_CI, DEFAULT_BOOTSTRAP_REPLICATES
+)
+from utils.report_generator import ReportGenerator, REPORT_TEMPLATE_VERSION
+from utils.column_mapping import map_columns, resolve_mapping, resolve_column_names, mapping_cache_info, find_species_column
+from utils.aggregates import PlotAggregates, aggregate_groups, basal_area
+from utils.cache import result_cache, artifact_cache, report_key, hash_content, hash_params
+from utils.ingest import read_inventory, inventory_columns, select_columns, SUPPORTED_EXTENSIONS
+from utils.memory import compact_dataframe
+from utils.profiling import StageProfiler
+from utils.jobs import report_jobs
+from utils.project import build_project_info
+from utils.equations import volume_equations, get_equation, species_key, VolumeEquation, MODELS, MODEL_COEFFICIENTS
+from utils.pipeline import inventory_graph
+from utils.planning import sampling_plan, TARGET_ERROR
+from utils.critical_values import t_critical_value
 
 def calculate_species_volume_summary(results_df, project_info):
     """
@@ -32,33 +46,46 @@ def calculate_species_volume_summary(results_df, project_info):
     if not species_column or results_df[species_column].isna().all():
         return pd.DataFrame()  # Retorna DataFrame vazio se não encontrar coluna de espécie
     
+    # Calcular área basal para cada árvore antes de agrupar
+    # AB = π × (DAP/2)² onde DAP está em cm, resultado em cm²
+    # (sem alterar results_df, que pode estar em cache)
+    species_aggregates = aggregate_groups(
+        results_df.assign(AB_individual=basal_area(results_df['DAP (cm)'])), species_column
+    ).sort_index()
+    
+    return species_volume_summary_table(species_aggregates, project_info)
+
+def species_volume_summary_table(species_aggregates, project_info):
+    """
+    Monta o resumo de volume por espécie a partir dos agregados por espécie.
+    
+    As médias são somas divididas pela contagem, então agregados acumulados
+    lote a lote produzem a mesma tabela sem reler as árvores.
+    
+    Args:
+        species_aggregates (pandas.DataFrame): Contagem e somas por espécie (ver aggregate_groups)
+        project_info (dict): Informações do projeto com dados de área
+        
+    Returns:
+        pandas.DataFrame: Tabela de resumo de volume por espécie
+    """
+    if species_aggregates.empty:
+        return pd.DataFrame()
+    
     # Calcular métricas por espécie
-    plot_area_ha = project_info['plot_area']
     total_sampled_area_ha = project_info['total_sampled_area']
     total_area_ha = project_info['total_area']
     
-    # Calcular área basal para cada árvore antes de agrupar
-    # AB = π × (DAP/2)² onde DAP está em cm, resultado em cm²
-    results_df['AB_individual'] = np.pi * (results_df['DAP (cm)'] / 2) ** 2
-    
-    species_groups = results_df.groupby(species_column).agg({
-        'DAP (cm)': ['count', 'mean'],
-        'HT (m)': 'mean',
-        'VT (m³)': 'sum',
-        'VT (m³/ha)': 'sum',
-        'AB_individual': 'sum'  # Somar área basal de todas as árvores da espécie
-    }).reset_index()
-    
-    # Simplificar nomes das colunas
-    species_groups.columns = [
-        'Espécie',
-        'n_trees_plot',
-        'DAP médio',
-        'Altura média', 
-        'Soma de VT (m³)',
-        'VT (m³)/ha',
-        'AB (cm²)'
-    ]
+    n_trees = species_aggregates['n_trees']
+    species_groups = pd.DataFrame({
+        'Espécie': species_aggregates.index.to_numpy(),
+        'n_trees_plot': n_trees.to_numpy(),
+        'DAP médio': (species_aggregates['DAP (cm)'] / n_trees).to_numpy(),
+        'Altura média': (species_aggregates['HT (m)'] / n_trees).to_numpy(),
+        'Soma de VT (m³)': species_aggregates['VT (m³)'].to_numpy(),
+        'VT (m³)/ha': species_aggregates['VT (m³/ha)'].to_numpy(),
+        'AB (cm²)': species_aggregates['AB_individual'].to_numpy()
+    })
     
     # Calcular n/ha usando a fórmula correta: (quantidade Encontrada / Área Total Amostrada) * 10000
     # Nota: total_sampled_area_ha é a área total amostrada em hectares (todas as parcelas)
@@ -155,7 +182,7 @@ def calculate_suppression_volume_table(results_df, project_info):
     
     return suppression_table
 
-def create_sinaflor_table(results_df, statistics, project_info):
+def create_sinaflor_table(results_df, statistics, project_info, plot_aggregates=None):
     """
     Cria a tabela no formato SINAFLOR com resultados do inventário.
     
@@ -163,10 +190,14 @@ def create_sinaflor_table(results_df, statistics, project_info):
         results_df (pandas.DataFrame): Dados processados
         statistics (dict): Estatísticas calculadas
         project_info (dict): Informações do projeto
+        plot_aggregates (PlotAggregates): Agregados por parcela já calculados (opcional)
         
     Returns:
         pandas.DataFrame: Tabela formato SINAFLOR
     """
+    if plot_aggregates is None:
+        plot_aggregates = PlotAggregates.from_results(results_df, project_info)
+    
     # Calcular valores necessários baseados na amostragem por parcela
     num_plots = project_info['num_plots']
     total_sampled_area = project_info['total_sampled_area'] 
@@ -177,20 +208,12 @@ def create_sinaflor_table(results_df, statistics, project_info):
     # Média por árvore individual (volume médio de cada árvore)
     mean_volume_per_tree = results_df['VT (m³)'].mean()
     
-    # Volume médio por hectare = média dos volumes por hectare das parcelas
-    # Calcular usando a mesma metodologia do IC
-    ua_column_temp = None
-    for col in results_df.columns:
-        if 'UA' in str(col).upper() or 'PARCELA' in str(col).upper() or 'UNIDADE' in str(col).upper():
-            ua_column_temp = col
-            break
+    # Calcular IC para a Média por ha (90%) seguindo a metodologia correta
+    # 1. Obter volumes por hectare de cada parcela (somatória dos volumes das árvores da parcela)
+    volumes_por_parcela = plot_aggregates.plot_volumes()
     
-    if ua_column_temp is not None:
-        volumes_temp = results_df.groupby(ua_column_temp)['VT (m³/ha)'].sum()
-        mean_volume_per_ha = volumes_temp.mean()  # Média dos volumes por hectare das parcelas
-    else:
-        # Fallback
-        mean_volume_per_ha = results_df['VT (m³/ha)'].sum() / project_info['num_plots']
+    # Volume médio por hectare = média dos volumes por hectare das parcelas
+    mean_volume_per_ha = volumes_por_parcela.mean()
     
     # Variância da média relativa = (variância da amostra / média²) * 100
     variance_relative = (statistics['variance'] / (statistics['mean'] ** 2)) * 100 if statistics['mean'] > 0 else 0
@@ -199,34 +222,6 @@ def create_sinaflor_table(results_df, statistics, project_info):
     confidence_interval_lower = statistics['ci_lower']
     confidence_interval_upper = statistics['ci_upper']
     
-    # Calcular IC para a Média por ha (90%) seguindo a metodologia correta
-    # 1. Obter volumes por hectare de cada parcela
-    ua_column = None
-    for col in results_df.columns:
-        if 'UA' in str(col).upper() or 'PARCELA' in str(col).upper() or 'UNIDADE' in str(col).upper():
-            ua_column = col
-            break
-    
-    if ua_column is not None:
-        # Calcular volume por hectare para cada parcela (somatória dos volumes das árvores da parcela)
-        volumes_por_parcela = results_df.groupby(ua_column)['VT (m³/ha)'].sum()
-    else:
-        # Fallback: distribuir uniformemente
-        num_plots = project_info['num_plots']
-        total_trees = len(results_df)
-        trees_per_plot = total_trees // num_plots
-        
-        volumes_por_parcela = []
-        for i in range(num_plots):
-            start_idx = i * trees_per_plot
-            end_idx = start_idx + trees_per_plot
-            if i == num_plots - 1:
-                end_idx = total_trees
-            volume_parcela = results_df.iloc[start_idx:end_idx]['VT (m³/ha)'].sum()
-            volumes_por_parcela.append(volume_parcela)
-        
-        volumes_por_parcela = pd.Series(volumes_por_parcela)
-    
     # 2. Calcular média amostral por hectare (soma dos volumes das parcelas / número de parcelas)
     n_parcelas = len(volumes_por_parcela)
     media_amostral_ha = volumes_por_parcela.mean()  # Média dos volumes por hectare das parcelas
@@ -237,9 +232,8 @@ def create_sinaflor_table(results_df, statistics, project_info):
     # 4. Calcular erro padrão da média por hectare
     erro_padrao_ha = desvio_padrao_parcelas / np.sqrt(n_parcelas)
     
-    # 5. Valor t para 90% de confiança com (n_parcelas-1) graus de liberdade
-    from scipy import stats
-    t_90 = stats.t.ppf(0.95, df=n_parcelas-1)  # 95% = (1 + 0.90)/2 para bilateral
+    # 5. Valor t para 90% de confiança com (n_parcelas-1) graus de liberdade (bilateral)
+    t_90 = t_critical_value(0.90, n_parcelas-1)
     
     # 6. Margem de erro para média por hectare
     margem_erro_ha = t_90 * erro_padrao_ha
@@ -248,6 +242,14 @@ def create_sinaflor_table(results_df, statistics, project_info):
     ic_per_ha_lower = media_amostral_ha - margem_erro_ha
     ic_per_ha_upper = media_amostral_ha + margem_erro_ha
     
+    # Na amostragem estratificada a média e o IC por ha são os ponderados pelas áreas dos estratos
+    if statistics.get('sampling_method') == STRATIFIED_SAMPLING:
+        mean_volume_per_ha = statistics['mean']
+    # O IC por ha é o das estatísticas quando não vem da distribuição t sobre as parcelas
+    if statistics.get('sampling_method') == STRATIFIED_SAMPLING or statistics.get('ci_method') == BOOTSTRAP_CI:
+        ic_per_ha_lower = statistics['ci_lower']
+        ic_per_ha_upper = statistics['ci_upper']
+    
     # Calcular métricas adicionais para SINAFLOR
     
     # IC para a Média (90%) - baseado na média por árvore
@@ -255,7 +257,7 @@ def create_sinaflor_table(results_df, statistics, project_info):
     std_per_tree = results_df['VT (m³)'].std(ddof=1)
     n_trees = len(results_df)
     error_per_tree = std_per_tree / np.sqrt(n_trees)
-    t_trees = stats.t.ppf(0.95, df=n_trees-1)
+    t_trees = t_critical_value(0.90, n_trees-1)
     margin_trees = t_trees * error_per_tree
     ic_media_lower = mean_per_tree - margin_trees
     ic_media_upper = mean_per_tree + margin_trees
@@ -281,6 +283,7 @@ def create_sinaflor_table(results_df, statistics, project_info):
             'Processo de Amostragem', 
             'Tipo de inventário',
             'Nível de probabilidade (%)',
+            'Método do intervalo de confiança',
             'Forma da parcela',
             'Área total do projeto (ha)',
             'Área amostrada (ha)',
@@ -302,10 +305,11 @@ def create_sinaflor_table(results_df, statistics, project_info):
             'EMC'
         ],
         'Valor': [
-            '0,000094*DAP^1,830398*HT^0,960913',
-            'Amostragem Aleatória Simples',
+            describe_volume_equations(project_info),
+            statistics.get('sampling_method', SIMPLE_RANDOM_SAMPLING),
             'Detalhado',
             '90',
+            describe_ci_method(statistics),
             'Retangular',
             f"{project_info['total_area']:.2f}",
             f"{project_info['total_sampled_area']:.6f}",
@@ -331,45 +335,27 @@ def create_sinaflor_table(results_df, statistics, project_info):
     sinaflor_table = pd.DataFrame(sinaflor_data)
     return sinaflor_table
 
-def create_plot_volumes_chart(results_df, project_info):
+def create_plot_volumes_chart(results_df, project_info, plot_aggregates=None):
     """
     Cria gráfico da média de volume por parcela.
     
     Args:
         results_df (pandas.DataFrame): Dados processados
         project_info (dict): Informações do projeto
+        plot_aggregates (PlotAggregates): Agregados por parcela já calculados (opcional)
         
     Returns:
         plotly.graph_objects.Figure: Gráfico interativo
     """
-    # Identificar coluna UA/Parcela
-    ua_column = None
-    for col in results_df.columns:
-        if 'UA' in str(col).upper() or 'PARCELA' in str(col).upper() or 'UNIDADE' in str(col).upper():
-            ua_column = col
-            break
+    if plot_aggregates is None:
+        plot_aggregates = PlotAggregates.from_results(results_df, project_info)
     
-    if ua_column is not None:
-        # Calcular volume total por parcela
-        plot_volumes = results_df.groupby(ua_column)['VT (m³/ha)'].sum().reset_index()
-        plot_volumes.columns = ['Parcela', 'Volume (m³/ha)']
-        plot_volumes = plot_volumes.sort_values('Parcela')
-    else:
-        # Fallback: distribuir uniformemente
-        num_plots = project_info['num_plots']
-        total_trees = len(results_df)
-        trees_per_plot = total_trees // num_plots
-        
-        plot_data = []
-        for i in range(num_plots):
-            start_idx = i * trees_per_plot
-            end_idx = start_idx + trees_per_plot
-            if i == num_plots - 1:
-                end_idx = total_trees
-            volume = results_df.iloc[start_idx:end_idx]['VT (m³/ha)'].sum()
-            plot_data.append({'Parcela': f'Parcela {i+1}', 'Volume (m³/ha)': volume})
-        
-        plot_volumes = pd.DataFrame(plot_data)
+    # Volume total por parcela
+    plot_volumes = plot_aggregates.plot_volumes().reset_index()
+    plot_volumes.columns = ['Parcela', 'Volume (m³/ha)']
+    if plot_aggregates.ua_column is None:
+        # Fallback: parcelas numeradas pela distribuição uniforme
+        plot_volumes['Parcela'] = 'Parcela ' + plot_volumes['Parcela'].astype(str)
     
     # Calcular estatísticas
     media_volume = plot_volumes['Volume (m³/ha)'].mean()
@@ -412,7 +398,7 @@ def create_plot_volumes_chart(results_df, project_info):
     
     return fig, plot_volumes
 
-def calculate_plot_averages_table(results_df, project_info):
+def calculate_plot_averages_table(results_df, project_info, plot_aggregates=None):
     """
     Calcula médias por parcela usando os dados reais da tabela "Cálculos por Árvore".
     Usa as colunas UA (Unidade Amostral), N° (número da árvore) e DAP (cm) para calcular:
@@ -423,49 +409,26 @@ def calculate_plot_averages_table(results_df, project_info):
     Args:
         results_df (pandas.DataFrame): Dados processados com colunas UA, N°, DAP (cm), etc.
         project_info (dict): Informações do projeto
+        plot_aggregates (PlotAggregates): Agregados por parcela já calculados (opcional)
         
     Returns:
         pandas.DataFrame: Tabela com médias por parcela baseadas nos dados reais
     """
+    if plot_aggregates is None:
+        plot_aggregates = PlotAggregates.from_results(results_df, project_info)
     
-    # Identificar a coluna UA (Unidade Amostral/Parcela)
-    ua_column = None
-    for col in results_df.columns:
-        if 'UA' in str(col).upper() or 'PARCELA' in str(col).upper() or 'UNIDADE' in str(col).upper():
-            ua_column = col
-            break
-    
-    if ua_column is None:
+    if plot_aggregates.ua_column is None:
         # Se não encontrar coluna UA, usar distribuição uniforme como fallback
         return calculate_plot_averages_fallback(results_df, project_info)
     
-    # Agrupar dados por UA (Unidade Amostral)
-    plot_groups = results_df.groupby(ua_column)
-    plot_data = []
-    
-    for ua_name, ua_trees in plot_groups:
-        if len(ua_trees) > 0:
-            num_trees_in_ua = len(ua_trees)
-            
-            # DAP médio = soma de todos os DAPs desta UA ÷ quantidade de árvores desta UA
-            dap_values = ua_trees['DAP (cm)'].values
-            dap_sum = sum(dap_values)
-            dap_medio = dap_sum / num_trees_in_ua
-            
-            # HT média = soma das alturas desta UA ÷ quantidade de árvores desta UA
-            ht_values = ua_trees['HT (m)'].values
-            ht_sum = sum(ht_values)
-            ht_media = ht_sum / num_trees_in_ua
-            
-            # VT = soma dos volumes das árvores desta UA
-            vt_total = ua_trees['VT (m³)'].sum()
-            
-            plot_data.append({
-                'Parcela': str(ua_name),
-                'DAP médio': round(dap_medio, 4),
-                'HT média': round(ht_media, 2), 
-                'VT (m³)': round(vt_total, 2)
-            })
+    # Médias por UA a partir das somas já agregadas
+    plot_table = plot_aggregates.table
+    plot_data = {
+        'Parcela': plot_table.index.astype(str),
+        'DAP médio': (plot_table['DAP (cm)'] / plot_table['n_trees']).round(4).to_numpy(),
+        'HT média': (plot_table['HT (m)'] / plot_table['n_trees']).round(2).to_numpy(),
+        'VT (m³)': plot_table['VT (m³)'].round(2).to_numpy()
+    }
     
     # Criar DataFrame
     plot_stats = pd.DataFrame(plot_data)
@@ -561,78 +524,15 @@ def calculate_plot_averages_fallback(results_df, project_info):
 
 def detect_and_map_columns(df):
     """Detecta e mapeia automaticamente as colunas da planilha"""
-    df_original = df.copy()
-    df = df.copy()
-    df.columns = df.columns.str.strip()
-    
     # Contar linhas iniciais
     initial_rows = len(df)
     st.write(f"**Processamento iniciado com {initial_rows} linhas**")
     
-    mapping_results = []
-    new_columns = []
-    used_mappings = set()
-    
-    for i, col in enumerate(df.columns):
-        original_col = str(col).strip()
-        col_upper = original_col.upper()
-        mapped_name = None
-        
-        # Detectar coluna de numeração das árvores
-        if ('N°' in col_upper or col_upper in ['N', 'NO', 'NUM', 'NUMERO', 'NÚMERO']) and 'Nº da árvore' not in used_mappings:
-            mapped_name = 'Nº da árvore'
-            used_mappings.add('Nº da árvore')
-        
-        # Detectar nome comum
-        elif 'NOME' in col_upper and 'COMUM' in col_upper and 'Nome comum' not in used_mappings:
-            mapped_name = 'Nome comum'
-            used_mappings.add('Nome comum')
-        
-        # Detectar nome científico
-        elif 'NOME' in col_upper and ('CIENTÍFICO' in col_upper or 'CIENTIFICO' in col_upper) and 'Nome científico' not in used_mappings:
-            mapped_name = 'Nome científico'
-            used_mappings.add('Nome científico')
-        
-        # Detectar CAP
-        elif 'CAP' in col_upper and 'CAP (cm)' not in used_mappings:
-            mapped_name = 'CAP (cm)'
-            used_mappings.add('CAP (cm)')
-        
-        # Detectar altura (HT)
-        elif ('HT' in col_upper or 'ALTURA' in col_upper) and 'HT (m)' not in used_mappings:
-            mapped_name = 'HT (m)'
-            used_mappings.add('HT (m)')
-        
-        # Se não mapear ou já estiver usado, manter nome original
-        if mapped_name is None:
-            # Garantir nome único
-            base_name = original_col
-            counter = 1
-            while base_name in new_columns:
-                base_name = f"{original_col}_{counter}"
-                counter += 1
-            mapped_name = base_name
-            mapping_results.append(f"• '{original_col}' → mantido como '{mapped_name}'")
-        else:
-            mapping_results.append(f"✓ '{original_col}' → '{mapped_name}'")
-        
-        new_columns.append(mapped_name)
-    
-    # Aplicar novos nomes das colunas
-    df.columns = new_columns
+    # Renomear colunas e criar coluna combinada de nomes se necessário
+    original_columns = df.columns
+    df, mapping_results = map_columns(df)
     st.write(f"**Após renomear colunas: {len(df)} linhas**")
     
-    # Criar coluna combinada de nomes se necessário
-    if 'Nome comum' in df.columns and 'Nome científico' in df.columns:
-        df['Nome comum/científico'] = df['Nome comum'].astype(str) + ' / ' + df['Nome científico'].astype(str)
-        mapping_results.append("✓ Combinadas colunas de nomes")
-    elif 'Nome comum' in df.columns:
-        df['Nome comum/científico'] = df['Nome comum']
-        mapping_results.append("✓ Usando nome comum como identificação")
-    elif 'Nome científico' in df.columns:
-        df['Nome comum/científico'] = df['Nome científico']
-        mapping_results.append("✓ Usando nome científico como identificação")
-    
     final_rows = len(df)
     st.write(f"**Processamento finalizado com {final_rows} linhas**")
     
@@ -645,11 +545,63 @@ def detect_and_map_columns(df):
     for result in mapping_results:
         st.write(result)
     
+    # Regra aplicada a cada coluna (plano já compilado, servido pelo cache)
+    with st.expander("Regras de mapeamento aplicadas"):
+        st.dataframe(resolve_mapping(original_columns).audit(), hide_index=True)
+    
     # Mostrar colunas finais
     st.info(f"Colunas finais: {list(df.columns)}")
     
     return df
 
+def render_processing_diagnostics(diagnostics, input_df, validation=None):
+    """
+    Exibe o diagnóstico retornado por ForestryCalculator.process_data.
+    
+    Args:
+        diagnostics (dict): Diagnóstico do processamento
+        input_df (pandas.DataFrame): Dados de entrada usados no processamento
+        validation (ValidationIndex): Índice de regras de validação por linha
+    """
+    initial_count = diagnostics['initial_count']
+    final_count = diagnostics['final_count']
+    preview_columns = [col for col in ['Nº da árvore', 'CAP (cm)', 'HT (m)'] if col in input_df.columns]
+    
+    with st.expander("Diagnóstico do Processamento", expanded=final_count < initial_count):
+        st.write(f"**Iniciando processamento com {initial_count} árvores**")
+        st.write(f"**Após mapeamento: {diagnostics['mapped_count']} árvores**")
+        
+        if diagnostics['missing_cap'] > 0 or diagnostics['missing_ht'] > 0:
+            st.warning(f"Valores vazios encontrados: CAP={diagnostics['missing_cap']}, HT={diagnostics['missing_ht']}")
+        
+        if diagnostics['empty_rows']:
+            st.write("**Linhas com dados vazios removidas:**")
+            if diagnostics['empty_tree_numbers']:
+                st.write(f"Árvores: {diagnostics['empty_tree_numbers']}")
+            st.dataframe(input_df.loc[diagnostics['empty_rows'][:10], preview_columns])
+        
+        if diagnostics['invalid_cap'] > 0 or diagnostics['invalid_ht'] > 0:
+            st.warning(f"Valores não numéricos encontrados: CAP={diagnostics['invalid_cap']}, HT={diagnostics['invalid_ht']}")
+        
+        if diagnostics['invalid_rows']:
+            st.write("**Linhas com dados não numéricos removidas:**")
+            if diagnostics['invalid_tree_numbers']:
+                st.write(f"Árvores com dados inválidos: {diagnostics['invalid_tree_numbers']}")
+            st.dataframe(input_df.loc[diagnostics['invalid_rows'][:10], preview_columns])
+        
+        # Valores mantidos no cálculo, mas suspeitos (linhas lidas direto do índice de validação)
+        warning_rules = ['non_positive_cap', 'non_positive_ht', 'implausible_dap', 'implausible_ht']
+        if validation is not None and any(validation.counts[rule] > 0 for rule in warning_rules):
+            st.warning("Valores suspeitos mantidos no cálculo:")
+            summary = validation.summary()
+            st.dataframe(summary[summary['Regra'].isin(warning_rules)], hide_index=True)
+            st.dataframe(input_df.loc[validation.rows(*warning_rules)[:10], preview_columns])
+        
+        st.success(f"**Processamento concluído: {final_count} árvores processadas de {initial_count} originais**")
+        
+        if final_count < initial_count:
+            st.error(f"❌ PERDA TOTAL: {initial_count - final_count} árvores foram removidas durante o processamento")
+
 def main():
     st.set_page_config(
         page_title="Sistema de Inventário Florestal",
@@ -673,21 +625,369 @@ def main():
         st.session_state.file_uploaded = False
     if 'input_data' not in st.session_state:
         st.session_state.input_data = None
+    if 'processing_diagnostics' not in st.session_state:
+        st.session_state.processing_diagnostics = None
+    if 'validation' not in st.session_state:
+        st.session_state.validation = None
+    if 'plot_aggregates' not in st.session_state:
+        st.session_state.plot_aggregates = None
+    if 'dataset_key' not in st.session_state:
+        st.session_state.dataset_key = None
+    if 'memory_footprint' not in st.session_state:
+        st.session_state.memory_footprint = None
+    if 'profiler' not in st.session_state:
+        st.session_state.profiler = StageProfiler()
+    if 'report_jobs' not in st.session_state:
+        st.session_state.report_jobs = {}
+    if 'pipeline' not in st.session_state:
+        st.session_state.pipeline = build_pipeline(st.session_state.profiler)
+    if 'appended_batches' not in st.session_state:
+        st.session_state.appended_batches = []
+    if 'upload_token' not in st.session_state:
+        st.session_state.upload_token = None
+    if 'stratum_source' not in st.session_state:
+        st.session_state.stratum_source = None
+    
+    # Medição por estágio (desligada por padrão, custo desprezível)
+    profiler = st.session_state.profiler
+    profiler.enabled = st.sidebar.checkbox("Diagnóstico de desempenho", key="profiling_enabled")
+    profiler.track_memory = profiler.enabled and st.sidebar.checkbox(
+        "Medir pico de memória",
+        key="profiling_memory",
+        help="Usa o tracemalloc, que deixa o processamento mais lento e é compartilhado entre as sessões"
+    )
     
     # Create tabs
     tab1, tab2, tab3, tab4 = st.tabs(["📂 Upload de Dados", "⚙️ Processamento", "📊 Estatísticas", "📑 Relatório"])
     
-    with tab1:
+    with tab1, profiler.stage("tab: upload"):
         upload_data_tab()
     
-    with tab2:
+    with tab2, profiler.stage("tab: processamento"):
         processing_tab()
     
-    with tab3:
+    with tab3, profiler.stage("tab: estatísticas"):
         statistics_tab()
     
-    with tab4:
+    with tab4, profiler.stage("tab: relatório"):
         report_tab()
+    
+    if profiler.enabled:
+        render_diagnostics_panel(profiler)
+
+# Limite de estratos distintos aceitos na coluna de estrato
+MAX_STRATA = 50
+
+def get_profiler():
+    """Retorna o profiler de estágios da sessão."""
+    return st.session_state.profiler
+
+def build_pipeline(profiler):
+    """
+    Monta o grafo de processamento da sessão com as tabelas das abas.
+    
+    Cada tabela declara só os parâmetros do projeto que usa: alterar a área
+    total recalcula as extrapolações e a tabela SINAFLOR, mas não os volumes
+    por árvore nem os agregados por parcela.
+    
+    Args:
+        profiler (StageProfiler): Profiler da sessão
+        
+    Returns:
+        ComputationGraph: Grafo de processamento
+    """
+    graph = inventory_graph(result_cache, profiler)
+    graph.add(
+        'plot_averages',
+        lambda trees, plot_aggregates, params: calculate_plot_averages_table(trees.results, params, plot_aggregates),
+        inputs=('trees', 'plot_aggregates'), params=('num_plots',), shared=True
+    )
+    graph.add(
+        'suppression',
+        lambda trees, params: calculate_suppression_volume_table(trees.results, params),
+        inputs=('trees',), params=('total_area',), shared=True
+    )
+    graph.add(
+        'species_summary', species_volume_summary_table,
+        inputs=('species_aggregates',), params=('total_sampled_area', 'total_area'), shared=True
+    )
+    graph.add(
+        'plot_volumes_chart',
+        lambda trees, plot_aggregates, params: create_plot_volumes_chart(trees.results, params, plot_aggregates),
+        inputs=('trees', 'plot_aggregates'), shared=True
+    )
+    graph.add(
+        'sinaflor',
+        lambda trees, statistics, plot_aggregates, params: create_sinaflor_table(
+            trees.results, statistics, params, plot_aggregates
+        ),
+        inputs=('trees', 'statistics', 'plot_aggregates'),
+        params=('num_plots', 'total_area', 'total_sampled_area', 'volume_equation', 'species_equations'),
+        shared=True
+    )
+    graph.add(
+        'sampling_plan',
+        lambda plot_aggregates, params: sampling_plan(plot_aggregates.plot_volumes(), params),
+        inputs=('plot_aggregates',), params=('plot_area', 'total_area'), shared=True
+    )
+    return graph
+
+def render_diagnostics_panel(profiler):
+    """
+    Exibe na barra lateral os tempos e a memória de cada estágio medido.
+    
+    Args:
+        profiler (StageProfiler): Profiler da sessão
+    """
+    with st.sidebar:
+        st.subheader("⏱️ Estágios Medidos")
+        records = profiler.summary()
+        if records:
+            stages_df = pd.DataFrame(records)
+            stages_df['peak_memory'] = pd.to_numeric(stages_df['peak_memory']) / 1024 ** 2
+            st.dataframe(
+                stages_df[['name', 'wall_time', 'cpu_time', 'peak_memory']].iloc[::-1],
+                hide_index=True,
+                column_config={
+                    "name": st.column_config.TextColumn("Estágio"),
+                    "wall_time": st.column_config.NumberColumn("Tempo (s)", format="%.4f"),
+                    "cpu_time": st.column_config.NumberColumn("CPU (s)", format="%.4f"),
+                    "peak_memory": st.column_config.NumberColumn("Pico (MB)", format="%.2f")
+                }
+            )
+            st.download_button("⬇️ Exportar JSON", data=profiler.to_json(), file_name="estagios.json", mime="application/json")
+            st.download_button("⬇️ Exportar Trace", data=profiler.to_trace_events(), file_name="estagios.trace.json", mime="application/json")
+            if st.button("Limpar medições"):
+                profiler.clear()
+        else:
+            st.caption("Nenhum estágio medido ainda.")
+        
+        cache_stats = result_cache.stats()
+        st.caption(
+            f"Cache de resultados: {cache_stats['hits']} acertos, {cache_stats['misses']} falhas, "
+            f"{cache_stats['entries']}/{cache_stats['max_entries']} entradas"
+        )
+        mapping_stats = mapping_cache_info()
+        st.caption(
+            f"Planos de mapeamento de colunas: {mapping_stats['plans']} cabeçalhos, "
+            f"{mapping_stats['hits']} acertos, {mapping_stats['misses']} falhas"
+        )
+        artifact_stats = artifact_cache.stats()
+        st.caption(
+            f"Cache de relatórios: {artifact_stats['hits']} acertos, {artifact_stats['misses']} falhas, "
+            f"{artifact_stats['files']} arquivos ({artifact_stats['bytes'] / 1024 ** 2:.1f} MB)"
+        )
+        recomputed = st.session_state.pipeline.recomputed
+        st.caption(f"Etapas recalculadas no último processamento: {', '.join(recomputed) if recomputed else 'nenhuma'}")
+
+def select_volume_equation():
+    """
+    Mostra a escolha da equação de volume do projeto.
+    
+    Além das equações registradas, permite informar os coeficientes de uma
+    equação própria (Schumacher-Hall, Spurr ou Husch). A equação própria
+    fica só no projeto da sessão: não é registrada para as outras sessões.
+    
+    Returns:
+        str or VolumeEquation: Nome da equação registrada ou a equação própria
+    """
+    st.subheader("Equação de Volume")
+    custom_option = "Personalizada"
+    names = volume_equations.names()
+    choice = st.selectbox(
+        "Equação",
+        names + [custom_option],
+        format_func=lambda name: name if name == custom_option else volume_equations.get(name).label,
+        key="volume_equation_choice"
+    )
+    if choice != custom_option:
+        st.caption(f"VT = {volume_equations.get(choice).formula}")
+        return choice
+    
+    model = st.selectbox("Modelo", list(MODELS), format_func=lambda name: MODELS[name], key="volume_equation_model")
+    letters = ['a', 'b', 'c']
+    coefficients = [
+        st.number_input(f"Coeficiente {letters[i]}", value=1.0, format="%.6f", key=f"volume_equation_{model}_{i}")
+        for i in range(MODEL_COEFFICIENTS[model])
+    ]
+    try:
+        equation = VolumeEquation(f"{model}:{','.join(repr(value) for value in coefficients)}", model, coefficients)
+    except ValueError as e:
+        st.error(f"⚠️ {e}")
+        return names[0]
+    st.caption(f"VT = {equation.formula}")
+    return equation
+
+def select_species_equations():
+    """
+    Mostra o upload opcional da tabela espécie → equação.
+    
+    A tabela (CSV ou XLSX) tem a espécie na primeira coluna e o nome de uma
+    equação registrada na segunda; espécies fora da tabela usam a equação
+    do projeto.
+    
+    Returns:
+        dict: Espécie → nome da equação (vazio sem tabela)
+    """
+    table_file = st.file_uploader(
+        "Equações por espécie (opcional)",
+        type=['csv', 'xlsx'],
+        key="species_equations_file",
+        help="Primeira coluna: espécie (como na planilha de campo); segunda coluna: nome da equação"
+    )
+    if table_file is None:
+        return {}
+    
+    try:
+        if table_file.name.lower().endswith('.csv'):
+            table = pd.read_csv(table_file)
+        else:
+            table = pd.read_excel(table_file)
+    except Exception as e:
+        st.error(f"Erro ao ler a tabela de equações: {str(e)}")
+        return {}
+    if table.shape[1] < 2:
+        st.error("A tabela de equações precisa de duas colunas: espécie e equação")
+        return {}
+    
+    table = table.iloc[:, :2].dropna()
+    species_equations = dict(zip(table.iloc[:, 0].map(species_key), table.iloc[:, 1].astype(str).str.strip()))
+    unknown = sorted(set(species_equations.values()) - set(volume_equations.names()))
+    if unknown:
+        st.error(f"Equações não registradas: {', '.join(unknown)}")
+        return {}
+    
+    st.caption(f"{len(species_equations)} espécies com equação própria")
+    
+    # Espécies da tabela que não aparecem na planilha carregada cairiam na equação do projeto sem aviso
+    input_data = st.session_state.input_data
+    species_column = find_species_column(input_data.columns) if input_data is not None else None
+    if species_column is not None:
+        present = {species_key(name) for name in input_data[species_column].dropna().unique()}
+        unmatched = sorted(set(species_equations) - present)
+        if unmatched:
+            st.warning(
+                f"⚠️ {len(unmatched)} espécies da tabela sem árvores na planilha: {', '.join(unmatched[:20])}"
+                + (" ..." if len(unmatched) > 20 else "")
+            )
+    return species_equations
+
+def select_stratum_column(uploaded_file):
+    """
+    Mostra a escolha da coluna do estrato, feita antes da leitura da planilha.
+    
+    A leitura carrega só as colunas usadas pelo cálculo; a coluna do estrato
+    (tipologia, classe de idade...) é uma das demais e precisa ser pedida
+    à leitura.
+    
+    Args:
+        uploaded_file (UploadedFile): Planilha enviada
+        
+    Returns:
+        str: Nome (mapeado) da coluna do estrato, ou None sem estratificação
+    """
+    header = inventory_columns(uploaded_file, uploaded_file.name)
+    loaded = select_columns(header)
+    mapped_names, _ = resolve_column_names(header)
+    candidates = [mapped for original, mapped in zip(header, mapped_names) if original not in loaded]
+    choice = st.selectbox(
+        "Coluna do estrato (amostragem estratificada)",
+        ['Nenhuma'] + candidates,
+        key="stratum_column",
+        help="Coluna com o estrato de cada parcela; 'Nenhuma' usa a amostragem aleatória simples"
+    )
+    return None if choice == 'Nenhuma' else choice
+
+def select_strata(input_data, total_area):
+    """
+    Mostra as áreas dos estratos da amostragem estratificada.
+    
+    O estrato vem da coluna escolhida no upload (select_stratum_column),
+    com um único valor por parcela; a área de cada estrato é informada na
+    tabela e começa dividida igualmente.
+    
+    Args:
+        input_data (pandas.DataFrame): Dados carregados (None antes do upload)
+        total_area (float): Área total do projeto em hectares
+        
+    Returns:
+        tuple: (coluna do estrato ou None, estrato → área em ha)
+    """
+    stratum_column = st.session_state.stratum_source
+    if input_data is None or stratum_column is None or stratum_column not in input_data.columns:
+        return None, {}
+    
+    st.subheader("Amostragem Estratificada")
+    strata = sorted(input_data[stratum_column].dropna().unique().tolist(), key=str)
+    if not strata or len(strata) > MAX_STRATA:
+        st.error(f"A coluna do estrato deve ter entre 1 e {MAX_STRATA} valores distintos")
+        return None, {}
+    
+    areas_table = st.data_editor(
+        pd.DataFrame({'Estrato': [str(stratum) for stratum in strata], 'Área (ha)': total_area / len(strata)}),
+        disabled=['Estrato'],
+        hide_index=True,
+        key=f"stratum_areas_{stratum_column}"
+    )
+    stratum_areas = dict(zip(strata, areas_table['Área (ha)'].astype(float)))
+    areas_sum = sum(stratum_areas.values())
+    if abs(areas_sum - total_area) > 0.01:
+        st.warning(f"⚠️ A soma das áreas dos estratos ({areas_sum:.2f} ha) difere da área total ({total_area:.2f} ha)")
+    return stratum_column, stratum_areas
+
+def describe_ci_method(statistics):
+    """
+    Descreve o método do intervalo de confiança usado nas estatísticas.
+    
+    Args:
+        statistics (dict): Estatísticas calculadas
+        
+    Returns:
+        str: Método, com réplicas e semente no caso do bootstrap
+    """
+    ci_method = statistics.get('ci_method', T_CI)
+    if ci_method == BOOTSTRAP_CI:
+        return f"{ci_method} ({statistics['bootstrap_replicates']} réplicas, semente {statistics['bootstrap_seed']})"
+    return ci_method
+
+def select_ci_method():
+    """
+    Mostra a escolha do método do intervalo de confiança de 90%.
+    
+    Returns:
+        tuple: (método, número de réplicas do bootstrap, semente do bootstrap)
+    """
+    ci_method = st.selectbox(
+        "Intervalo de Confiança (90%)",
+        [T_CI, BOOTSTRAP_CI],
+        key="ci_method",
+        help="O bootstrap reamostra os volumes das parcelas e não supõe distribuição normal da média"
+    )
+    if ci_method != BOOTSTRAP_CI:
+        return ci_method, DEFAULT_BOOTSTRAP_REPLICATES, 0
+    bootstrap_replicates = st.number_input(
+        "Réplicas do bootstrap", min_value=1000, max_value=100000, value=DEFAULT_BOOTSTRAP_REPLICATES,
+        step=1000, key="bootstrap_replicates"
+    )
+    bootstrap_seed = st.number_input("Semente do bootstrap", min_value=0, value=0, step=1, key="bootstrap_seed")
+    return ci_method, bootstrap_replicates, bootstrap_seed
+
+def describe_volume_equations(project_info):
+    """
+    Descreve as equações de volume do projeto para a tabela SINAFLOR.
+    
+    Args:
+        project_info (dict): Informações do projeto
+        
+    Returns:
+        str: Fórmula da equação do projeto, seguida das equações por espécie
+    """
+    description = get_equation(project_info.get('volume_equation')).formula
+    species_equations = project_info.get('species_equations') or {}
+    formulas = sorted({get_equation(name).formula for name in species_equations.values()} - {description})
+    if formulas:
+        description += f" (por espécie: {'; '.join(formulas)})"
+    return description
 
 def upload_data_tab():
     st.header("📂 Upload de Dados de Campo")
@@ -705,21 +1005,28 @@ def upload_data_tab():
         
         total_area = st.number_input("Área Total a ser Suprimida (ha)*", min_value=0.01, value=1.0, step=0.01, key="total_area")
         form_factor = st.number_input("Fator de Forma (FF)*", min_value=0.1, max_value=1.0, value=0.7, step=0.01, key="form_factor")
+        use_float32 = st.checkbox(
+            "Modo compacto (float32)",
+            key="use_float32",
+            help="Armazena medições e volumes em float32 para reduzir o uso de memória em projetos grandes"
+        )
+        volume_equation = select_volume_equation()
+        species_equations = select_species_equations()
+        ci_method, bootstrap_replicates, bootstrap_seed = select_ci_method()
     
     with col2:
         st.subheader("Upload de Planilha")
         uploaded_file = st.file_uploader(
             "Selecione a planilha com dados de campo",
-            type=['csv', 'xlsx'],
+            type=SUPPORTED_EXTENSIONS,
             help="A planilha deve conter as colunas: UA, N°, NOME COMUM, NOME CIENTÍFICO, CAP (cm), HT(m)"
         )
         
         if uploaded_file is not None:
             try:
-                if uploaded_file.name.endswith('.csv'):
-                    df = pd.read_csv(uploaded_file)
-                else:
-                    df = pd.read_excel(uploaded_file)
+                stratum_source = select_stratum_column(uploaded_file)
+                with get_profiler().stage("upload: read_inventory"):
+                    df = read_inventory(uploaded_file, uploaded_file.name, [stratum_source] if stratum_source else None)
                 
                 st.success(f"Arquivo carregado com sucesso! {len(df)} registros encontrados na planilha original.")
                 st.dataframe(df.head())
@@ -751,7 +1058,8 @@ def upload_data_tab():
                         st.write(analysis)
                 
                 # Detectar automaticamente as colunas
-                df_processed = detect_and_map_columns(df)
+                with get_profiler().stage("upload: detect_and_map_columns"):
+                    df_processed = detect_and_map_columns(df)
                 
                 # Verificar se perdemos dados durante o processamento
                 if len(df_processed) < len(df):
@@ -768,7 +1076,17 @@ def upload_data_tab():
                         st.write(f"Linhas removidas: {sorted(list(removed_indices))}")
                 
                 # Salvar dados automaticamente
-                st.session_state.input_data = df_processed
+                # O conteúdo do arquivo identifica os dados: o mesmo arquivo não invalida nada
+                # (nem os lotes já acrescentados a ele)
+                # A coluna do estrato muda as colunas carregadas, então também identifica os dados
+                upload_token = hash_content(uploaded_file.name, uploaded_file.getvalue(), stratum_source or '')
+                if upload_token != st.session_state.upload_token:
+                    st.session_state.input_data = compact_dataframe(df_processed)
+                    st.session_state.pipeline.set_source('input', st.session_state.input_data, upload_token)
+                    st.session_state.upload_token = upload_token
+                    st.session_state.stratum_source = stratum_source
+                    # Lotes acrescentados pertencem à planilha anterior
+                    st.session_state.appended_batches = []
                 st.session_state.file_uploaded = True
                 st.success("✅ Planilha carregada e dados salvos automaticamente!")
                 st.info(f"📊 {len(df_processed)} árvores válidas detectadas e prontas para processamento")
@@ -793,6 +1111,8 @@ def upload_data_tab():
             except Exception as e:
                 st.error(f"Erro ao carregar o arquivo: {str(e)}")
     
+    stratum_column, stratum_areas = select_strata(st.session_state.input_data, total_area)
+    
     # Process data button
     if st.button("Processar Dados", type="primary"):
         # Validate all required fields
@@ -809,43 +1129,111 @@ def upload_data_tab():
             errors.append("Fator de Forma deve estar entre 0.1 e 1.0")
         if not st.session_state.file_uploaded or st.session_state.input_data is None:
             errors.append("Nenhum arquivo foi carregado")
+        if stratum_column and any(area <= 0 for area in stratum_areas.values()):
+            errors.append("As áreas dos estratos devem ser positivas")
         
         if errors:
             for error in errors:
                 st.error(f"⚠️ {error}")
         else:
             # Store project information
-            plot_area = plot_length * plot_width / 10000  # Convert to hectares
-            total_sampled_area = plot_area * num_plots
-            sampling_percentage = (total_sampled_area / total_area) * 100
-            
-            project_info = {
-                'project_name': project_name,
-                'num_plots': num_plots,
-                'plot_length': plot_length,
-                'plot_width': plot_width,
-                'plot_area': plot_area,
-                'total_area': total_area,
-                'total_sampled_area': total_sampled_area,
-                'sampling_percentage': sampling_percentage,
-                'form_factor': form_factor
-            }
+            project_info = build_project_info(
+                project_name, num_plots, plot_length, plot_width, total_area, form_factor,
+                volume_equation, species_equations, stratum_column, stratum_areas,
+                ci_method, bootstrap_replicates, bootstrap_seed
+            )
             
+            # Só as etapas cujas entradas ou parâmetros mudaram são recalculadas
+            pipeline = st.session_state.pipeline
+            pipeline.set_params({**project_info, 'use_float32': use_float32})
+            try:
+                with get_profiler().stage("process: pipeline"):
+                    pipeline.compute('statistics')
+            except ValueError as e:
+                st.error(f"⚠️ {str(e)}")
+                return
             st.session_state.project_info = project_info
-            
-            # Process calculations
-            calculator = ForestryCalculator()
-            results_df = calculator.process_data(st.session_state.input_data, form_factor, plot_area)
-            st.session_state.results_df = results_df
-            
-            # Calculate statistics
-            analyzer = StatisticsAnalyzer()
-            statistics = analyzer.calculate_statistics(results_df, project_info)
-            st.session_state.statistics = statistics
+            store_pipeline_results(pipeline, project_info)
             
             st.session_state.data_processed = True
             st.success("✅ Dados processados com sucesso!")
             st.rerun()
+    
+    if st.session_state.data_processed:
+        append_batch_section()
+
+def store_pipeline_results(pipeline, project_info):
+    """
+    Copia para a sessão os resultados do grafo de processamento.
+    
+    Args:
+        pipeline (ComputationGraph): Grafo de processamento da sessão
+        project_info (dict): Informações do projeto processado
+    """
+    trees = pipeline.compute('trees')
+    st.session_state.input_data = trees.input_data
+    st.session_state.validation = trees.validation
+    st.session_state.results_df = trees.results
+    st.session_state.processing_diagnostics = trees.diagnostics
+    st.session_state.memory_footprint = trees.memory_footprint
+    st.session_state.plot_aggregates = pipeline.compute('plot_aggregates')
+    st.session_state.statistics = pipeline.compute('statistics')
+    
+    # Chave do conjunto processado composta pela chave da tabela por árvore (sem recalcular hash dos dados)
+    st.session_state.dataset_key = f"{pipeline.key('trees')}:{hash_params(project_info)}"
+
+def append_batch_section():
+    """
+    Mostra o envio de um novo lote de campo para o projeto já processado.
+    
+    Só as árvores do lote são validadas e calculadas; os agregados por
+    parcela e por espécie são atualizados com as somas do lote e as
+    estatísticas são recalculadas a partir deles.
+    """
+    st.subheader("Acrescentar Lote de Campo")
+    batch_file = st.file_uploader(
+        "Novo lote (mesmas colunas da planilha processada)",
+        type=SUPPORTED_EXTENSIONS,
+        key="batch_file"
+    )
+    if batch_file is None or not st.button("Acrescentar Lote"):
+        return
+    
+    batch_token = hash_content(batch_file.name, batch_file.getvalue())
+    if batch_token in st.session_state.appended_batches:
+        st.warning("⚠️ Este lote já foi acrescentado ao projeto")
+        return
+    
+    profiler = get_profiler()
+    pipeline = st.session_state.pipeline
+    try:
+        with profiler.stage("append: read_inventory"):
+            stratum_source = st.session_state.stratum_source
+            batch = read_inventory(batch_file, batch_file.name, [stratum_source] if stratum_source else None)
+        with profiler.stage("append: detect_and_map_columns"):
+            batch = compact_dataframe(detect_and_map_columns(batch))
+        trees = pipeline.compute('trees')
+        with profiler.stage("append: process_batch"):
+            diagnostics = trees.append(batch)
+    except Exception as e:
+        st.error(f"Erro ao acrescentar o lote: {str(e)}")
+        return
+    
+    # A nova entrada é identificada pelo conteúdo anterior mais o lote
+    pipeline.set_source('input', trees.input_data, hash_content(pipeline.key('input'), batch_token))
+    pipeline.set_params(pipeline.params)
+    pipeline.store('validation', trees.validation)
+    pipeline.store('trees', trees)
+    with profiler.stage("append: statistics"):
+        pipeline.compute('statistics')
+    store_pipeline_results(pipeline, st.session_state.project_info)
+    st.session_state.appended_batches.append(batch_token)
+    
+    st.success(
+        f"✅ Lote acrescentado: {diagnostics['final_count']} árvores processadas "
+        f"({trees.n_batches} lotes, {len(st.session_state.results_df)} árvores no projeto)"
+    )
+    st.rerun()
 
 def processing_tab():
     st.header("⚙️ Processamento dos Dados")
@@ -868,9 +1256,26 @@ def processing_tab():
         st.metric("Área de Supressão", f"{project_info['total_area']:.2f} ha")
         st.metric("% Amostrada", f"{project_info['sampling_percentage']:.2f}%")
     
+    if st.session_state.processing_diagnostics is not None:
+        render_processing_diagnostics(
+            st.session_state.processing_diagnostics,
+            st.session_state.input_data,
+            st.session_state.validation
+        )
+    
     st.subheader("Cálculos por Árvore")
     results_df = st.session_state.results_df
     
+    footprint = st.session_state.memory_footprint
+    if footprint is not None:
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            st.metric("Memória (layout original)", f"{footprint['before'] / 1024 ** 2:.2f} MB")
+        with col2:
+            st.metric("Memória (layout compacto)", f"{footprint['after'] / 1024 ** 2:.2f} MB")
+        with col3:
+            st.metric("Redução", f"{footprint['before'] / max(footprint['after'], 1):.1f}x")
+    
     # Display results table
     st.dataframe(
         results_df.style.format({
@@ -887,7 +1292,7 @@ def processing_tab():
     # Volume médio por parcela
     st.subheader("Volume Médio por Parcela")
     project_info = st.session_state.project_info
-    plot_averages_table = calculate_plot_averages_table(results_df, project_info)
+    plot_averages_table = st.session_state.pipeline.compute('plot_averages')
     
     st.dataframe(
         plot_averages_table,
@@ -917,7 +1322,7 @@ def processing_tab():
 
     # Volume de supressão da vegetação
     st.subheader("Volume de Supressão da Vegetação no Local do Empreendimento")
-    suppression_table = calculate_suppression_volume_table(results_df, project_info)
+    suppression_table = st.session_state.pipeline.compute('suppression')
     
     if not suppression_table.empty:
         # Formatar a tabela para exibição
@@ -934,7 +1339,7 @@ def processing_tab():
 
     # Volume médio por espécie
     st.subheader("Volume Médio por Espécie")
-    species_summary = calculate_species_volume_summary(results_df, project_info)
+    species_summary = st.session_state.pipeline.compute('species_summary')
     
     if not species_summary.empty:
         st.dataframe(
@@ -954,6 +1359,54 @@ def processing_tab():
     else:
         st.warning("Dados de espécie não disponíveis. Verifique se a planilha possui colunas de nome comum ou científico.")
 
+def render_strata_table(statistics):
+    """
+    Exibe as estatísticas por estrato e a alocação ótima (Neyman) das parcelas.
+    
+    Args:
+        statistics (dict): Estatísticas da amostragem estratificada
+    """
+    st.subheader("Estratos")
+    st.caption(
+        f"{statistics['sampling_method']}: média ponderada pelas áreas, "
+        f"{statistics['degrees_of_freedom']:.1f} graus de liberdade efetivos"
+    )
+    strata_table = pd.DataFrame(statistics['strata']).rename(columns={
+        'stratum': 'Estrato',
+        'area': 'Área (ha)',
+        'weight': 'Peso',
+        'plots': 'Parcelas',
+        'mean': 'Média (m³/ha)',
+        'variance': 'Variância',
+        'std_dev': 'Desvio Padrão',
+        'neyman_plots': 'Parcelas (Neyman)'
+    })
+    strata_table['Estrato'] = strata_table['Estrato'].astype(str)
+    st.dataframe(strata_table, use_container_width=True, hide_index=True)
+
+def render_sampling_plan(plan):
+    """
+    Exibe o planejamento do número de parcelas para o erro de amostragem de 20%.
+    
+    Args:
+        plan (pandas.DataFrame): Tabela de utils.planning.sampling_plan
+    """
+    st.subheader("Planejamento da Amostragem")
+    required = int(plan.loc[plan['required'], 'plots'].iloc[0])
+    st.caption(
+        f"Parcelas necessárias para erro ≤ {TARGET_ERROR:.0f}%: {required} "
+        "(t recalculado para cada n, com correção para população finita). "
+        "A probabilidade vem da simulação de amostras sorteadas entre as parcelas medidas."
+    )
+    plan_table = plan.drop(columns='required').rename(columns={
+        'plots': 'Parcelas',
+        'sampling_fraction': 'Intensidade Amostral (%)',
+        't_critical': 't',
+        'expected_error': 'Erro Esperado (%)',
+        'probability': f"Probabilidade de Erro ≤ {TARGET_ERROR:.0f}%"
+    })
+    st.dataframe(plan_table, use_container_width=True, hide_index=True)
+
 def statistics_tab():
     st.header("📊 Estatísticas e Precisão")
     
@@ -985,6 +1438,10 @@ def statistics_tab():
         st.metric("Limite Inferior IC 90%", f"{statistics['ci_lower']:.4f}")
         st.metric("Limite Superior IC 90%", f"{statistics['ci_upper']:.4f}")
         st.metric("Erro Padrão", f"{statistics['standard_error']:.4f}")
+        st.caption(f"Intervalo de confiança: {describe_ci_method(statistics)}")
+    
+    if statistics.get('strata'):
+        render_strata_table(statistics)
     
     # Volume estimates
     st.subheader("Estimativas de Volume para Área Total")
@@ -1003,12 +1460,17 @@ def statistics_tab():
         volume_upper = statistics['ci_upper'] * project_info['total_area']
         st.metric("Volume Máximo IC 90% (m³)", f"{volume_upper:.2f}")
     
+    try:
+        render_sampling_plan(st.session_state.pipeline.compute('sampling_plan'))
+    except ValueError as e:
+        st.info(f"Planejamento da amostragem indisponível: {str(e)}")
+    
     # Gráfico de Volume por Parcela
     st.subheader("📊 Gráfico: Volume por Hectare por Parcela")
     results_df = st.session_state.results_df
     
     try:
-        fig, plot_data = create_plot_volumes_chart(results_df, project_info)
+        fig, plot_data = st.session_state.pipeline.compute('plot_volumes_chart')
         
         # Exibir gráfico
         st.plotly_chart(fig, use_container_width=True)
@@ -1038,7 +1500,7 @@ def statistics_tab():
     
     # Tabela formato SINAFLOR
     st.subheader("Resultados Formato SINAFLOR")
-    sinaflor_table = create_sinaflor_table(results_df, statistics, project_info)
+    sinaflor_table = st.session_state.pipeline.compute('sinaflor')
     
     # Exibir tabela com formatação especial
     st.dataframe(
@@ -1051,6 +1513,92 @@ def statistics_tab():
         }
     )
 
+# Formatos de relatório: rótulo, extensão e tipo MIME do download
+REPORT_FORMATS = {
+    'excel': ("Relatório Excel", "xlsx", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"),
+    'pdf': ("Relatório PDF", "pdf", "application/pdf")
+}
+
+def submit_report_job(report_format, generate):
+    """
+    Envia a geração de um relatório para a fila de jobs em segundo plano.
+    
+    Um job anterior do mesmo formato ainda em andamento é cancelado. Se o
+    mesmo relatório já foi gerado para estes dados, o arquivo guardado em
+    cache é reaproveitado.
+    
+    Args:
+        report_format (str): 'excel' ou 'pdf'
+        generate (callable): Método do ReportGenerator que gera o relatório
+    """
+    jobs = st.session_state.report_jobs
+    if report_format in jobs:
+        report_jobs.cancel(jobs[report_format])
+    
+    key = report_key(st.session_state.dataset_key, st.session_state.statistics, report_format, REPORT_TEMPLATE_VERSION)
+    jobs[report_format] = report_jobs.submit(
+        artifact_cache.get_or_create,
+        key,
+        REPORT_FORMATS[report_format][1],
+        generate,
+        st.session_state.results_df,
+        st.session_state.statistics,
+        st.session_state.project_info,
+        label=f"{REPORT_FORMATS[report_format][0]} - {st.session_state.project_info['project_name']}"
+    )
+
+@st.fragment
+def render_report_jobs():
+    """
+    Mostra o andamento dos relatórios da sessão e oferece o download quando prontos.
+    
+    Enquanto houver job pendente ou em execução, o fragmento se atualiza
+    sozinho sem reexecutar o restante da página.
+    """
+    jobs = st.session_state.report_jobs
+    active = False
+    
+    for report_format, job_id in list(jobs.items()):
+        label, extension, mime = REPORT_FORMATS[report_format]
+        status = report_jobs.status(job_id)
+        if status is None:
+            # Job expirado ou removido da fila
+            del jobs[report_format]
+            continue
+        
+        if status['state'] in ('pending', 'running'):
+            active = True
+            col_progress, col_cancel = st.columns([4, 1])
+            with col_progress:
+                if status['cancel_requested']:
+                    text = "Cancelando..."
+                elif status['state'] == 'pending':
+                    text = "Na fila..."
+                else:
+                    text = f"Gerando... {status['progress']:.0%} ({status['elapsed']:.1f} s)"
+                st.progress(status['progress'], text=f"{label}: {text}")
+            with col_cancel:
+                if st.button("Cancelar", key=f"cancel_{job_id}", disabled=status['cancel_requested']):
+                    report_jobs.cancel(job_id)
+                    st.rerun(scope="fragment")
+        elif status['state'] == 'done':
+            st.download_button(
+                label=f"⬇️ Download {label}",
+                data=report_jobs.result(job_id),
+                file_name=f"relatorio_inventario_{st.session_state.project_info['project_name'].replace(' ', '_')}.{extension}",
+                mime=mime,
+                key=f"download_{job_id}"
+            )
+            st.caption(f"{label} gerado em {status['elapsed']:.1f} s")
+        elif status['state'] == 'failed':
+            st.error(f"❌ Erro ao gerar {label}: {status['error']}")
+        else:
+            st.info(f"{label} cancelado.")
+    
+    if active:
+        time.sleep(0.5)
+        st.rerun(scope="fragment")
+
 def report_tab():
     st.header("📑 Relatório Final")
     
@@ -1058,40 +1606,20 @@ def report_tab():
         st.warning("⚠️ Primeiro faça o upload e processamento dos dados na aba 'Upload de Dados'")
         return
     
-    # Generate report
+    # Os relatórios são gerados em segundo plano; a aba acompanha os jobs da sessão
     report_generator = ReportGenerator()
     
     col1, col2 = st.columns(2)
     
     with col1:
         if st.button("📊 Gerar Relatório Excel", type="primary"):
-            excel_buffer = report_generator.generate_excel_report(
-                st.session_state.results_df,
-                st.session_state.statistics,
-                st.session_state.project_info
-            )
-            
-            st.download_button(
-                label="⬇️ Download Relatório Excel",
-                data=excel_buffer,
-                file_name=f"relatorio_inventario_{st.session_state.project_info['project_name'].replace(' ', '_')}.xlsx",
-                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-            )
+            submit_report_job('excel', report_generator.generate_excel_report)
     
     with col2:
         if st.button("📄 Gerar Relatório PDF", type="secondary"):
-            pdf_buffer = report_generator.generate_pdf_report(
-                st.session_state.results_df,
-                st.session_state.statistics,
-                st.session_state.project_info
-            )
-            
-            st.download_button(
-                label="⬇️ Download Relatório PDF",
-                data=pdf_buffer,
-                file_name=f"relatorio_inventario_{st.session_state.project_info['project_name'].replace(' ', '_')}.pdf",
-                mime="application/pdf"
-            )
+            submit_report_job('pdf', report_generator.generate_pdf_report)
+    
+    render_report_jobs()
     
     # Display summary report
     st.subheader("Resumo do Relatório")
@@ -0,0 +1,198 @@
+"""
+Processamento em lote de inventários florestais, sem a interface Streamlit.
+
+Uso:
+    python batch.py PASTA_DE_PLANILHAS --params parametros.json --output relatorios --workers 4
+
+O arquivo de parâmetros é um JSON com valores padrão e, opcionalmente,
+valores específicos por arquivo:
+
+    {
+        "defaults": {"plot_length": 20, "plot_width": 20, "total_area": 10.5, "form_factor": 0.7},
+        "files": {"fazenda_a.csv": {"project_name": "Fazenda A", "num_plots": 12, "total_area": 32.0}}
+    }
+
+Sem "project_name" é usado o nome do arquivo; sem "num_plots" é usada a
+quantidade de UAs distintas da planilha. "volume_equation" escolhe uma
+equação registrada em utils.equations (padrão: "padrao") e
+"species_equations" ({"espécie": "equação"}) define equações por espécie.
+Para amostragem estratificada, "stratum_column" indica a coluna do estrato
+de cada parcela e "stratum_areas" ({"estrato": área em ha}) as áreas.
+Com "bootstrap": true o IC 90% vem do bootstrap das parcelas, com
+"bootstrap_replicates" réplicas (padrão: 10000) e semente "bootstrap_seed".
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from utils.calculations import ForestryCalculator
+from utils.statistics import StatisticsAnalyzer, T_CI, BOOTSTRAP_CI, DEFAULT_BOOTSTRAP_REPLICATES
+from utils.report_generator import ReportGenerator
+from utils.aggregates import PlotAggregates
+from utils.column_mapping import map_columns, find_ua_column
+from utils.ingest import read_inventory
+from utils.project import build_project_info
+from utils.equations import DEFAULT_EQUATION
+
+INPUT_EXTENSIONS = ('.csv', '.xlsx')
+PROJECT_PARAMETERS = ['project_name', 'num_plots', 'plot_length', 'plot_width', 'total_area', 'form_factor']
+
+def load_parameters(params_path):
+    """
+    Load the project-parameters file.
+
+    Args:
+        params_path (str): Path to the JSON parameters file
+
+    Returns:
+        tuple: (default parameters, parameters per file name)
+    """
+    with open(params_path, encoding='utf-8') as f:
+        params = json.load(f)
+    return params.get('defaults', {}), params.get('files', {})
+
+def process_file(path, params, output_dir, formats):
+    """
+    Run the calculator → statistics → report pipeline for one inventory file.
+
+    Args:
+        path (str): Inventory file (CSV or XLSX)
+        params (dict): Project parameters for this file
+        output_dir (str): Directory for the reports
+        formats (list): Report formats ('excel' and/or 'pdf')
+
+    Returns:
+        dict: Summary with file name, tree counts, elapsed time, outputs or error
+    """
+    start = time.perf_counter()
+    filename = os.path.basename(path)
+    summary = {'file': filename, 'input_rows': 0, 'trees': 0, 'outputs': [], 'error': None}
+
+    try:
+        # A coluna do estrato não é usada pelo cálculo: precisa ser pedida à leitura
+        stratum_column = params.get('stratum_column')
+        raw = read_inventory(path, filename, [stratum_column] if stratum_column else None)
+        summary['input_rows'] = len(raw)
+        input_data, _ = map_columns(raw)
+
+        params = dict(params)
+        params.setdefault('project_name', os.path.splitext(filename)[0])
+        if 'num_plots' not in params:
+            ua_column = find_ua_column(input_data.columns)
+            if ua_column is None:
+                raise ValueError("'num_plots' não informado e coluna UA não encontrada")
+            params['num_plots'] = int(input_data[ua_column].nunique())
+        missing = [name for name in PROJECT_PARAMETERS if name not in params]
+        if missing:
+            raise ValueError(f"Parâmetros ausentes: {', '.join(missing)}")
+
+        project_info = build_project_info(
+            *(params[name] for name in PROJECT_PARAMETERS),
+            volume_equation=params.get('volume_equation', DEFAULT_EQUATION),
+            species_equations=params.get('species_equations'),
+            stratum_column=params.get('stratum_column'),
+            stratum_areas=params.get('stratum_areas'),
+            ci_method=BOOTSTRAP_CI if params.get('bootstrap') else T_CI,
+            bootstrap_replicates=params.get('bootstrap_replicates', DEFAULT_BOOTSTRAP_REPLICATES),
+            bootstrap_seed=params.get('bootstrap_seed', 0)
+        )
+
+        results_df, _ = ForestryCalculator().process_data(
+            input_data, project_info['form_factor'], project_info['plot_area'],
+            equation=project_info['volume_equation'],
+            species_equations=project_info['species_equations']
+        )
+        summary['trees'] = len(results_df)
+        plot_aggregates = PlotAggregates.from_results(results_df, project_info)
+        statistics = StatisticsAnalyzer().calculate_project_statistics(results_df, project_info, plot_aggregates)
+
+        report_generator = ReportGenerator()
+        base_name = f"relatorio_inventario_{project_info['project_name'].replace(' ', '_')}"
+        if 'excel' in formats:
+            output_path = os.path.join(output_dir, base_name + '.xlsx')
+            with open(output_path, 'wb') as f:
+                f.write(report_generator.generate_excel_report(results_df, statistics, project_info))
+            summary['outputs'].append(output_path)
+        if 'pdf' in formats:
+            output_path = os.path.join(output_dir, base_name + '.pdf')
+            with open(output_path, 'wb') as f:
+                f.write(report_generator.generate_pdf_report(results_df, statistics, project_info))
+            summary['outputs'].append(output_path)
+
+        summary['sampling_error'] = statistics['sampling_error']
+    except Exception as e:
+        summary['error'] = f"{type(e).__name__}: {e}"
+
+    summary['seconds'] = time.perf_counter() - start
+    return summary
+
+def run_batch(input_dir, params_path, output_dir, workers=None, formats=('excel', 'pdf')):
+    """
+    Process every CSV/XLSX file of a directory, several projects at a time.
+
+    Args:
+        input_dir (str): Directory with the inventory files
+        params_path (str): JSON parameters file
+        output_dir (str): Directory for the reports
+        workers (int): Number of worker processes (default: number of CPUs)
+        formats (tuple): Report formats to write
+
+    Returns:
+        tuple: (list of per-file summaries, total elapsed seconds)
+    """
+    defaults, per_file = load_parameters(params_path)
+    files = sorted(
+        os.path.join(input_dir, name) for name in os.listdir(input_dir)
+        if name.lower().endswith(INPUT_EXTENSIONS)
+    )
+    os.makedirs(output_dir, exist_ok=True)
+
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [
+            executor.submit(process_file, path, {**defaults, **per_file.get(os.path.basename(path), {})}, output_dir, formats)
+            for path in files
+        ]
+        summaries = [future.result() for future in futures]
+    return summaries, time.perf_counter() - start
+
+def print_summary(summaries, elapsed):
+    """
+    Print the per-file results and the throughput of the batch.
+
+    Args:
+        summaries (list): Per-file summaries from process_file
+        elapsed (float): Total elapsed seconds
+    """
+    for item in summaries:
+        if item['error']:
+            print(f"✗ {item['file']}: {item['error']}")
+        else:
+            print(f"✓ {item['file']}: {item['trees']:,} árvores, erro amostral {item['sampling_error']:.2f}%, {item['seconds']:.2f} s")
+
+    succeeded = [item for item in summaries if not item['error']]
+    total_trees = sum(item['trees'] for item in succeeded)
+    print()
+    print(f"Arquivos processados: {len(succeeded)}/{len(summaries)}")
+    print(f"Árvores processadas:  {total_trees:,}")
+    print(f"Tempo total:          {elapsed:.2f} s")
+    if elapsed > 0:
+        print(f"Vazão:                {len(succeeded) / elapsed:.2f} arquivos/s, {total_trees / elapsed:,.0f} árvores/s")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Processamento em lote de inventários florestais")
+    parser.add_argument('input_dir', help="Pasta com as planilhas CSV/XLSX")
+    parser.add_argument('--params', required=True, help="Arquivo JSON com os parâmetros dos projetos")
+    parser.add_argument('--output', default='relatorios', help="Pasta de saída dos relatórios")
+    parser.add_argument('--workers', type=int, default=None, help="Quantidade de processos (padrão: número de CPUs)")
+    parser.add_argument('--formats', nargs='+', default=['excel', 'pdf'], choices=['excel', 'pdf'], help="Formatos de relatório")
+    args = parser.parse_args(argv)
+
+    summaries, elapsed = run_batch(args.input_dir, args.params, args.output, args.workers, tuple(args.formats))
+    print_summary(summaries, elapsed)
+    return 1 if any(item['error'] for item in summaries) else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
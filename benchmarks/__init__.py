@@ -0,0 +1 @@
+"""Benchmarks for the forest inventory pipeline (run with `python -m benchmarks.run`)."""
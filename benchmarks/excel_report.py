@@ -0,0 +1,89 @@
+"""
+Time and peak memory (RSS) of the Excel report in the pandas and streaming modes.
+
+Each measurement runs in a fresh process so the peak RSS reflects only that run.
+
+Usage:
+    python -m benchmarks.excel_report --sizes 100000 1000000
+"""
+import argparse
+import json
+import resource
+import subprocess
+import sys
+import time
+from benchmarks.synthetic import generate_inventory, project_info_for
+from benchmarks.run import TREES_PER_PLOT
+from utils.calculations import ForestryCalculator
+from utils.statistics import StatisticsAnalyzer
+from utils.report_generator import ReportGenerator
+from utils.aggregates import PlotAggregates
+from utils.column_mapping import map_columns
+
+MODES = ['pandas', 'streaming']
+
+def measure(n_trees, mode, seed=42):
+    """
+    Build a processed dataset and time one Excel report in the current process.
+
+    Args:
+        n_trees (int): Number of trees
+        mode (str): 'pandas' or 'streaming'
+        seed (int): Random seed
+
+    Returns:
+        dict: Size, mode, seconds, file size and RSS before/after the report
+    """
+    n_plots = max(1, n_trees // TREES_PER_PLOT)
+    raw = generate_inventory(n_plots, n_trees // n_plots, seed=seed)
+    project_info = project_info_for(raw)
+    input_data, _ = map_columns(raw)
+    results_df, _ = ForestryCalculator().process_data(input_data, project_info['form_factor'], project_info['plot_area'])
+    plot_aggregates = PlotAggregates.from_results(results_df, project_info)
+    statistics = StatisticsAnalyzer().calculate_statistics(results_df, project_info, plot_aggregates)
+    del raw, input_data
+
+    # ru_maxrss é dado em KiB no Linux
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    start = time.perf_counter()
+    content = ReportGenerator().generate_excel_report(results_df, statistics, project_info, streaming=(mode == 'streaming'))
+    seconds = time.perf_counter() - start
+    rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+    return {
+        'n_trees': len(results_df),
+        'mode': mode,
+        'seconds': round(seconds, 3),
+        'file_bytes': len(content),
+        'peak_rss_before_mb': round(rss_before / 1024 ** 2, 1),
+        'peak_rss_mb': round(rss_after / 1024 ** 2, 1),
+        'report_rss_mb': round((rss_after - rss_before) / 1024 ** 2, 1)
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark do relatório Excel (pandas x streaming)")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100_000, 1_000_000], help="Quantidades de árvores")
+    parser.add_argument('--modes', nargs='+', default=MODES, choices=MODES, help="Modos medidos")
+    parser.add_argument('--seed', type=int, default=42, help="Semente do gerador")
+    parser.add_argument('--single', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.single:
+        # Execução filha: uma medição, resultado em JSON na saída padrão
+        print(json.dumps(measure(args.sizes[0], args.modes[0], args.seed)))
+        return 0
+
+    for n_trees in args.sizes:
+        for mode in args.modes:
+            output = subprocess.run(
+                [sys.executable, '-m', 'benchmarks.excel_report', '--single',
+                 '--sizes', str(n_trees), '--modes', mode, '--seed', str(args.seed)],
+                check=True, capture_output=True, text=True
+            ).stdout
+            result = json.loads(output.strip().splitlines()[-1])
+            print(f"{mode:<10} {result['n_trees']:>10,} árvores  {result['seconds']:>8.2f} s  "
+                  f"pico RSS {result['peak_rss_mb']:>8.1f} MB  (+{result['report_rss_mb']:.1f} MB no relatório)")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,179 @@
+"""
+Timed benchmark scenarios for each stage of the inventory pipeline.
+
+Usage:
+    python -m benchmarks.run --sizes 1000 100000 1000000 --output benchmark_results.json
+    python -m benchmarks.run --baseline old.json --threshold 1.25
+"""
+import argparse
+import json
+import platform
+import sys
+import time
+from datetime import datetime
+import numpy as np
+import pandas as pd
+from benchmarks.synthetic import generate_inventory, project_info_for
+from utils.calculations import ForestryCalculator
+from utils.statistics import StatisticsAnalyzer
+from utils.report_generator import ReportGenerator
+from utils.aggregates import PlotAggregates
+from utils.column_mapping import map_columns
+
+DEFAULT_SIZES = [1_000, 100_000, 1_000_000]
+TREES_PER_PLOT = 200
+
+def stage_map_columns(context):
+    """Map the spreadsheet columns as the upload tab does."""
+    context['input_data'], _ = map_columns(context['raw'])
+
+def stage_process_data(context):
+    """Run ForestryCalculator.process_data."""
+    project_info = context['project_info']
+    context['results_df'], _ = ForestryCalculator().process_data(
+        context['input_data'], project_info['form_factor'], project_info['plot_area']
+    )
+
+def stage_plot_aggregates(context):
+    """Build the shared plot aggregates."""
+    context['plot_aggregates'] = PlotAggregates.from_results(context['results_df'], context['project_info'])
+
+def stage_calculate_statistics(context):
+    """Run StatisticsAnalyzer.calculate_statistics."""
+    context['statistics'] = StatisticsAnalyzer().calculate_statistics(
+        context['results_df'], context['project_info'], context['plot_aggregates']
+    )
+
+def stage_excel_report(context):
+    """Run ReportGenerator.generate_excel_report."""
+    ReportGenerator().generate_excel_report(context['results_df'], context['statistics'], context['project_info'])
+
+def stage_pdf_report(context):
+    """Run ReportGenerator.generate_pdf_report."""
+    ReportGenerator().generate_pdf_report(context['results_df'], context['statistics'], context['project_info'])
+
+# Estágios na ordem do pipeline; cada um usa as saídas dos anteriores
+STAGES = {
+    'map_columns': stage_map_columns,
+    'process_data': stage_process_data,
+    'plot_aggregates': stage_plot_aggregates,
+    'calculate_statistics': stage_calculate_statistics,
+    'excel_report': stage_excel_report,
+    'pdf_report': stage_pdf_report,
+}
+
+def run_benchmarks(sizes, stages, repeat=3, n_species=40, dirty_rate=0.01, seed=42):
+    """
+    Time the selected pipeline stages for each dataset size.
+
+    All stages run in pipeline order (their outputs feed the next stage),
+    but only the selected ones are reported. Each stage is timed `repeat`
+    times and the fastest run is kept.
+
+    Args:
+        sizes (list): Numbers of trees
+        stages (list): Names of the stages to report
+        repeat (int): Runs per stage
+        n_species (int): Number of species in the synthetic data
+        dirty_rate (float): Fraction of empty/invalid CAP and HT values
+        seed (int): Random seed
+
+    Returns:
+        list: One result dict per (stage, size)
+    """
+    results = []
+    for n_trees in sizes:
+        n_plots = max(1, n_trees // TREES_PER_PLOT)
+        raw = generate_inventory(n_plots, n_trees // n_plots, n_species, dirty_rate, seed)
+        context = {'raw': raw, 'project_info': project_info_for(raw)}
+
+        for name, stage in STAGES.items():
+            runs = repeat if name in stages else 1
+            timings = []
+            for _ in range(runs):
+                start = time.perf_counter()
+                stage(context)
+                timings.append(time.perf_counter() - start)
+
+            if name in stages:
+                seconds = min(timings)
+                results.append({
+                    'stage': name,
+                    'n_trees': len(raw),
+                    'seconds': round(seconds, 6),
+                    'rows_per_second': round(len(raw) / seconds, 1) if seconds > 0 else None
+                })
+                print(f"{name:<22} {len(raw):>10,} árvores  {seconds:>10.4f} s  {len(raw) / seconds:>14,.0f} linhas/s")
+    return results
+
+def compare_with_baseline(results, baseline, threshold):
+    """
+    Compare results with a previous run and list the regressions.
+
+    Args:
+        results (list): Current results
+        baseline (list): Results of the baseline run
+        threshold (float): Maximum allowed ratio current/baseline time
+
+    Returns:
+        list: Regression descriptions (empty if none)
+    """
+    previous = {(item['stage'], item['n_trees']): item['seconds'] for item in baseline}
+    regressions = []
+    for item in results:
+        key = (item['stage'], item['n_trees'])
+        if key in previous and previous[key] > 0:
+            ratio = item['seconds'] / previous[key]
+            if ratio > threshold:
+                regressions.append(
+                    f"{item['stage']} ({item['n_trees']:,} árvores): {previous[key]:.4f}s → {item['seconds']:.4f}s ({ratio:.2f}x)"
+                )
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks do pipeline de inventário florestal")
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES, help="Quantidades de árvores")
+    parser.add_argument('--stages', nargs='+', default=list(STAGES), choices=list(STAGES), help="Estágios medidos")
+    parser.add_argument('--repeat', type=int, default=3, help="Execuções por estágio (mantém a mais rápida)")
+    parser.add_argument('--species', type=int, default=40, help="Quantidade de espécies")
+    parser.add_argument('--dirty-rate', type=float, default=0.01, help="Fração de valores vazios/inválidos")
+    parser.add_argument('--seed', type=int, default=42, help="Semente do gerador")
+    parser.add_argument('--output', default='benchmark_results.json', help="Arquivo JSON de saída")
+    parser.add_argument('--baseline', help="JSON de uma execução anterior para comparação")
+    parser.add_argument('--threshold', type=float, default=1.25, help="Razão máxima de tempo aceita em relação à baseline")
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(args.sizes, args.stages, args.repeat, args.species, args.dirty_rate, args.seed)
+
+    report = {
+        'meta': {
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'pandas': pd.__version__,
+            'numpy': np.__version__,
+            'platform': platform.platform(),
+            'seed': args.seed,
+            'species': args.species,
+            'dirty_rate': args.dirty_rate,
+            'repeat': args.repeat
+        },
+        'results': results
+    }
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print(f"Resultados salvos em {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)['results']
+        regressions = compare_with_baseline(results, baseline, args.threshold)
+        if regressions:
+            print("Regressões acima do limite:")
+            for regression in regressions:
+                print(f"  {regression}")
+            return 1
+        print("Nenhuma regressão acima do limite.")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,97 @@
+"""
+Per-species volume equations: row filtering per species versus the grouped
+equation-index dispatch used by ForestryCalculator.process_data.
+
+The equations registered here only exist for the benchmark (arbitrary
+coefficients of each model).
+
+Usage:
+    python -m benchmarks.species_dispatch --trees 1000000 --species 500
+"""
+import argparse
+import sys
+import time
+import numpy as np
+from benchmarks.synthetic import generate_inventory, project_info_for
+from benchmarks.run import TREES_PER_PLOT
+from utils.calculations import ForestryCalculator
+from utils.column_mapping import map_columns
+from utils.equations import VolumeEquation, EquationDispatch, DEFAULT_EQUATION, get_equation
+
+BENCHMARK_EQUATIONS = [
+    VolumeEquation('bench_schumacher', 'schumacher_hall', (0.00008, 1.85, 0.95)),
+    VolumeEquation('bench_spurr', 'spurr', (0.00005, 0.93)),
+    VolumeEquation('bench_husch', 'husch', (0.0009, 2.1))
+]
+
+def species_table(species_names, seed=42):
+    """Assign a random equation (default or benchmark) to each species."""
+    rng = np.random.default_rng(seed)
+    choices = [DEFAULT_EQUATION] + BENCHMARK_EQUATIONS
+    return {name: choices[i] for name, i in zip(species_names, rng.integers(0, len(choices), len(species_names)))}
+
+def row_filtering(species, dap, ht, table):
+    """Baseline: one boolean filter over all trees per species."""
+    volumes = get_equation().volume(dap, ht)
+    species_values = species.to_numpy()
+    for name, equation in table.items():
+        mask = species_values == name
+        if mask.any():
+            volumes[mask] = get_equation(equation).volume(dap[mask], ht[mask])
+    return volumes
+
+def grouped_dispatch(species, dap, ht, table):
+    """Equation index from categorical codes, one kernel call per equation."""
+    return EquationDispatch.from_species(species, table).volume(dap, ht)
+
+def best_time(func, repeat, *args):
+    """Run func `repeat` times and return (fastest seconds, last result)."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(*args)
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark de equações de volume por espécie")
+    parser.add_argument('--trees', type=int, default=1_000_000, help="Quantidade de árvores")
+    parser.add_argument('--species', type=int, default=500, help="Quantidade de espécies")
+    parser.add_argument('--repeat', type=int, default=3, help="Execuções por cenário (mantém a mais rápida)")
+    parser.add_argument('--seed', type=int, default=42, help="Semente do gerador")
+    args = parser.parse_args(argv)
+
+    n_plots = max(1, args.trees // TREES_PER_PLOT)
+    raw = generate_inventory(n_plots, args.trees // n_plots, n_species=args.species, seed=args.seed)
+    input_data, _ = map_columns(raw)
+    project_info = project_info_for(raw)
+    species = input_data['Nome comum'].astype('category')
+    table = species_table(species.cat.categories, args.seed)
+    dap = input_data['CAP (cm)'].to_numpy(dtype=np.float64) / np.pi
+    ht = input_data['HT (m)'].to_numpy(dtype=np.float64)
+
+    filtering_time, expected = best_time(row_filtering, args.repeat, species, dap, ht, table)
+    dispatch_time, volumes = best_time(grouped_dispatch, args.repeat, species, dap, ht, table)
+    if not np.array_equal(expected, volumes, equal_nan=True):
+        print("Resultados diferentes entre os cenários")
+        return 1
+
+    calculator = ForestryCalculator()
+    single_time, _ = best_time(
+        calculator.process_data, args.repeat, input_data, project_info['form_factor'], project_info['plot_area']
+    )
+    mixed_time, _ = best_time(
+        lambda: calculator.process_data(
+            input_data, project_info['form_factor'], project_info['plot_area'], species_equations=table
+        ), args.repeat
+    )
+
+    print(f"{len(input_data):,} árvores, {len(table)} espécies, {len(BENCHMARK_EQUATIONS) + 1} equações")
+    print(f"  filtro por espécie (volume)         {filtering_time:>8.4f} s")
+    print(f"  despacho por índice (volume)        {dispatch_time:>8.4f} s  ({filtering_time / dispatch_time:.1f}x)")
+    print(f"  process_data, equação única         {single_time:>8.4f} s")
+    print(f"  process_data, equações por espécie  {mixed_time:>8.4f} s")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,74 @@
+import numpy as np
+import pandas as pd
+from utils.project import build_project_info
+
+def generate_inventory(n_plots=50, trees_per_plot=20, n_species=40, dirty_rate=0.0, seed=42):
+    """
+    Generate a synthetic field spreadsheet in the upload format.
+
+    Columns follow the layout expected by the app: UA, N°, NOME COMUM,
+    NOME CIENTÍFICO, CAP (cm) and HT(m). With dirty_rate > 0 that fraction
+    of CAP and HT values is replaced by empty cells or non-numeric text.
+
+    Args:
+        n_plots (int): Number of plots (UA)
+        trees_per_plot (int): Average number of trees per plot
+        n_species (int): Number of distinct species
+        dirty_rate (float): Fraction of CAP/HT values that are empty or invalid
+        seed (int): Random seed
+
+    Returns:
+        pandas.DataFrame: Synthetic inventory
+    """
+    rng = np.random.default_rng(seed)
+    n_trees = n_plots * trees_per_plot
+
+    # Número de árvores por parcela varia em torno da média
+    plot_sizes = rng.multinomial(n_trees, np.full(n_plots, 1 / n_plots))
+    ua = np.repeat(np.arange(1, n_plots + 1), plot_sizes)
+
+    # Abundância das espécies segue uma distribuição de cauda longa
+    abundance = 1 / np.arange(1, n_species + 1)
+    species = rng.choice(n_species, size=n_trees, p=abundance / abundance.sum())
+    common_names = np.array([f"Espécie {i + 1}" for i in range(n_species)], dtype=object)
+    scientific_names = np.array([f"Genus species{i + 1}" for i in range(n_species)], dtype=object)
+
+    cap = np.round(rng.lognormal(mean=3.6, sigma=0.45, size=n_trees) + 15.7, 1)
+    ht = np.round(np.clip(2 + 0.18 * cap + rng.normal(0, 2.5, n_trees), 1.5, 40), 1)
+
+    df = pd.DataFrame({
+        'UA': ua,
+        'N°': np.arange(1, n_trees + 1),
+        'NOME COMUM': common_names[species],
+        'NOME CIENTÍFICO': scientific_names[species],
+        'CAP (cm)': cap,
+        'HT(m)': ht
+    })
+
+    if dirty_rate > 0:
+        for col in ['CAP (cm)', 'HT(m)']:
+            values = df[col].astype(object)
+            dirty = rng.random(n_trees) < dirty_rate
+            empty = dirty & (rng.random(n_trees) < 0.5)
+            values[dirty] = 'n/d'
+            values[empty] = np.nan
+            df[col] = values
+
+    return df
+
+def project_info_for(df, plot_length=20.0, plot_width=20.0, total_area=100.0, form_factor=0.7):
+    """
+    Build the project_info dictionary for a synthetic inventory.
+
+    Args:
+        df (pandas.DataFrame): Synthetic inventory (with a UA column)
+        plot_length (float): Plot length in meters
+        plot_width (float): Plot width in meters
+        total_area (float): Suppression area in hectares
+        form_factor (float): Form factor
+
+    Returns:
+        dict: Project information in the format built by the app
+    """
+    num_plots = int(df['UA'].nunique())
+    return build_project_info('Benchmark', num_plots, plot_length, plot_width, total_area, form_factor)
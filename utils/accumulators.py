@@ -0,0 +1,241 @@
+import numpy as np
+
+def _finite(values):
+    """Convert values to a float64 array without NaN."""
+    values = np.asarray(values, dtype=np.float64).ravel()
+    return values[~np.isnan(values)]
+
+class RunningMoments:
+    """Count, mean, sum of squared deviations, min and max, updated per chunk and mergeable (Welford/Chan)."""
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.minimum = np.inf
+        self.maximum = -np.inf
+
+    def update(self, values):
+        """
+        Add a chunk of values (NaN is ignored).
+
+        The chunk moments are computed with NumPy and combined with the
+        running moments by the parallel-variance formula, so the result
+        does not depend on how the values were split.
+
+        Args:
+            values (array-like): New values
+
+        Returns:
+            RunningMoments: self
+        """
+        values = _finite(values)
+        if len(values) == 0:
+            return self
+        mean = values.mean()
+        self._combine(len(values), mean, float(np.square(values - mean).sum()), values.min(), values.max())
+        return self
+
+    def merge(self, other):
+        """
+        Add the moments of another accumulator (e.g. from another worker).
+
+        Args:
+            other (RunningMoments): Moments to add
+
+        Returns:
+            RunningMoments: self
+        """
+        if other.count > 0:
+            self._combine(other.count, other.mean, other.m2, other.minimum, other.maximum)
+        return self
+
+    def _combine(self, count, mean, m2, minimum, maximum):
+        """Combine with the moments of a disjoint set of values."""
+        total = self.count + count
+        delta = mean - self.mean
+        self.mean += delta * count / total
+        self.m2 += m2 + delta ** 2 * self.count * count / total
+        self.count = total
+        self.minimum = min(self.minimum, float(minimum))
+        self.maximum = max(self.maximum, float(maximum))
+
+    def variance(self, ddof=1):
+        """
+        Get the variance.
+
+        Args:
+            ddof (int): Delta degrees of freedom (1 for the sample variance)
+
+        Returns:
+            float: Variance, or NaN with count <= ddof
+        """
+        if self.count <= ddof:
+            return np.nan
+        return self.m2 / (self.count - ddof)
+
+class QuantileSketch:
+    """Mergeable quantile summary: exact while small, weighted centroids once compressed."""
+
+    def __init__(self, capacity=5000):
+        """
+        Args:
+            capacity (int): Centroids kept after a compression; quantiles are
+                exact until more than 2 × capacity values were added, and
+                afterwards within about 1/capacity of the requested rank
+        """
+        self.capacity = capacity
+        self.means = np.empty(0, dtype=np.float64)
+        self.weights = np.empty(0, dtype=np.float64)
+        self.compressed = False
+
+    @property
+    def count(self):
+        """Number of values added."""
+        return float(self.weights.sum())
+
+    def update(self, values):
+        """
+        Add a chunk of values (NaN is ignored).
+
+        Args:
+            values (array-like): New values
+
+        Returns:
+            QuantileSketch: self
+        """
+        values = _finite(values)
+        self.means = np.concatenate([self.means, values])
+        self.weights = np.concatenate([self.weights, np.ones(len(values))])
+        if len(self.means) > 2 * self.capacity:
+            self._compress()
+        return self
+
+    def merge(self, other):
+        """
+        Add the values summarized by another sketch.
+
+        Args:
+            other (QuantileSketch): Sketch to add
+
+        Returns:
+            QuantileSketch: self
+        """
+        self.means = np.concatenate([self.means, other.means])
+        self.weights = np.concatenate([self.weights, other.weights])
+        self.compressed = self.compressed or other.compressed
+        if len(self.means) > 2 * self.capacity:
+            self._compress()
+        return self
+
+    def _compress(self):
+        """Merge neighbouring centroids into capacity bins of equal weight."""
+        order = np.argsort(self.means, kind='stable')
+        means = self.means[order]
+        weights = self.weights[order]
+        centers = np.cumsum(weights) - weights / 2
+        bins = np.minimum((centers / weights.sum() * self.capacity).astype(np.int64), self.capacity - 1)
+        totals = np.bincount(bins, weights=weights, minlength=self.capacity)
+        sums = np.bincount(bins, weights=means * weights, minlength=self.capacity)
+        used = totals > 0
+        self.means = sums[used] / totals[used]
+        self.weights = totals[used]
+        self.compressed = True
+
+    def quantile(self, q):
+        """
+        Estimate a quantile (exact, with linear interpolation, before any compression).
+
+        Args:
+            q (float): Quantile between 0 and 1 (0.5 for the median)
+
+        Returns:
+            float: Estimated quantile, or NaN without values
+        """
+        if len(self.means) == 0:
+            return np.nan
+        if not self.compressed:
+            return float(np.quantile(self.means, q))
+        order = np.argsort(self.means, kind='stable')
+        means = self.means[order]
+        weights = self.weights[order]
+        centers = np.cumsum(weights) - weights / 2
+        return float(np.interp(q * weights.sum(), centers, means))
+
+class StatisticsAccumulator:
+    """Running moments plus a median sketch for the values of a sample, fed per chunk or per worker."""
+
+    def __init__(self, capacity=5000):
+        """
+        Args:
+            capacity (int): Capacity of the quantile sketch (see QuantileSketch)
+        """
+        self.moments = RunningMoments()
+        self.sketch = QuantileSketch(capacity)
+
+    @classmethod
+    def from_values(cls, values, capacity=5000):
+        """
+        Build an accumulator from one set of values.
+
+        Args:
+            values (array-like): Values
+            capacity (int): Capacity of the quantile sketch
+
+        Returns:
+            StatisticsAccumulator: Accumulator of the values
+        """
+        return cls(capacity).update(values)
+
+    @property
+    def count(self):
+        """Number of values added."""
+        return self.moments.count
+
+    def update(self, values):
+        """
+        Add a chunk of values (NaN is ignored).
+
+        Args:
+            values (array-like): New values
+
+        Returns:
+            StatisticsAccumulator: self
+        """
+        values = _finite(values)
+        self.moments.update(values)
+        self.sketch.update(values)
+        return self
+
+    def merge(self, other):
+        """
+        Add the values summarized by another accumulator.
+
+        Args:
+            other (StatisticsAccumulator): Accumulator to add
+
+        Returns:
+            StatisticsAccumulator: self
+        """
+        self.moments.merge(other.moments)
+        self.sketch.merge(other.sketch)
+        return self
+
+    def summary(self):
+        """
+        Get the descriptive statistics of the values added.
+
+        Returns:
+            dict: n, mean, variance and std_dev (sample, ddof=1), minimum, maximum and median
+        """
+        variance = self.moments.variance(ddof=1)
+        empty = self.moments.count == 0
+        return {
+            'n': self.moments.count,
+            'mean': np.nan if empty else self.moments.mean,
+            'variance': variance,
+            'std_dev': float(np.sqrt(variance)),
+            'minimum': np.nan if empty else self.moments.minimum,
+            'maximum': np.nan if empty else self.moments.maximum,
+            'median': self.sketch.quantile(0.5)
+        }
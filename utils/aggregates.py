@@ -0,0 +1,148 @@
+import numpy as np
+import pandas as pd
+from utils.column_mapping import find_ua_column
+
+# Colunas somadas em cada agregado por grupo
+SUM_COLUMNS = ['DAP (cm)', 'HT (m)', 'VT (m³)', 'VT (m³/ha)', 'VT (st/ha)', 'AB_individual']
+
+def basal_area(dap_cm):
+    """
+    Calculate the individual basal area: AB = π × (DAP/2)², in cm².
+
+    Args:
+        dap_cm (float or array-like): Diameter at breast height in cm
+
+    Returns:
+        float or array-like: Basal area in cm²
+    """
+    return np.pi * (dap_cm / 2) ** 2
+
+def aggregate_groups(results, group_column):
+    """
+    Compute tree count and column sums per group of a processed dataframe.
+
+    Args:
+        results (pandas.DataFrame): Processed trees (with 'AB_individual')
+        group_column (str or array-like): Column name or group key per row
+
+    Returns:
+        pandas.DataFrame: 'n_trees' plus the sums of SUM_COLUMNS, indexed by group
+    """
+    keys = results[group_column] if isinstance(group_column, str) else group_column
+    # Somas sempre em float64, mesmo com a tabela armazenada em float32;
+    # observed=True: categorias sem árvores (ex.: UA toda descartada na validação) não viram grupos vazios
+    grouped = results[SUM_COLUMNS].astype(np.float64).groupby(keys, sort=False, observed=True)
+    partial = grouped.sum()
+    partial.insert(0, 'n_trees', grouped.size())
+    return partial
+
+class PlotAggregates:
+    """Per-plot sums computed once per processed dataset and shared by all tables and statistics."""
+
+    def __init__(self, table, ua_column=None):
+        """
+        Args:
+            table (pandas.DataFrame): 'n_trees' and SUM_COLUMNS sums indexed by plot
+            ua_column (str): UA column the plots came from, or None for the
+                uniform distribution fallback
+        """
+        self.table = table
+        self.ua_column = ua_column
+
+    @classmethod
+    def from_results(cls, results_df, project_info):
+        """
+        Build the plot aggregates with a single pass over the tree table.
+
+        Without a UA column the trees are split in order into
+        project_info['num_plots'] plots of equal size, the last plot taking
+        the remainder (plots are then numbered from 1).
+
+        Args:
+            results_df (pandas.DataFrame): Processed dataframe with volume calculations
+            project_info (dict): Project information including num_plots
+
+        Returns:
+            PlotAggregates: Aggregates for the dataset
+        """
+        ua_column = find_ua_column(results_df.columns)
+        data = results_df.assign(AB_individual=basal_area(results_df['DAP (cm)']))
+
+        if ua_column is not None:
+            table = aggregate_groups(data, ua_column).sort_index()
+        else:
+            num_plots = project_info['num_plots']
+            total_trees = len(results_df)
+            trees_per_plot = total_trees // num_plots
+            if trees_per_plot > 0:
+                plot_ids = np.minimum(np.arange(total_trees) // trees_per_plot, num_plots - 1)
+            else:
+                plot_ids = np.full(total_trees, num_plots - 1)
+            table = aggregate_groups(data, plot_ids + 1)
+            table = table.reindex(pd.RangeIndex(1, num_plots + 1), fill_value=0)
+
+        table['n_trees'] = table['n_trees'].astype(np.int64)
+        return cls(table, ua_column)
+
+    @property
+    def n_plots(self):
+        """Number of plots."""
+        return len(self.table)
+
+    def plot_volumes(self):
+        """
+        Get the volume per hectare of each plot (sum of the trees' VT (m³/ha)).
+
+        Returns:
+            pandas.Series: VT (m³/ha) per plot
+        """
+        return self.table['VT (m³/ha)']
+
+    def strata(self, results_df, stratum_column):
+        """
+        Get the stratum of each plot from a stratum column of the tree table.
+
+        Args:
+            results_df (pandas.DataFrame): Processed trees the aggregates came from
+            stratum_column (str): Column with the stratum of each tree
+
+        Returns:
+            pandas.Series: Stratum per plot, indexed like the aggregates
+        """
+        if self.ua_column is None:
+            raise ValueError("A amostragem estratificada exige a coluna UA/Parcela")
+        if stratum_column not in results_df.columns:
+            raise ValueError(f"Coluna de estrato '{stratum_column}' não encontrada")
+        pairs = results_df[[self.ua_column, stratum_column]].dropna().drop_duplicates()
+        conflicting = pairs[self.ua_column][pairs[self.ua_column].duplicated()].unique()
+        if len(conflicting) > 0:
+            raise ValueError(f"Parcelas em mais de um estrato: {', '.join(str(plot) for plot in conflicting[:10])}")
+        return pairs.set_index(self.ua_column)[stratum_column].reindex(self.table.index)
+
+    def plot_means(self, column):
+        """
+        Get the mean of a summed column per plot.
+
+        Args:
+            column (str): One of SUM_COLUMNS
+
+        Returns:
+            pandas.Series: Column sum divided by the number of trees per plot
+        """
+        return self.table[column] / self.table['n_trees']
+
+def merge_groups(running, partial):
+    """
+    Add the aggregates of new trees to running per-group aggregates.
+
+    Args:
+        running (pandas.DataFrame or None): Aggregates accumulated so far
+        partial (pandas.DataFrame): Aggregates of the new trees (see aggregate_groups)
+
+    Returns:
+        pandas.DataFrame: Updated aggregates, sorted by group key with integer tree counts
+    """
+    merged = partial if running is None else running.add(partial, fill_value=0)
+    merged = merged.sort_index()
+    merged['n_trees'] = merged['n_trees'].astype(np.int64)
+    return merged
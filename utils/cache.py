@@ -0,0 +1,307 @@
+import hashlib
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+import pandas as pd
+
+def hash_dataframe(df):
+    """
+    Compute a content hash of a dataframe (values, index, column names and dtypes).
+
+    Args:
+        df (pandas.DataFrame): Dataframe to hash
+
+    Returns:
+        str: Hex digest
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(repr(list(zip(df.columns, df.dtypes.astype(str)))).encode())
+    digest.update(pd.util.hash_pandas_object(df, index=True).to_numpy().tobytes())
+    return digest.hexdigest()
+
+def hash_params(params):
+    """
+    Compute a hash of a parameter dictionary such as project_info.
+
+    Args:
+        params (dict): Parameters with scalar values
+
+    Returns:
+        str: Hex digest
+    """
+    return hashlib.blake2b(repr(sorted(params.items())).encode(), digest_size=16).hexdigest()
+
+def hash_content(*parts):
+    """
+    Compute a hash of raw content such as an uploaded file.
+
+    Args:
+        *parts (bytes or str): Content parts (e.g. file name and file bytes)
+
+    Returns:
+        str: Hex digest
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    for part in parts:
+        digest.update(part.encode() if isinstance(part, str) else part)
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+def dataset_key(df, project_info):
+    """
+    Build the cache key of a processed dataset and its project parameters.
+
+    Args:
+        df (pandas.DataFrame): Processed dataframe
+        project_info (dict): Project information
+
+    Returns:
+        str: Cache key
+    """
+    return f"{hash_dataframe(df)}:{hash_params(project_info)}"
+
+def report_key(dataset, statistics, report_format, template_version):
+    """
+    Build the cache key of a generated report.
+
+    Args:
+        dataset (str): Dataset key (see dataset_key)
+        statistics (dict): Statistical analysis results
+        report_format (str): Report format, e.g. 'excel' or 'pdf'
+        template_version (int): Version of the report layout
+
+    Returns:
+        str: Hex digest
+    """
+    content = repr((dataset, hash_params(statistics), report_format, template_version))
+    return hashlib.blake2b(content.encode(), digest_size=16).hexdigest()
+
+class ResultCache:
+    """Size-bounded LRU cache for derived tables, shared by all Streamlit sessions of the process."""
+
+    def __init__(self, max_entries=64):
+        """
+        Args:
+            max_entries (int): Maximum number of cached results before evicting the least recently used
+        """
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_compute(self, name, key, func, *args, **kwargs):
+        """
+        Return the cached result of func for (name, key), computing it on a miss.
+
+        Cached results are shared between reruns and sessions, so callers
+        must not modify them.
+
+        Args:
+            name (str): Name of the cached computation
+            key (str): Dataset key (see dataset_key)
+            func (callable): Function computing the result
+            *args: Positional arguments for func
+            **kwargs: Keyword arguments for func
+
+        Returns:
+            object: Result of func
+        """
+        entry_key = (name, key)
+        with self._lock:
+            if entry_key in self._entries:
+                self._entries.move_to_end(entry_key)
+                self.hits += 1
+                return self._entries[entry_key]
+            self.misses += 1
+
+        result = func(*args, **kwargs)
+
+        with self._lock:
+            self._entries[entry_key] = result
+            self._entries.move_to_end(entry_key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return result
+
+    def clear(self):
+        """Remove all cached results and reset the counters."""
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        """
+        Get the cache counters.
+
+        Returns:
+            dict: hits, misses, entries, max_entries and hit_rate (%)
+        """
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'hit_rate': (self.hits / total) * 100 if total > 0 else 0
+            }
+
+# Cache compartilhado por todas as sessões do processo
+result_cache = ResultCache()
+
+class ArtifactCache:
+    """On-disk cache of generated report files, shared by every session and process using the same directory."""
+
+    def __init__(self, directory=None, ttl_seconds=24 * 3600, max_bytes=512 * 1024 ** 2):
+        """
+        Args:
+            directory (str): Storage directory (default: a folder in the system temp directory)
+            ttl_seconds (float): Time a stored file stays valid after its last use
+            max_bytes (int): Maximum total size before evicting the least recently used files
+        """
+        self.directory = directory or os.path.join(tempfile.gettempdir(), 'inventario_florestal_relatorios')
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def _path(self, key, extension):
+        """Path of the file stored for a key."""
+        return os.path.join(self.directory, f"{key}.{extension}")
+
+    def get(self, key, extension):
+        """
+        Read a stored artifact.
+
+        Args:
+            key (str): Artifact key (see report_key)
+            extension (str): File extension
+
+        Returns:
+            bytes: Stored content, or None if missing or expired
+        """
+        path = self._path(key, extension)
+        try:
+            if time.time() - os.path.getmtime(path) > self.ttl_seconds:
+                return None
+            with open(path, 'rb') as f:
+                content = f.read()
+            # A data de modificação marca o último uso (ordem LRU e TTL)
+            os.utime(path)
+        except OSError:
+            return None
+        return content
+
+    def put(self, key, extension, content):
+        """
+        Store an artifact, then evict expired and least recently used files.
+
+        Args:
+            key (str): Artifact key (see report_key)
+            extension (str): File extension
+            content (bytes): Artifact content
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._path(key, extension)
+        # Gravação atômica: outro processo nunca lê um arquivo incompleto
+        fd, temp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(content)
+            os.replace(temp_path, path)
+        except BaseException:
+            os.remove(temp_path)
+            raise
+        self._evict()
+
+    def get_or_create(self, key, extension, func, *args, **kwargs):
+        """
+        Return the stored artifact for key, building and storing it on a miss.
+
+        Args:
+            key (str): Artifact key (see report_key)
+            extension (str): File extension
+            func (callable): Function building the artifact (bytes)
+            *args: Positional arguments for func
+            **kwargs: Keyword arguments for func
+
+        Returns:
+            bytes: Artifact content
+        """
+        content = self.get(key, extension)
+        with self._lock:
+            if content is not None:
+                self.hits += 1
+                return content
+            self.misses += 1
+
+        content = func(*args, **kwargs)
+        self.put(key, extension, content)
+        return content
+
+    def _files(self):
+        """List (path, size, mtime) of the stored artifacts."""
+        files = []
+        try:
+            entries = list(os.scandir(self.directory))
+        except OSError:
+            return files
+        for entry in entries:
+            if entry.name.endswith('.tmp'):
+                continue
+            try:
+                info = entry.stat()
+            except OSError:
+                continue
+            files.append((entry.path, info.st_size, info.st_mtime))
+        return files
+
+    def _evict(self):
+        """Remove expired files, then the least recently used until under max_bytes."""
+        now = time.time()
+        files = sorted(self._files(), key=lambda item: item[2])
+        total = sum(size for _, size, _ in files)
+        for path, size, mtime in files:
+            if now - mtime <= self.ttl_seconds and total <= self.max_bytes:
+                continue
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+
+    def clear(self):
+        """Remove all stored artifacts and reset the counters."""
+        for path, _, _ in self._files():
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        """
+        Get the cache counters and storage usage.
+
+        Returns:
+            dict: hits, misses, files, bytes and max_bytes
+        """
+        files = self._files()
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'files': len(files),
+                'bytes': sum(size for _, size, _ in files),
+                'max_bytes': self.max_bytes
+            }
+
+# Relatórios gerados, reaproveitados entre cliques, sessões e processos
+artifact_cache = ArtifactCache()
@@ -1,5 +1,8 @@
 import pandas as pd
 import numpy as np
+from utils.validation import validate_trees, numeric_column
+from utils.column_mapping import resolve_exact_mapping, find_species_column
+from utils.equations import get_equation, EquationDispatch
 
 class ForestryCalculator:
     """Class for performing forestry calculations according to the specified formulas."""
@@ -20,19 +23,21 @@ class ForestryCalculator:
         """
         return cap / np.pi  # DAP em cm
     
-    def calculate_tree_volume(self, dap_cm, ht):
+    def calculate_tree_volume(self, dap_cm, ht, equation=None):
         """
-        Calculate tree volume using the exact formula provided by user.
-        Formula: VT = 0,000094 × DAP^1,830398 × HT^0,960913
+        Calculate tree volume with a registered volume equation.
+        Default formula: VT = 0,000094 × DAP^1,830398 × HT^0,960913
         
         Args:
             dap_cm (float): Diameter at breast height in cm (conforme fórmula)
             ht (float): Total height in meters
+            equation (str, VolumeEquation or EquationDispatch): Equation name
+                (None for the default) or per-tree dispatch
             
         Returns:
             float: Tree volume in cubic meters
         """
-        return 0.000094 * (dap_cm ** 1.830398) * (ht ** 0.960913)
+        return get_equation(equation).volume(dap_cm, ht)
     
     def calculate_volume_per_hectare(self, tree_volume, form_factor=None, plot_area_ha=None):
         """
@@ -62,26 +67,65 @@ class ForestryCalculator:
         """
         return volume_per_ha * 2.65
     
-    def process_data(self, df, form_factor, plot_area_ha):
+    def calculate_tree_metrics(self, cap, ht, equation=None):
+        """
+        Calculate DAP, VT, VT/ha and VT st/ha for whole arrays at once.
+        
+        Applies the same formulas as calculate_dap, calculate_tree_volume,
+        calculate_volume_per_hectare and calculate_stereo_volume, but over
+        NumPy arrays instead of one tree at a time. Values are not rounded.
+        
+        Args:
+            cap (numpy.ndarray): Circumference at breast height in cm
+            ht (numpy.ndarray): Total height in meters
+            equation (str or VolumeEquation): Volume equation (None for the default)
+            
+        Returns:
+            dict: Arrays keyed by result column name
+        """
+        dap = self.calculate_dap(cap)
+        vt = self.calculate_tree_volume(dap, ht, equation)
+        vt_ha = self.calculate_volume_per_hectare(vt)
+        vt_st_ha = self.calculate_stereo_volume(vt_ha)
+        
+        return {
+            'DAP (cm)': dap,
+            'VT (m³)': vt,
+            'VT (m³/ha)': vt_ha,
+            'VT (st/ha)': vt_st_ha
+        }
+    
+    def process_data(self, df, form_factor, plot_area_ha, validation=None, equation=None,
+                     species_equations=None, species_column=None):
         """
         Process the complete dataset with all forestry calculations.
         
+        The calculation does not render anything: everything the UI needs to
+        explain removed rows is returned in the diagnostics dictionary.
+        Rows with missing or non-numeric CAP/HT are removed; non-positive and
+        implausible values are only counted.
+        
         Args:
             df (pandas.DataFrame): Input dataframe with tree data
             form_factor (float): Form factor for calculations
             plot_area_ha (float): Plot area in hectares
+            validation (ValidationIndex): Result of validate_trees for df, if
+                already computed (otherwise it is computed here)
+            equation (str or VolumeEquation): Volume equation (None for the default)
+            species_equations (dict): Species → equation name, for species
+                with their own equation (others use `equation`)
+            species_column (str): Species column for species_equations
+                (default: detected from the column names)
             
         Returns:
-            pandas.DataFrame: Processed dataframe with all calculations
+            tuple: (pandas.DataFrame, dict) processed dataframe with all
+                calculations and the processing diagnostics
         """
-        import streamlit as st
-        
         initial_count = len(df)
-        st.write(f"**Iniciando processamento com {initial_count} árvores**")
         
         # Apply column mapping first
-        results_df = self._apply_column_mapping(df.copy())
-        st.write(f"**Após mapeamento: {len(results_df)} árvores**")
+        results_df = self._apply_column_mapping(df)
+        mapped_count = len(results_df)
         
         # Validate required columns
         required_columns = ['CAP (cm)', 'HT (m)']
@@ -89,92 +133,91 @@ class ForestryCalculator:
             if col not in results_df.columns:
                 raise ValueError(f"Required column '{col}' not found in data")
         
-        # Check for missing values before removing them
-        missing_cap = results_df['CAP (cm)'].isna().sum()
-        missing_ht = results_df['HT (m)'].isna().sum()
-        if missing_cap > 0 or missing_ht > 0:
-            st.warning(f"Valores vazios encontrados: CAP={missing_cap}, HT={missing_ht}")
-        
-        # Remove rows with missing values in critical columns
-        before_dropna = len(results_df)
+        # Classificação de todas as linhas em uma única passada
+        if validation is None:
+            validation = validate_trees(results_df, keep_values=True)
         
         # Identificar linhas com dados vazios antes de remover
-        empty_rows = results_df[results_df[required_columns].isna().any(axis=1)]
-        if len(empty_rows) > 0:
-            st.write("**Linhas com dados vazios que serão removidas:**")
-            if 'Nº da árvore' in empty_rows.columns:
-                tree_numbers = empty_rows['Nº da árvore'].tolist()
-                st.write(f"Árvores: {tree_numbers}")
-            st.dataframe(empty_rows[required_columns + (['Nº da árvore'] if 'Nº da árvore' in empty_rows.columns else [])].head(10))
-        
-        results_df = results_df.dropna(subset=required_columns)
-        after_dropna = len(results_df)
-        if before_dropna > after_dropna:
-            st.write(f"**Após remover linhas vazias: {after_dropna} árvores (-{before_dropna-after_dropna})**")
-        
-        # Convert to numeric and check for conversion errors
-        cap_before = len(results_df)
-        results_df['CAP (cm)'] = pd.to_numeric(results_df['CAP (cm)'], errors='coerce')
-        results_df['HT (m)'] = pd.to_numeric(results_df['HT (m)'], errors='coerce')
-        
-        # Check how many became NaN after conversion
-        invalid_cap = results_df['CAP (cm)'].isna().sum()
-        invalid_ht = results_df['HT (m)'].isna().sum()
-        if invalid_cap > 0 or invalid_ht > 0:
-            st.warning(f"Valores não numéricos encontrados: CAP={invalid_cap}, HT={invalid_ht}")
-            
-            # Show some examples of invalid data
-            invalid_rows = results_df[results_df['CAP (cm)'].isna() | results_df['HT (m)'].isna()]
-            if len(invalid_rows) > 0:
-                st.write("Exemplos de dados inválidos:")
-                st.dataframe(invalid_rows[['CAP (cm)', 'HT (m)']].head())
-        
-        # Identificar linhas com dados não numéricos antes de remover
-        invalid_rows = results_df[results_df['CAP (cm)'].isna() | results_df['HT (m)'].isna()]
-        if len(invalid_rows) > 0:
-            st.write("**Linhas com dados não numéricos que serão removidas:**")
-            if 'Nº da árvore' in invalid_rows.columns:
-                tree_numbers = invalid_rows['Nº da árvore'].tolist()
-                st.write(f"Árvores com dados inválidos: {tree_numbers}")
-            st.dataframe(invalid_rows[['CAP (cm)', 'HT (m)'] + (['Nº da árvore'] if 'Nº da árvore' in invalid_rows.columns else [])].head(10))
-        
-        # Remove rows with invalid numeric values
-        before_numeric_filter = len(results_df)
-        results_df = results_df.dropna(subset=['CAP (cm)', 'HT (m)'])
-        after_numeric_filter = len(results_df)
-        
-        if before_numeric_filter > after_numeric_filter:
-            st.write(f"**Após remover dados não numéricos: {after_numeric_filter} árvores (-{before_numeric_filter-after_numeric_filter})**")
-        
-        # Calculate DAP in centimeters (conforme fórmula)
-        results_df['DAP (cm)'] = results_df['CAP (cm)'].apply(self.calculate_dap)
-        
-        # Calculate tree volume using DAP in cm and HT in meters
-        results_df['VT (m³)'] = results_df.apply(
-            lambda row: self.calculate_tree_volume(row['DAP (cm)'], row['HT (m)']),
-            axis=1
-        )
-        
-        # Calculate volume per hectare using the new formula: VT(m³/ha) = VT(m³)/0,72
-        results_df['VT (m³/ha)'] = results_df['VT (m³)'].apply(
-            lambda vt: self.calculate_volume_per_hectare(vt)
+        empty_mask = validation.mask('missing_cap', 'missing_ht')
+        empty_rows = results_df.index[empty_mask]
+        empty_tree_numbers = self._tree_numbers(results_df, empty_mask)
+        
+        # Identificar linhas com dados não numéricos (entre as não vazias) antes de remover
+        invalid_mask = validation.mask('non_numeric_cap', 'non_numeric_ht') & ~empty_mask
+        invalid_cap = int(np.count_nonzero(validation.mask('non_numeric_cap') & ~empty_mask))
+        invalid_ht = int(np.count_nonzero(validation.mask('non_numeric_ht') & ~empty_mask))
+        invalid_rows = results_df.index[invalid_mask]
+        invalid_tree_numbers = self._tree_numbers(results_df, invalid_mask)
+        
+        keep_mask = ~(empty_mask | invalid_mask)
+        if validation.values is not None:
+            # Reaproveitar a conversão numérica feita na validação
+            numeric = validation.values
+        else:
+            numeric = {col: numeric_column(results_df[col]) for col in required_columns}
+        if not keep_mask.all():
+            results_df = results_df[keep_mask]
+            numeric = {col: values[keep_mask] for col, values in numeric.items()}
+            # Categorias só das linhas descartadas (ex.: UA sem árvore válida) não devem gerar grupos vazios
+            results_df = results_df.assign(**{
+                col: results_df[col].cat.remove_unused_categories()
+                for col in results_df.columns if isinstance(results_df[col].dtype, pd.CategoricalDtype)
+            })
+        results_df = results_df.assign(**numeric)
+        
+        # Equação por espécie: índice resolvido pelos códigos categóricos, sem filtrar linhas
+        if species_equations:
+            species_column = species_column or find_species_column(results_df.columns)
+            if species_column is None:
+                raise ValueError("Coluna de espécie não encontrada para aplicar as equações por espécie")
+            equation = EquationDispatch.from_species(results_df[species_column], species_equations, equation)
+        
+        # Cálculos vetorizados sobre as colunas inteiras (sem apply linha a linha)
+        metrics = self.calculate_tree_metrics(
+            results_df['CAP (cm)'].to_numpy(dtype=np.float64),
+            results_df['HT (m)'].to_numpy(dtype=np.float64),
+            equation
         )
         
-        # Calculate stereo volume per hectare
-        results_df['VT (st/ha)'] = results_df['VT (m³/ha)'].apply(self.calculate_stereo_volume)
-        
         # Round all calculated values to 4 decimal places for precision
-        calculation_columns = ['DAP (cm)', 'VT (m³)', 'VT (m³/ha)', 'VT (st/ha)']
-        for col in calculation_columns:
-            results_df[col] = results_df[col].round(4)
-        
-        final_count = len(results_df)
-        st.success(f"**Processamento concluído: {final_count} árvores processadas de {initial_count} originais**")
+        for col, values in metrics.items():
+            results_df[col] = np.round(values, 4)
+        
+        diagnostics = {
+            'initial_count': initial_count,
+            'mapped_count': mapped_count,
+            'missing_cap': validation.counts['missing_cap'],
+            'missing_ht': validation.counts['missing_ht'],
+            'empty_rows': empty_rows.tolist(),
+            'empty_tree_numbers': empty_tree_numbers,
+            'invalid_cap': invalid_cap,
+            'invalid_ht': invalid_ht,
+            'invalid_rows': invalid_rows.tolist(),
+            'invalid_tree_numbers': invalid_tree_numbers,
+            'dropped_rows': empty_rows.append(invalid_rows).tolist(),
+            'non_positive_cap': validation.counts['non_positive_cap'],
+            'non_positive_ht': validation.counts['non_positive_ht'],
+            'implausible_dap': validation.counts['implausible_dap'],
+            'implausible_ht': validation.counts['implausible_ht'],
+            'final_count': len(results_df)
+        }
         
-        if final_count < initial_count:
-            st.error(f"❌ PERDA TOTAL: {initial_count - final_count} árvores foram removidas durante o processamento")
+        return results_df, diagnostics
+    
+    def _tree_numbers(self, df, mask):
+        """
+        Get the tree numbers ('Nº da árvore') of the rows selected by a mask.
         
-        return results_df
+        Args:
+            df (pandas.DataFrame): Mapped dataframe
+            mask (array-like): Boolean row mask
+            
+        Returns:
+            list: Tree numbers, or an empty list if the column is absent
+        """
+        if 'Nº da árvore' not in df.columns:
+            return []
+        return df.loc[mask, 'Nº da árvore'].tolist()
     
     def validate_input_data(self, df):
         """
@@ -201,27 +244,9 @@ class ForestryCalculator:
         if len(df) == 0:
             errors.append("Planilha vazia ou sem dados válidos")
         
-        # Check for numeric values in CAP and HT columns
-        if 'CAP (cm)' in df.columns:
-            non_numeric_cap = df['CAP (cm)'].apply(lambda x: not pd.api.types.is_numeric_dtype(type(x)) and pd.notna(x))
-            if non_numeric_cap.any():
-                errors.append("Valores não numéricos encontrados na coluna CAP (cm)")
-        
-        if 'HT (m)' in df.columns:
-            non_numeric_ht = df['HT (m)'].apply(lambda x: not pd.api.types.is_numeric_dtype(type(x)) and pd.notna(x))
-            if non_numeric_ht.any():
-                errors.append("Valores não numéricos encontrados na coluna HT (m)")
-        
-        # Check for negative values
-        if 'CAP (cm)' in df.columns:
-            negative_cap = df['CAP (cm)'] <= 0
-            if negative_cap.any():
-                errors.append("Valores negativos ou zero encontrados na coluna CAP (cm)")
-        
-        if 'HT (m)' in df.columns:
-            negative_ht = df['HT (m)'] <= 0
-            if negative_ht.any():
-                errors.append("Valores negativos ou zero encontrados na coluna HT (m)")
+        # Regras por linha (vazios, não numéricos, não positivos, fora da faixa) em uma passada
+        if 'CAP (cm)' in df.columns and 'HT (m)' in df.columns:
+            errors.extend(validate_trees(df).errors())
         
         return errors
     
@@ -235,8 +260,6 @@ class ForestryCalculator:
         Returns:
             pandas.DataFrame: Dataframe with mapped column names
         """
-        df = df.copy()
-        
         # Map column names to expected format
         column_mapping = {
             'N°': 'Nº da árvore',
@@ -247,10 +270,8 @@ class ForestryCalculator:
             'Altura total HT(m)': 'HT (m)'
         }
         
-        # Rename columns if they exist with different names
-        for old_name, new_name in column_mapping.items():
-            if old_name in df.columns:
-                df = df.rename(columns={old_name: new_name})
+        # Plano de renomeação compilado uma vez por cabeçalho e aplicado sem copiar os dados
+        df = resolve_exact_mapping(df.columns, column_mapping).apply(df)
         
         # Combine nome comum and científico if they are separate
         if 'Nome comum/científico' not in df.columns:
@@ -0,0 +1,291 @@
+from functools import lru_cache
+import numpy as np
+import pandas as pd
+
+# Palavras-chave usadas para identificar colunas de parcela e de espécie
+UA_KEYWORDS = ['UA', 'PARCELA', 'UNIDADE']
+SPECIES_KEYWORDS = ['NOME COMUM', 'ESPÉCIE', 'SPECIES', 'NOME CIENTÍFICO']
+
+
+def find_ua_column(columns):
+    """
+    Find the UA (plot) column among the given column names.
+
+    Args:
+        columns (iterable): Column names
+
+    Returns:
+        str or None: First column that looks like a UA/plot column
+    """
+    for col in columns:
+        col_upper = str(col).upper()
+        if any(keyword in col_upper for keyword in UA_KEYWORDS):
+            return col
+    return None
+
+
+def find_species_column(columns):
+    """
+    Find the species column (common or scientific name) among the given column names.
+
+    Args:
+        columns (iterable): Column names
+
+    Returns:
+        str or None: First column that looks like a species column
+    """
+    for col in columns:
+        col_upper = str(col).upper()
+        if any(keyword in col_upper for keyword in SPECIES_KEYWORDS):
+            return col
+    return None
+
+
+class ColumnMappingPlan:
+    """Rename plan compiled once for a spreadsheet header and reused for every file with the same header."""
+
+    def __init__(self, columns, messages, rules):
+        """
+        Args:
+            columns (tuple): New column names, in the original order
+            messages (tuple): Mapping messages shown to the user
+            rules (tuple): (original name, new name, rule) per column, for auditing
+        """
+        self.columns = columns
+        self.messages = messages
+        self.rules = rules
+
+    @property
+    def renamed(self):
+        """Original → new name of the columns whose name changes."""
+        return {original: new for original, new, _ in self.rules if original != new}
+
+    def apply(self, df):
+        """
+        Rename the columns of a dataframe with this plan.
+
+        Only the column labels are replaced: the returned dataframe is a
+        shallow copy sharing the data of df.
+
+        Args:
+            df (pandas.DataFrame): Dataframe with the header the plan was compiled for
+
+        Returns:
+            pandas.DataFrame: Dataframe with the new column names
+        """
+        renamed_df = df.copy(deep=False)
+        renamed_df.columns = list(self.columns)
+        return renamed_df
+
+    def audit(self):
+        """
+        Get the matched rule of each column as a table.
+
+        Returns:
+            pandas.DataFrame: 'Coluna original', 'Coluna mapeada' and 'Regra'
+        """
+        return pd.DataFrame(list(self.rules), columns=['Coluna original', 'Coluna mapeada', 'Regra'])
+
+
+@lru_cache(maxsize=128)
+def _compile_plan(signature):
+    """Compile the standard-name plan for a header signature (cached per signature)."""
+    mapping_results = []
+    new_columns = []
+    rules = []
+    used_mappings = set()
+
+    for col in signature:
+        original_col = str(col).strip()
+        col_upper = original_col.upper()
+        mapped_name = None
+        rule = None
+
+        # Detectar coluna de numeração das árvores
+        if ('N°' in col_upper or col_upper in ['N', 'NO', 'NUM', 'NUMERO', 'NÚMERO']) and 'Nº da árvore' not in used_mappings:
+            mapped_name, rule = 'Nº da árvore', 'numero_arvore'
+
+        # Detectar nome comum
+        elif 'NOME' in col_upper and 'COMUM' in col_upper and 'Nome comum' not in used_mappings:
+            mapped_name, rule = 'Nome comum', 'nome_comum'
+
+        # Detectar nome científico
+        elif 'NOME' in col_upper and ('CIENTÍFICO' in col_upper or 'CIENTIFICO' in col_upper) and 'Nome científico' not in used_mappings:
+            mapped_name, rule = 'Nome científico', 'nome_cientifico'
+
+        # Detectar CAP
+        elif 'CAP' in col_upper and 'CAP (cm)' not in used_mappings:
+            mapped_name, rule = 'CAP (cm)', 'cap'
+
+        # Detectar altura (HT)
+        elif ('HT' in col_upper or 'ALTURA' in col_upper) and 'HT (m)' not in used_mappings:
+            mapped_name, rule = 'HT (m)', 'altura'
+
+        # Se não mapear ou já estiver usado, manter nome original
+        if mapped_name is None:
+            # Garantir nome único
+            base_name = original_col
+            counter = 1
+            while base_name in new_columns:
+                base_name = f"{original_col}_{counter}"
+                counter += 1
+            mapped_name = base_name
+            rule = 'mantido' if base_name == original_col else 'mantido_renumerado'
+            mapping_results.append(f"• '{original_col}' → mantido como '{mapped_name}'")
+        else:
+            used_mappings.add(mapped_name)
+            mapping_results.append(f"✓ '{original_col}' → '{mapped_name}'")
+
+        new_columns.append(mapped_name)
+        rules.append((col, mapped_name, rule))
+
+    return ColumnMappingPlan(tuple(new_columns), tuple(mapping_results), tuple(rules))
+
+
+@lru_cache(maxsize=128)
+def _compile_exact_plan(signature, mapping):
+    """Compile an exact-name rename plan for a header signature (cached per signature and mapping)."""
+    mapping = dict(mapping)
+    new_columns = []
+    mapping_results = []
+    rules = []
+    for col in signature:
+        if col in mapping:
+            new_columns.append(mapping[col])
+            mapping_results.append(f"✓ '{col}' → '{mapping[col]}'")
+            rules.append((col, mapping[col], f"exato:{col}"))
+        else:
+            new_columns.append(col)
+            rules.append((col, col, 'mantido'))
+    return ColumnMappingPlan(tuple(new_columns), tuple(mapping_results), tuple(rules))
+
+
+def resolve_mapping(columns):
+    """
+    Get the standard-name rename plan for a spreadsheet header.
+
+    The plan is compiled on the first call for a header and then served
+    from a cache, so uploads and chunks with the same layout skip the
+    keyword scan.
+
+    Args:
+        columns (iterable): Original column names
+
+    Returns:
+        ColumnMappingPlan: Rename plan (shared; do not modify)
+    """
+    return _compile_plan(tuple(columns))
+
+
+def resolve_exact_mapping(columns, mapping):
+    """
+    Get a rename plan that renames columns by exact name.
+
+    Args:
+        columns (iterable): Original column names
+        mapping (dict): Original name → new name
+
+    Returns:
+        ColumnMappingPlan: Rename plan (shared; do not modify)
+    """
+    return _compile_exact_plan(tuple(columns), tuple(mapping.items()))
+
+
+def mapping_cache_info():
+    """
+    Get the hit/miss counters of the compiled plan cache.
+
+    Returns:
+        dict: hits, misses and plans (cached headers)
+    """
+    info = _compile_plan.cache_info()
+    return {'hits': info.hits, 'misses': info.misses, 'plans': info.currsize}
+
+
+def resolve_column_names(columns):
+    """
+    Resolve the standard column names for a spreadsheet header.
+
+    Args:
+        columns (iterable): Original column names
+
+    Returns:
+        tuple: (list of new column names, list of mapping messages)
+    """
+    plan = resolve_mapping(columns)
+    return list(plan.columns), list(plan.messages)
+
+
+def combine_name_categories(common, scientific):
+    """
+    Build the combined 'common / scientific' name as a categorical.
+
+    The labels are formatted once per distinct (common, scientific) pair,
+    using the category codes of both columns, instead of once per row.
+
+    Args:
+        common (pandas.Series): Common names
+        scientific (pandas.Series): Scientific names
+
+    Returns:
+        pandas.Series: Categorical 'Nome comum / Nome científico' per row
+    """
+    common = common.astype('category')
+    scientific = scientific.astype('category')
+
+    # Código 0 representa valor vazio (exibido como 'nan')
+    common_labels = np.append('nan', common.cat.categories.astype(str))
+    scientific_labels = np.append('nan', scientific.cat.categories.astype(str))
+    n_scientific = len(scientific_labels)
+
+    pairs = (common.cat.codes.to_numpy(np.int64) + 1) * n_scientific + (scientific.cat.codes.to_numpy(np.int64) + 1)
+    codes, unique_pairs = pd.factorize(pairs, sort=True)
+    labels = [
+        f"{common_labels[pair // n_scientific]} / {scientific_labels[pair % n_scientific]}"
+        for pair in unique_pairs
+    ]
+    label_codes, categories = pd.factorize(np.array(labels, dtype=object))
+    return pd.Series(pd.Categorical.from_codes(label_codes[codes], categories=categories), index=common.index)
+
+
+def add_combined_name_column(df):
+    """
+    Add the 'Nome comum/científico' column from the separate name columns.
+
+    Args:
+        df (pandas.DataFrame): Dataframe with mapped column names (modified in place)
+
+    Returns:
+        str or None: Mapping message, or None if no name column exists
+    """
+    if 'Nome comum' in df.columns and 'Nome científico' in df.columns:
+        df['Nome comum/científico'] = combine_name_categories(df['Nome comum'], df['Nome científico'])
+        return "✓ Combinadas colunas de nomes"
+    elif 'Nome comum' in df.columns:
+        df['Nome comum/científico'] = df['Nome comum']
+        return "✓ Usando nome comum como identificação"
+    elif 'Nome científico' in df.columns:
+        df['Nome comum/científico'] = df['Nome científico']
+        return "✓ Usando nome científico como identificação"
+    return None
+
+
+def map_columns(df):
+    """
+    Rename the columns of a spreadsheet to the standard names and add the combined name column.
+
+    Args:
+        df (pandas.DataFrame): Spreadsheet as read from the file
+
+    Returns:
+        tuple: (mapped dataframe, list of mapping messages)
+    """
+    plan = resolve_mapping(df.columns)
+    df = plan.apply(df)
+    mapping_results = list(plan.messages)
+
+    combined_message = add_combined_name_column(df)
+    if combined_message:
+        mapping_results.append(combined_message)
+
+    return df, mapping_results
@@ -0,0 +1,280 @@
+import numpy as np
+
+# Modelos suportados: ln(VT) = b0 + b1·ln(DAP) + b2·ln(HT) após a transformação
+# logarítmica, com os coeficientes na forma original da equação
+MODELS = {
+    'schumacher_hall': "Schumacher-Hall: VT = a·DAP^b·HT^c",
+    'spurr': "Spurr (logarítmica): VT = a·(DAP²·HT)^b",
+    'husch': "Husch: VT = a·DAP^b"
+}
+
+# Número de coeficientes (a, b, c...) de cada modelo
+MODEL_COEFFICIENTS = {'schumacher_hall': 3, 'spurr': 2, 'husch': 2}
+
+DEFAULT_EQUATION = 'padrao'
+
+def species_key(name):
+    """
+    Normalize a species name or code for matching the species → equation table.
+
+    Args:
+        name (object): Species as read from a spreadsheet (text or numeric code)
+
+    Returns:
+        str: Stripped text; integral numbers lose the decimal part (12.0 → '12')
+    """
+    if isinstance(name, (float, np.floating)) and float(name).is_integer():
+        name = int(name)
+    return str(name).strip()
+
+def _format_number(value):
+    """Format a coefficient with decimal comma and no exponent (e.g. 0,000094)."""
+    return np.format_float_positional(value, trim='-').replace('.', ',')
+
+class VolumeEquation:
+    """Allometric volume equation evaluated in log space over whole arrays."""
+
+    def __init__(self, name, model, coefficients, label=None):
+        """
+        Args:
+            name (str): Registry name
+            model (str): One of MODELS
+            coefficients (tuple): Coefficients in the original form (a, b[, c]); a > 0
+            label (str): Description shown to the user
+        """
+        if model not in MODELS:
+            raise ValueError(f"Modelo de equação desconhecido: '{model}'")
+        coefficients = tuple(float(value) for value in coefficients)
+        if len(coefficients) != MODEL_COEFFICIENTS[model]:
+            raise ValueError(f"O modelo '{model}' usa {MODEL_COEFFICIENTS[model]} coeficientes")
+        if coefficients[0] <= 0:
+            raise ValueError("O coeficiente 'a' deve ser positivo")
+
+        self.name = name
+        self.model = model
+        self.coefficients = coefficients
+        self.label = label or name
+        self.log_coefficients = self._log_linear(model, coefficients)
+
+    def __repr__(self):
+        # Representação estável: entra nas chaves de cache quando a equação não está registrada
+        return f"VolumeEquation({self.name!r}, {self.model!r}, {self.coefficients!r})"
+
+    @staticmethod
+    def _log_linear(model, coefficients):
+        """
+        Rewrite the equation as ln(VT) = b0 + b1·ln(DAP) + b2·ln(HT).
+
+        Returns:
+            tuple: (b0, b1, b2)
+        """
+        a, b = coefficients[0], coefficients[1]
+        if model == 'schumacher_hall':
+            return (np.log(a), b, coefficients[2])
+        if model == 'spurr':
+            return (np.log(a), 2 * b, b)
+        return (np.log(a), b, 0.0)
+
+    def log_volume(self, log_dap, log_ht):
+        """
+        Evaluate ln(VT) from precomputed logarithms.
+
+        Args:
+            log_dap (numpy.ndarray): ln(DAP in cm)
+            log_ht (numpy.ndarray): ln(HT in m)
+
+        Returns:
+            numpy.ndarray: ln(VT in m³)
+        """
+        b0, b1, b2 = self.log_coefficients
+        result = b1 * log_dap
+        result += b0
+        if b2 != 0.0:
+            result += b2 * log_ht
+        return result
+
+    def volume(self, dap, ht):
+        """
+        Calculate tree volumes.
+
+        Zero DAP or HT gives zero volume and negative values give NaN.
+
+        Args:
+            dap (float or numpy.ndarray): Diameter at breast height in cm
+            ht (float or numpy.ndarray): Total height in meters
+
+        Returns:
+            float or numpy.ndarray: Tree volume in cubic meters
+        """
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.exp(self.log_volume(np.log(dap), np.log(ht)))
+
+    @property
+    def formula(self):
+        """Equation as written in reports, e.g. '0,000094*DAP^1,830398*HT^0,960913'."""
+        values = [_format_number(value) for value in self.coefficients]
+        if self.model == 'schumacher_hall':
+            return f"{values[0]}*DAP^{values[1]}*HT^{values[2]}"
+        if self.model == 'spurr':
+            return f"{values[0]}*(DAP^2*HT)^{values[1]}"
+        return f"{values[0]}*DAP^{values[1]}"
+
+class EquationRegistry:
+    """Named volume equations available to projects and species groups."""
+
+    def __init__(self):
+        self._equations = {}
+
+    def register(self, equation, replace=False):
+        """
+        Add an equation to the registry.
+
+        Args:
+            equation (VolumeEquation): Equation to add
+            replace (bool): Allow replacing an equation with the same name
+
+        Returns:
+            VolumeEquation: The registered equation
+        """
+        if equation.name in self._equations and not replace:
+            raise ValueError(f"Equação '{equation.name}' já registrada")
+        self._equations[equation.name] = equation
+        return equation
+
+    def get(self, name=None):
+        """
+        Get an equation by name.
+
+        Args:
+            name (str or VolumeEquation): Equation name (None for the default);
+                an equation or dispatch object is returned as is
+
+        Returns:
+            VolumeEquation: Registered equation
+        """
+        if isinstance(name, (VolumeEquation, EquationDispatch)):
+            return name
+        name = name or DEFAULT_EQUATION
+        if name not in self._equations:
+            raise ValueError(f"Equação de volume não registrada: '{name}'")
+        return self._equations[name]
+
+    def names(self):
+        """
+        Get the registered equation names.
+
+        Returns:
+            list: Names in registration order
+        """
+        return list(self._equations)
+
+# Registro global; a equação padrão é a usada desde a primeira versão do sistema
+volume_equations = EquationRegistry()
+volume_equations.register(VolumeEquation(
+    DEFAULT_EQUATION, 'schumacher_hall', (0.000094, 1.830398, 0.960913),
+    label="Padrão (Schumacher-Hall)"
+))
+
+class EquationDispatch:
+    """Per-tree equation index for projects that use different equations per species."""
+
+    def __init__(self, equations, index):
+        """
+        Args:
+            equations (list): Equations used (position = equation index)
+            index (numpy.ndarray): Equation index of each tree
+        """
+        self.equations = equations
+        self.index = index
+
+    @classmethod
+    def from_species(cls, species, species_equations, default=None):
+        """
+        Resolve a species → equation table into an equation index per tree.
+
+        The table is looked up once per distinct species (category) and the
+        result is gathered through the categorical codes, so the cost per
+        tree does not depend on the number of species.
+
+        Species and table keys are compared after species_key, so trailing
+        spaces and numeric species codes match the table.
+
+        Args:
+            species (pandas.Series): Species of each tree
+            species_equations (dict): Species name → equation name or VolumeEquation
+            default (str or VolumeEquation): Equation for species not in the table
+
+        Returns:
+            EquationDispatch: Dispatch for the trees
+        """
+        equations = [get_equation(default)]
+        positions = {equations[0].name: 0}
+        species_equations = {species_key(name): equation for name, equation in species_equations.items()}
+        species = species.astype('category')
+        categories = species.cat.categories
+
+        # Índice da equação por categoria; a última posição atende código -1 (espécie vazia)
+        lookup = np.zeros(len(categories) + 1, dtype=np.int16)
+        for code, name in enumerate(categories):
+            name = species_key(name)
+            if name not in species_equations:
+                continue
+            equation = get_equation(species_equations[name])
+            if equation.name not in positions:
+                positions[equation.name] = len(equations)
+                equations.append(equation)
+            lookup[code] = positions[equation.name]
+
+        return cls(equations, lookup[species.cat.codes.to_numpy()])
+
+    def counts(self):
+        """
+        Get the number of trees per equation.
+
+        Returns:
+            dict: Equation name → number of trees
+        """
+        totals = np.bincount(self.index, minlength=len(self.equations))
+        return {equation.name: int(total) for equation, total in zip(self.equations, totals)}
+
+    def volume(self, dap, ht):
+        """
+        Calculate tree volumes with the equation of each tree.
+
+        Trees are grouped by equation with one stable sort of the index;
+        each equation kernel runs once over its gathered subset and the
+        results are scattered back to the original positions.
+
+        Args:
+            dap (numpy.ndarray): Diameter at breast height in cm
+            ht (numpy.ndarray): Total height in meters
+
+        Returns:
+            numpy.ndarray: Tree volume in cubic meters
+        """
+        if len(self.equations) == 1:
+            return self.equations[0].volume(dap, ht)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            log_dap = np.log(dap)
+            log_ht = np.log(ht)
+            order = np.argsort(self.index, kind='stable')
+            bounds = np.concatenate(([0], np.cumsum(np.bincount(self.index, minlength=len(self.equations)))))
+            log_volume = np.empty(len(dap), dtype=np.float64)
+            for position, equation in enumerate(self.equations):
+                rows = order[bounds[position]:bounds[position + 1]]
+                if len(rows) > 0:
+                    log_volume[rows] = equation.log_volume(log_dap[rows], log_ht[rows])
+            return np.exp(log_volume, out=log_volume)
+
+def get_equation(name=None):
+    """
+    Get a registered volume equation.
+
+    Args:
+        name (str or VolumeEquation): Equation name (None for the default)
+
+    Returns:
+        VolumeEquation: Equation
+    """
+    return volume_equations.get(name)
@@ -0,0 +1,195 @@
+import pandas as pd
+from utils.aggregates import SUM_COLUMNS, PlotAggregates, aggregate_groups, merge_groups, basal_area
+from utils.calculations import ForestryCalculator
+from utils.column_mapping import find_ua_column, find_species_column
+from utils.memory import compact_dataframe, concat_compact, memory_footprint
+from utils.statistics import StatisticsAnalyzer
+from utils.validation import validate_trees
+
+class InventoryProject:
+    """Processed tree table of a project with running per-plot and per-species aggregates, extended one field batch at a time."""
+
+    def __init__(self, equation=None, species_equations=None, use_float32=False):
+        """
+        Args:
+            equation (str or VolumeEquation): Volume equation (None for the default)
+            species_equations (dict): Species → equation name, for species with their own equation
+            use_float32 (bool): Store measurement columns as float32
+        """
+        self.equation = equation
+        self.species_equations = species_equations
+        self.use_float32 = use_float32
+        self.columns = None
+        self.ua_column = None
+        self.species_column = None
+        self.n_batches = 0
+        self.n_input_rows = 0
+        self.validation = None
+        self.diagnostics = None
+        self.plot_table = None
+        self.species_table = None
+        self.footprint_before = 0
+        self._input_batches = []
+        self._result_batches = []
+        self._input_data = None
+        self._results = None
+
+    def append(self, batch, validation=None):
+        """
+        Process a batch of field data and merge it into the project.
+
+        Only the new rows are validated and calculated; the per-plot and
+        per-species aggregates are updated by adding the batch sums, so
+        historical rows are never read again. Rows are labeled after the
+        rows of the previous batches.
+
+        Args:
+            batch (pandas.DataFrame): Mapped field data (same columns as the first batch)
+            validation (ValidationIndex): Result of validate_trees for the batch
+                (with keep_values=True), if already computed
+
+        Returns:
+            dict: Processing diagnostics of the batch
+        """
+        if self.columns is not None and list(batch.columns) != self.columns:
+            raise ValueError("As colunas do lote não correspondem às colunas do projeto")
+        if self.n_batches > 0 and self.ua_column is None:
+            raise ValueError("Acrescentar lotes exige a coluna UA/Parcela")
+
+        if self.n_input_rows > 0:
+            batch = batch.set_axis(pd.RangeIndex(self.n_input_rows, self.n_input_rows + len(batch)))
+            if validation is not None:
+                validation.index = batch.index
+        if validation is None:
+            validation = validate_trees(batch, keep_values=True)
+
+        # O cálculo por árvore não usa fator de forma nem área da parcela
+        results, diagnostics = ForestryCalculator().process_data(
+            batch, None, None, validation, self.equation, self.species_equations
+        )
+        # As colunas convertidas só servem ao process_data; liberar a memória
+        validation.values = None
+
+        if self.columns is None:
+            self.columns = list(batch.columns)
+            self.ua_column = find_ua_column(results.columns)
+            self.species_column = find_species_column(results.columns)
+
+        data = results.assign(AB_individual=basal_area(results['DAP (cm)']))
+        if self.ua_column is not None:
+            self.plot_table = merge_groups(self.plot_table, self._aggregate(data, self.ua_column))
+        if self.species_column is not None:
+            self.species_table = merge_groups(self.species_table, self._aggregate(data, self.species_column))
+
+        self.validation = validation if self.validation is None else self.validation.append(validation)
+        self.diagnostics = self._merge_diagnostics(self.diagnostics, diagnostics)
+        # Layout original (sem categóricas) medido antes de compactar
+        self.footprint_before += memory_footprint(results.astype({
+            col: object for col in results.columns if isinstance(results[col].dtype, pd.CategoricalDtype)
+        }))
+        self._input_batches.append(compact_dataframe(batch))
+        self._result_batches.append(compact_dataframe(results, use_float32=self.use_float32))
+        self._input_data = None
+        self._results = None
+        self.n_batches += 1
+        self.n_input_rows += len(batch)
+        return diagnostics
+
+    def _aggregate(self, data, column):
+        """
+        Aggregate the trees of a batch per group, with plain group labels.
+
+        Categoricals of different batches have different categories, so the
+        labels are taken out of the categorical index before merging.
+
+        Args:
+            data (pandas.DataFrame): Processed trees of the batch (with 'AB_individual')
+            column (str): Group column
+
+        Returns:
+            pandas.DataFrame: Aggregates of the batch (see aggregate_groups)
+        """
+        partial = aggregate_groups(data, column)
+        if isinstance(partial.index, pd.CategoricalIndex):
+            partial.index = pd.Index(partial.index.to_numpy(), name=partial.index.name)
+        return partial
+
+    def _merge_diagnostics(self, running, partial):
+        """
+        Combine the diagnostics of a batch with the diagnostics accumulated so far.
+
+        Args:
+            running (dict or None): Diagnostics accumulated so far
+            partial (dict): Diagnostics returned by process_data for the batch
+
+        Returns:
+            dict: Merged diagnostics
+        """
+        if running is None:
+            return dict(partial)
+        merged = {key: running[key] + value for key, value in partial.items()}
+        merged['dropped_rows'] = merged['empty_rows'] + merged['invalid_rows']
+        return merged
+
+    @property
+    def input_data(self):
+        """Mapped field data of all batches (concatenated on first access)."""
+        if self._input_data is None and self._input_batches:
+            self._input_data = concat_compact(self._input_batches)
+            self._input_batches = [self._input_data]
+        return self._input_data
+
+    @property
+    def results(self):
+        """Processed trees of all batches (concatenated on first access)."""
+        if self._results is None and self._result_batches:
+            self._results = concat_compact(self._result_batches)
+            self._result_batches = [self._results]
+        return self._results
+
+    @property
+    def memory_footprint(self):
+        """Memory of the tree table in the original and in the compact layout."""
+        return {'before': self.footprint_before, 'after': memory_footprint(self.results)}
+
+    @property
+    def species_aggregates(self):
+        """Per-species tree count and sums (empty without a species column)."""
+        if self.species_table is None:
+            return pd.DataFrame(columns=['n_trees'] + SUM_COLUMNS)
+        return self.species_table
+
+    def plot_aggregates(self, project_info):
+        """
+        Get the per-plot aggregates.
+
+        With a UA column these are the running sums; without one the trees
+        are split into project_info['num_plots'] plots (see PlotAggregates.from_results).
+
+        Args:
+            project_info (dict): Project information including num_plots
+
+        Returns:
+            PlotAggregates: Aggregates of all batches
+        """
+        if self.plot_table is None:
+            return PlotAggregates.from_results(self.results, project_info)
+        return PlotAggregates(self.plot_table, self.ua_column)
+
+    def statistics(self, project_info):
+        """
+        Calculate the sampling statistics from the per-plot aggregates.
+
+        Stratified sampling (project_info['stratum_column']) also reads the
+        stratum of each plot from the tree table.
+
+        Args:
+            project_info (dict): Project information including plot details
+
+        Returns:
+            dict: Statistics (see StatisticsAnalyzer.calculate_statistics)
+        """
+        results_df = self.results if project_info.get('stratum_column') else None
+        return StatisticsAnalyzer().calculate_project_statistics(
+            results_df, project_info, self.plot_aggregates(project_info)
+        )
@@ -0,0 +1,180 @@
+import csv
+import io
+import pandas as pd
+from utils.column_mapping import resolve_column_names, find_ua_column
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+    import pyarrow.parquet as pa_parquet
+    import pyarrow.feather as pa_feather
+except ImportError:  # pragma: no cover - pyarrow é opcional
+    pa = None
+
+# Colunas (já mapeadas) usadas pelo cálculo; as demais só são carregadas se pedidas
+REQUIRED_COLUMNS = ['Nº da árvore', 'Nome comum', 'Nome científico', 'CAP (cm)', 'HT (m)']
+NUMERIC_COLUMNS = ['CAP (cm)', 'HT (m)']
+TEXT_COLUMNS = ['Nome comum', 'Nome científico']
+SUPPORTED_EXTENSIONS = ['csv', 'xlsx', 'parquet', 'feather']
+
+def select_columns(columns, extra_columns=None):
+    """
+    Select the original columns needed by the calculator and their mapped names.
+
+    Args:
+        columns (iterable): Original column names from the file header
+        extra_columns (iterable): Other columns to keep (e.g. the stratum
+            column), by original or mapped name
+
+    Returns:
+        dict: Original column name -> mapped column name, for the needed columns only
+    """
+    columns = list(columns)
+    extra_columns = set(extra_columns or ())
+    new_columns, _ = resolve_column_names(columns)
+    ua_column = find_ua_column(new_columns)
+    return {
+        original: mapped
+        for original, mapped in zip(columns, new_columns)
+        if mapped in REQUIRED_COLUMNS or mapped == ua_column
+        or original in extra_columns or mapped in extra_columns
+    }
+
+def inventory_columns(source, filename):
+    """
+    Read only the header of an inventory file.
+
+    Args:
+        source (str or file-like): File path or uploaded file buffer
+        filename (str): File name, used to pick the format by extension
+
+    Returns:
+        list: Original column names
+    """
+    extension = filename.rsplit('.', 1)[-1].lower()
+    if extension not in SUPPORTED_EXTENSIONS:
+        raise ValueError(f"Formato de arquivo não suportado: .{extension}")
+
+    if extension == 'xlsx':
+        columns = list(pd.read_excel(source, nrows=0).columns)
+        if hasattr(source, 'seek'):
+            source.seek(0)
+        return columns
+    if extension == 'csv':
+        return _csv_header(_read_bytes(source))
+    if pa is None:
+        raise ImportError("pyarrow é necessário para ler arquivos Parquet/Feather")
+    if extension == 'parquet':
+        return pa_parquet.ParquetFile(pa.BufferReader(_read_bytes(source))).schema_arrow.names
+    return pa_feather.read_table(pa.BufferReader(_read_bytes(source)), memory_map=False).column_names
+
+def read_inventory(source, filename, extra_columns=None):
+    """
+    Read an inventory file, loading only the columns needed by the calculator.
+
+    CSV files are parsed by the multithreaded Arrow reader with CAP and HT
+    declared as float64 (falling back to text when they hold non-numeric
+    values, so process_data can report them). Parquet and Feather files
+    are read column-projected. Without pyarrow, CSV falls back to pandas.
+
+    Args:
+        source (str or file-like): File path or uploaded file buffer
+        filename (str): File name, used to pick the format by extension
+        extra_columns (iterable): Other columns to keep (e.g. the stratum
+            column), by original or mapped name
+
+    Returns:
+        pandas.DataFrame: Inventory data with the original column names
+    """
+    extension = filename.rsplit('.', 1)[-1].lower()
+    if extension not in SUPPORTED_EXTENSIONS:
+        raise ValueError(f"Formato de arquivo não suportado: .{extension}")
+
+    if extension == 'xlsx':
+        header = pd.read_excel(source, nrows=0).columns
+        selected = select_columns(header, extra_columns)
+        if hasattr(source, 'seek'):
+            source.seek(0)
+        return pd.read_excel(source, usecols=lambda col: col in selected)
+
+    if pa is None:
+        if extension != 'csv':
+            raise ImportError("pyarrow é necessário para ler arquivos Parquet/Feather")
+        data = _read_bytes(source)
+        selected = select_columns(_csv_header(data), extra_columns)
+        return pd.read_csv(io.BytesIO(data), usecols=lambda col: col in selected)
+
+    if extension == 'parquet':
+        data = _read_bytes(source)
+        selected = select_columns(pa_parquet.ParquetFile(pa.BufferReader(data)).schema_arrow.names, extra_columns)
+        return pa_parquet.read_table(pa.BufferReader(data), columns=list(selected)).to_pandas()
+
+    if extension == 'feather':
+        data = _read_bytes(source)
+        table = pa_feather.read_table(pa.BufferReader(data), memory_map=False)
+        selected = select_columns(table.column_names, extra_columns)
+        return table.select(list(selected)).to_pandas()
+
+    data = _read_bytes(source)
+    return _read_csv_arrow(data, select_columns(_csv_header(data), extra_columns))
+
+def _read_bytes(source):
+    """
+    Get the raw bytes of a path or file-like source.
+
+    Args:
+        source (str or file-like): File path or buffer
+
+    Returns:
+        bytes: File contents
+    """
+    if hasattr(source, 'getvalue'):
+        return source.getvalue()
+    if hasattr(source, 'read'):
+        return source.read()
+    with open(source, 'rb') as f:
+        return f.read()
+
+def _csv_header(data):
+    """
+    Parse the header line of a CSV file.
+
+    Args:
+        data (bytes): CSV contents
+
+    Returns:
+        list: Column names
+    """
+    first_line = data.split(b'\n', 1)[0].decode('utf-8-sig').rstrip('\r')
+    return next(csv.reader([first_line]))
+
+def _read_csv_arrow(data, selected):
+    """
+    Parse CSV bytes with the Arrow reader, projecting and typing the selected columns.
+
+    Args:
+        data (bytes): CSV contents
+        selected (dict): Original column name -> mapped column name
+
+    Returns:
+        pandas.DataFrame: Parsed data
+    """
+    column_types = {}
+    for original, mapped in selected.items():
+        if mapped in NUMERIC_COLUMNS:
+            column_types[original] = pa.float64()
+        elif mapped in TEXT_COLUMNS:
+            column_types[original] = pa.string()
+
+    read_options = pa_csv.ReadOptions(use_threads=True)
+    try:
+        convert_options = pa_csv.ConvertOptions(include_columns=list(selected), column_types=column_types, strings_can_be_null=True)
+        table = pa_csv.read_csv(pa.BufferReader(data), read_options=read_options, convert_options=convert_options)
+    except pa.ArrowInvalid:
+        # Valores não numéricos em CAP/HT: ler como texto para o diagnóstico do processamento
+        for original, mapped in selected.items():
+            if mapped in NUMERIC_COLUMNS:
+                column_types[original] = pa.string()
+        convert_options = pa_csv.ConvertOptions(include_columns=list(selected), column_types=column_types, strings_can_be_null=True)
+        table = pa_csv.read_csv(pa.BufferReader(data), read_options=read_options, convert_options=convert_options)
+    return table.to_pandas()
@@ -0,0 +1,186 @@
+import itertools
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Estados possíveis de um job
+PENDING = 'pending'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+CANCELLED = 'cancelled'
+
+FINISHED_STATES = (DONE, FAILED, CANCELLED)
+
+class JobCancelled(Exception):
+    """Raised inside a running job when its cancellation was requested."""
+
+class ReportJobQueue:
+    """Background worker pool for report builds, shared by all Streamlit sessions of the process."""
+
+    def __init__(self, max_workers=2, retention_seconds=3600, max_finished=32):
+        """
+        Args:
+            max_workers (int): Reports built at the same time
+            retention_seconds (float): Time a finished job and its artifact are kept
+            max_finished (int): Maximum number of finished jobs kept (oldest removed first)
+        """
+        self.retention_seconds = retention_seconds
+        self.max_finished = max_finished
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='report-job')
+        self._jobs = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def submit(self, func, *args, label=None, **kwargs):
+        """
+        Queue func(*args, progress=callback, **kwargs) to run in the background.
+
+        The callback takes the completed fraction (0 to 1); it raises
+        JobCancelled once cancellation was requested, so func stops at its
+        next progress report.
+
+        Args:
+            func (callable): Function building the artifact (bytes)
+            *args: Positional arguments for func
+            label (str): Description shown to the user
+            **kwargs: Keyword arguments for func
+
+        Returns:
+            str: Job ID
+        """
+        self._purge()
+        with self._lock:
+            job_id = f"job-{next(self._ids)}"
+            job = {
+                'id': job_id,
+                'label': label or getattr(func, '__name__', 'job'),
+                'state': PENDING,
+                'progress': 0.0,
+                'error': None,
+                'result': None,
+                'submitted': time.time(),
+                'started': None,
+                'finished': None,
+                'cancel_requested': False,
+                'future': None
+            }
+            self._jobs[job_id] = job
+            job['future'] = self._executor.submit(self._run, job, func, args, kwargs)
+        return job_id
+
+    def _run(self, job, func, args, kwargs):
+        """Execute a job in a worker thread and record its outcome."""
+        with self._lock:
+            if job['cancel_requested']:
+                job['state'] = CANCELLED
+                job['finished'] = time.time()
+                return
+            job['state'] = RUNNING
+            job['started'] = time.time()
+
+        def progress(fraction):
+            with self._lock:
+                if job['cancel_requested']:
+                    raise JobCancelled(job['id'])
+                job['progress'] = min(max(float(fraction), 0.0), 1.0)
+
+        try:
+            result = func(*args, progress=progress, **kwargs)
+        except JobCancelled:
+            state, error, result = CANCELLED, None, None
+        except Exception as e:
+            state, error, result = FAILED, str(e), None
+        else:
+            state, error = DONE, None
+
+        with self._lock:
+            job['state'] = state
+            job['error'] = error
+            job['result'] = result
+            job['finished'] = time.time()
+            if state == DONE:
+                job['progress'] = 1.0
+
+    def status(self, job_id):
+        """
+        Get the state of a job.
+
+        Args:
+            job_id (str): Job ID
+
+        Returns:
+            dict: id, label, state, progress, error, submitted, started, finished,
+                cancel_requested and elapsed (s), or None if the job is unknown or expired
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            end = job['finished'] or time.time()
+            return {
+                'id': job['id'],
+                'label': job['label'],
+                'state': job['state'],
+                'progress': job['progress'],
+                'error': job['error'],
+                'submitted': job['submitted'],
+                'started': job['started'],
+                'finished': job['finished'],
+                'cancel_requested': job['cancel_requested'],
+                'elapsed': end - job['started'] if job['started'] else 0.0
+            }
+
+    def result(self, job_id):
+        """
+        Get the artifact of a completed job.
+
+        Args:
+            job_id (str): Job ID
+
+        Returns:
+            bytes: Artifact, or None if the job is not done
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job['state'] != DONE:
+                return None
+            return job['result']
+
+    def cancel(self, job_id):
+        """
+        Request the cancellation of a job.
+
+        A pending job never starts; a running job stops at its next progress report.
+
+        Args:
+            job_id (str): Job ID
+
+        Returns:
+            bool: True if the job was still pending or running
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job['state'] in FINISHED_STATES:
+                return False
+            job['cancel_requested'] = True
+            if job['state'] == PENDING and job['future'].cancel():
+                job['state'] = CANCELLED
+                job['finished'] = time.time()
+            return True
+
+    def _purge(self):
+        """Remove finished jobs past the retention time or beyond max_finished."""
+        now = time.time()
+        with self._lock:
+            finished = sorted(
+                (job for job in self._jobs.values() if job['state'] in FINISHED_STATES),
+                key=lambda job: job['finished']
+            )
+            excess = len(finished) - self.max_finished
+            for i, job in enumerate(finished):
+                if i < excess or now - job['finished'] > self.retention_seconds:
+                    del self._jobs[job['id']]
+
+# Fila compartilhada por todas as sessões do processo
+report_jobs = ReportJobQueue()
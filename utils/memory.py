@@ -0,0 +1,80 @@
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+from utils.column_mapping import find_ua_column
+
+# Colunas de texto armazenadas como categóricas
+CATEGORICAL_COLUMNS = ['Nome comum', 'Nome científico', 'Nome comum/científico']
+# Medições e resultados que podem ser armazenados em float32
+MEASUREMENT_COLUMNS = ['CAP (cm)', 'HT (m)', 'DAP (cm)', 'VT (m³)', 'VT (m³/ha)', 'VT (st/ha)']
+
+def memory_footprint(df):
+    """
+    Get the memory used by a dataframe, including Python string objects.
+
+    Args:
+        df (pandas.DataFrame): Dataframe
+
+    Returns:
+        int: Size in bytes
+    """
+    return int(df.memory_usage(deep=True).sum())
+
+def compact_dataframe(df, use_float32=False):
+    """
+    Convert a tree table to a compact memory layout.
+
+    Species names and the UA column become pandas categoricals. With
+    use_float32, measurements and calculated volumes are stored as float32
+    (calculations are still done in float64 before storing).
+
+    Args:
+        df (pandas.DataFrame): Tree table (input or processed)
+        use_float32 (bool): Store measurement columns as float32
+
+    Returns:
+        pandas.DataFrame: Compact dataframe (the input is not modified)
+    """
+    converted = {}
+
+    category_columns = [col for col in CATEGORICAL_COLUMNS if col in df.columns]
+    ua_column = find_ua_column(df.columns)
+    if ua_column is not None:
+        category_columns.append(ua_column)
+    for col in category_columns:
+        if not isinstance(df[col].dtype, pd.CategoricalDtype):
+            converted[col] = df[col].astype('category')
+
+    if use_float32:
+        for col in MEASUREMENT_COLUMNS:
+            if col in df.columns and pd.api.types.is_float_dtype(df[col]):
+                converted[col] = df[col].astype(np.float32)
+
+    if not converted:
+        return df
+    return df.assign(**converted)
+
+def concat_compact(frames):
+    """
+    Concatenate compact tree tables, keeping categorical columns categorical.
+
+    pandas turns categoricals with different categories into object columns
+    when concatenating; here the categories are unioned instead, so no
+    string is converted again.
+
+    Args:
+        frames (list): Compact dataframes with the same columns
+
+    Returns:
+        pandas.DataFrame: Concatenated dataframe
+    """
+    if len(frames) == 1:
+        return frames[0]
+    columns = list(frames[0].columns)
+    category_columns = [
+        col for col in columns if all(isinstance(frame[col].dtype, pd.CategoricalDtype) for frame in frames)
+    ]
+    result = pd.concat([frame.drop(columns=category_columns) for frame in frames])
+    for col in category_columns:
+        result[col] = union_categoricals([frame[col].array for frame in frames])
+    return result[columns]
@@ -0,0 +1,184 @@
+import os
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from utils.calculations import ForestryCalculator
+from utils.column_mapping import find_ua_column
+from utils.aggregates import aggregate_groups, basal_area
+from utils.equations import get_equation
+from utils.accumulators import StatisticsAccumulator
+from utils.memory import concat_compact
+
+# Chaves do diagnóstico que guardam rótulos de linha / números de árvore
+ROW_KEYS = [('empty_rows', 'empty_tree_numbers'), ('invalid_rows', 'invalid_tree_numbers')]
+
+def _process_partition(partition, form_factor, plot_area_ha, ua_column, equation=None, species_equations=None):
+    """
+    Worker entry point: process one partition and aggregate it per plot.
+
+    Args:
+        partition (pandas.DataFrame): Trees of whole plots, indexed by row position
+        form_factor (float): Form factor for calculations
+        plot_area_ha (float): Plot area in hectares
+        ua_column (str): UA column name
+        equation (VolumeEquation): Volume equation (None for the default)
+        species_equations (dict): Species → VolumeEquation
+
+    Returns:
+        tuple: (processed dataframe, diagnostics, per-plot aggregates, accumulator
+            of the VT (m³/ha) of the partition's plots)
+    """
+    results, diagnostics = ForestryCalculator().process_data(
+        partition, form_factor, plot_area_ha, equation=equation, species_equations=species_equations
+    )
+    results['AB_individual'] = basal_area(results['DAP (cm)'])
+    plot_aggregates = aggregate_groups(results, ua_column)
+    results = results.drop(columns='AB_individual')
+    # Cada parcela está inteira em uma partição: os volumes por parcela já são finais
+    plot_volumes = StatisticsAccumulator.from_values(plot_aggregates['VT (m³/ha)'].to_numpy())
+    return results, diagnostics, plot_aggregates, plot_volumes
+
+class ParallelProcessor:
+    """Class for processing tree records on several cores, partitioned by UA (plot)."""
+
+    def __init__(self, max_workers=None):
+        """
+        Args:
+            max_workers (int): Number of worker processes (default: number of CPUs)
+        """
+        self.max_workers = max_workers or os.cpu_count() or 1
+
+    def process_data(self, df, form_factor, plot_area_ha, equation=None, species_equations=None):
+        """
+        Process the dataset on a process pool, one task per group of whole plots.
+
+        Each plot goes entirely to one worker, so the per-plot aggregates of the
+        workers never overlap. Results are merged back in the original row
+        order and are identical to ForestryCalculator.process_data. The
+        workers' plot volume accumulators are merged for
+        StatisticsAnalyzer.statistics_from_accumulator.
+
+        Args:
+            df (pandas.DataFrame): Input dataframe with tree data
+            form_factor (float): Form factor for calculations
+            plot_area_ha (float): Plot area in hectares
+            equation (str or VolumeEquation): Volume equation (None for the default)
+            species_equations (dict): Species → equation name, for species with their own equation
+
+        Returns:
+            tuple: (processed dataframe, diagnostics, per-plot aggregates,
+                StatisticsAccumulator of the VT (m³/ha) per plot)
+        """
+        # O objeto da equação vai para os workers: equações registradas só
+        # neste processo não existiriam no registro deles
+        equation = get_equation(equation)
+        if species_equations:
+            species_equations = {species: get_equation(name) for species, name in species_equations.items()}
+        ua_column = find_ua_column(df.columns)
+        if ua_column is None:
+            raise ValueError("Coluna UA/Parcela não encontrada para particionar os dados")
+
+        partitions = self._partition(df, ua_column)
+        if len(partitions) <= 1:
+            outputs = [_process_partition(part, form_factor, plot_area_ha, ua_column, equation, species_equations) for part in partitions]
+        else:
+            with ProcessPoolExecutor(max_workers=self.max_workers) as executor:
+                futures = [
+                    executor.submit(_process_partition, part, form_factor, plot_area_ha, ua_column, equation, species_equations)
+                    for part in partitions
+                ]
+                # Coletar na ordem de submissão para um resultado determinístico
+                outputs = [future.result() for future in futures]
+
+        return self._merge(df, outputs)
+
+    def _partition(self, df, ua_column):
+        """
+        Split the dataframe into at most max_workers partitions of whole plots.
+
+        Plots are assigned largest first to the partition with the fewest trees.
+        Rows without UA go to the first partition; an empty dataframe gives
+        one empty partition.
+
+        Args:
+            df (pandas.DataFrame): Input dataframe
+            ua_column (str): UA column name
+
+        Returns:
+            list: Dataframes indexed by row position
+        """
+        codes, _ = pd.factorize(df[ua_column], sort=True)
+        plot_sizes = np.bincount(codes[codes >= 0])
+        n_partitions = max(1, min(self.max_workers, len(plot_sizes)))
+
+        plot_partition = np.zeros(len(plot_sizes), dtype=np.int64)
+        loads = np.zeros(n_partitions, dtype=np.int64)
+        for plot in np.argsort(-plot_sizes, kind='stable'):
+            target = int(np.argmin(loads))
+            plot_partition[plot] = target
+            loads[target] += plot_sizes[plot]
+
+        row_partition = np.where(codes >= 0, plot_partition[np.maximum(codes, 0)], 0)
+        positional = df.set_axis(pd.RangeIndex(len(df)))
+
+        partitions = []
+        for target in range(n_partitions):
+            positions = np.flatnonzero(row_partition == target)
+            if len(positions) > 0:
+                partitions.append(positional.iloc[positions])
+        # Sem linhas: uma partição vazia, para o resultado ter a mesma forma do processamento serial
+        if not partitions:
+            partitions.append(positional)
+        return partitions
+
+    def _merge(self, df, outputs):
+        """
+        Merge the worker outputs back into one result in the original row order.
+
+        Partitions that dropped rows trim their unused categories, so
+        categorical columns are concatenated with the categories unioned and
+        then given the categories the serial process_data would keep.
+
+        Args:
+            df (pandas.DataFrame): Original input dataframe
+            outputs (list): (results, diagnostics, plot aggregates, plot volumes) per partition
+
+        Returns:
+            tuple: (processed dataframe, diagnostics, per-plot aggregates, plot volumes)
+        """
+        results = concat_compact([output[0] for output in outputs]).sort_index()
+        results.index = df.index[results.index.to_numpy()]
+
+        partials = [output[1] for output in outputs]
+        diagnostics = {}
+        for key in partials[0]:
+            if not isinstance(partials[0][key], list):
+                diagnostics[key] = sum(partial[key] for partial in partials)
+
+        for rows_key, numbers_key in ROW_KEYS:
+            positions = np.concatenate([np.asarray(partial[rows_key], dtype=np.int64) for partial in partials])
+            order = np.argsort(positions, kind='stable')
+            diagnostics[rows_key] = df.index[positions[order]].tolist()
+            # Números de árvore seguem a mesma ordem, se a coluna existir
+            numbers = [number for partial in partials for number in partial[numbers_key]]
+            diagnostics[numbers_key] = [numbers[i] for i in order] if len(numbers) == len(positions) else []
+        diagnostics['dropped_rows'] = diagnostics['empty_rows'] + diagnostics['invalid_rows']
+
+        # Mesmas categorias (e ordem) do processamento serial: as da entrada, sem as
+        # que só tinham linhas descartadas
+        for col in results.columns:
+            if isinstance(results[col].dtype, pd.CategoricalDtype) and isinstance(df[col].dtype, pd.CategoricalDtype):
+                values = results[col].cat.set_categories(df[col].cat.categories)
+                results[col] = values.cat.remove_unused_categories() if diagnostics['dropped_rows'] else values
+
+        plot_aggregates = pd.concat([output[2] for output in outputs])
+        ua_column = plot_aggregates.index.name
+        if isinstance(results[ua_column].dtype, pd.CategoricalDtype):
+            plot_aggregates.index = pd.CategoricalIndex(
+                plot_aggregates.index, categories=results[ua_column].cat.categories, name=ua_column
+            )
+        plot_aggregates = plot_aggregates.sort_index()
+        plot_volumes = StatisticsAccumulator()
+        for output in outputs:
+            plot_volumes.merge(output[3])
+        return results, diagnostics, plot_aggregates, plot_volumes
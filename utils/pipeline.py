@@ -0,0 +1,227 @@
+import hashlib
+from contextlib import nullcontext
+from utils.incremental import InventoryProject
+from utils.statistics import StatisticsAnalyzer
+from utils.validation import validate_trees
+
+def _freeze(value):
+    """Turn a parameter value into a representation that does not depend on dict order."""
+    if isinstance(value, dict):
+        return tuple(sorted((str(k), _freeze(v)) for k, v in value.items()))
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+class ComputationGraph:
+    """Processing stages as a dependency graph: a node is recomputed only when its inputs or parameters change."""
+
+    def __init__(self, cache=None, profiler=None):
+        """
+        Args:
+            cache (ResultCache): Shared cache for the nodes added with shared=True
+            profiler (StageProfiler): Profiler measuring each recomputed node
+        """
+        self.cache = cache
+        self.profiler = profiler
+        self.params = {}
+        self.recomputed = []
+        self._nodes = {}
+        self._sources = {}
+        self._values = {}
+
+    def add_source(self, name):
+        """
+        Declare an input set from outside the graph (see set_source).
+
+        Args:
+            name (str): Source name
+        """
+        self._sources[name] = None
+
+    def add(self, name, func, inputs=(), params=(), shared=False):
+        """
+        Declare a node computed as func(*input_values, params).
+
+        func only receives the declared parameters, so reading any other
+        project parameter fails instead of silently using a stale value.
+
+        Args:
+            name (str): Node name
+            func (callable): Function computing the node value
+            inputs (tuple): Names of the sources or nodes func depends on
+            params (tuple): Names of the parameters func depends on
+            shared (bool): Store the value in the shared cache (results that
+                only depend on content keys and may be reused by other sessions)
+        """
+        for dep in inputs:
+            if dep not in self._nodes and dep not in self._sources:
+                raise ValueError(f"Dependência desconhecida para '{name}': '{dep}'")
+        self._nodes[name] = {'func': func, 'inputs': tuple(inputs), 'params': tuple(params), 'shared': shared}
+
+    def set_source(self, name, value, token):
+        """
+        Set the value of a source.
+
+        Args:
+            name (str): Source name
+            value (object): Source value
+            token (str): Identifier of the content (e.g. a content hash);
+                dependent nodes are invalidated only when it changes
+        """
+        if name not in self._sources:
+            raise ValueError(f"Fonte desconhecida: '{name}'")
+        self._sources[name] = (str(token), value)
+
+    def set_params(self, params):
+        """
+        Set the parameters of the next computations and reset the recomputed list.
+
+        Args:
+            params (dict): Parameter values (project information and options)
+        """
+        self.params = dict(params)
+        self.recomputed = []
+
+    def key(self, name):
+        """
+        Get the key of a node for the current sources and parameters.
+
+        Args:
+            name (str): Source or node name
+
+        Returns:
+            str: Hex digest of the node name, input keys and parameter values
+        """
+        if name in self._sources:
+            if self._sources[name] is None:
+                raise ValueError(f"Fonte sem valor: '{name}'")
+            return self._sources[name][0]
+        node = self._nodes[name]
+        content = repr((
+            name,
+            [self.key(dep) for dep in node['inputs']],
+            [(param, _freeze(self.params[param])) for param in node['params']]
+        ))
+        return hashlib.blake2b(content.encode(), digest_size=16).hexdigest()
+
+    def compute(self, name):
+        """
+        Get the value of a node, recomputing it and its stale inputs only.
+
+        Args:
+            name (str): Source or node name
+
+        Returns:
+            object: Node value
+        """
+        if name in self._sources:
+            self.key(name)
+            return self._sources[name][1]
+
+        key = self.key(name)
+        stored = self._values.get(name)
+        if stored is not None and stored[0] == key:
+            return stored[1]
+
+        node = self._nodes[name]
+        values = [self.compute(dep) for dep in node['inputs']]
+        params = {param: self.params[param] for param in node['params']}
+        if node['shared'] and self.cache is not None:
+            value = self.cache.get_or_compute(name, key, self._run, name, node['func'], values, params)
+        else:
+            value = self._run(name, node['func'], values, params)
+        self._values[name] = (key, value)
+        return value
+
+    def _run(self, name, func, values, params):
+        """Execute a node function, measured by the profiler when there is one."""
+        stage = self.profiler.stage(f"graph: {name}") if self.profiler is not None else nullcontext()
+        with stage:
+            value = func(*values, params)
+        self.recomputed.append(name)
+        return value
+
+    def store(self, name, value):
+        """
+        Set the value of a node for the current sources and parameters.
+
+        Used when a value was updated outside the graph (e.g. incrementally)
+        and matches what the node function would compute.
+
+        Args:
+            name (str): Node name
+            value (object): Node value
+        """
+        self._values[name] = (self.key(name), value)
+
+    def clear(self):
+        """Remove all computed values (sources are kept)."""
+        self._values.clear()
+        self.recomputed = []
+
+def _validate(input_data, params):
+    """Node: rule index of the input trees, keeping the converted CAP/HT columns."""
+    return validate_trees(input_data, keep_values=True)
+
+def _process_trees(input_data, validation, params):
+    """Node: project with the tree-level table (DAP, VT...), diagnostics and running aggregates."""
+    project = InventoryProject(params['volume_equation'], params['species_equations'], params['use_float32'])
+    project.append(input_data, validation)
+    return project
+
+def _plot_aggregates(trees, params):
+    """Node: per-plot sums (num_plots is only used without a UA column)."""
+    return trees.plot_aggregates(params)
+
+def _species_aggregates(trees, params):
+    """Node: per-species tree count and sums."""
+    return trees.species_aggregates
+
+def _statistics(trees, plot_aggregates, params):
+    """Node: plot-level sampling statistics (the tree table is only read for stratified sampling)."""
+    results_df = trees.results if params['stratum_column'] else None
+    return StatisticsAnalyzer().calculate_project_statistics(results_df, params, plot_aggregates)
+
+def inventory_graph(cache=None, profiler=None):
+    """
+    Build the graph of the inventory processing stages.
+
+    Source 'input' is the mapped field data. Nodes:
+    - 'validation': depends on the input only
+    - 'trees': InventoryProject with the tree-level columns; input,
+      volume_equation, species_equations and use_float32
+    - 'plot_aggregates': trees and num_plots
+    - 'species_aggregates': trees
+    - 'statistics': plot aggregates, plot_area, total_area, num_plots, the
+      strata (stratum_column, stratum_areas) and the confidence interval
+      method (ci_method, bootstrap_replicates, bootstrap_seed)
+
+    New field batches are added with InventoryProject.append on the 'trees'
+    value, then stored back with ComputationGraph.store.
+
+    Tables derived from these nodes can be added with ComputationGraph.add.
+
+    Args:
+        cache (ResultCache): Shared cache for nodes added with shared=True
+        profiler (StageProfiler): Profiler measuring each recomputed node
+
+    Returns:
+        ComputationGraph: Graph without values
+    """
+    graph = ComputationGraph(cache, profiler)
+    graph.add_source('input')
+    graph.add('validation', _validate, inputs=('input',))
+    graph.add(
+        'trees', _process_trees, inputs=('input', 'validation'),
+        params=('volume_equation', 'species_equations', 'use_float32')
+    )
+    graph.add('plot_aggregates', _plot_aggregates, inputs=('trees',), params=('num_plots',))
+    graph.add('species_aggregates', _species_aggregates, inputs=('trees',))
+    graph.add(
+        'statistics', _statistics, inputs=('trees', 'plot_aggregates'),
+        params=(
+            'plot_area', 'total_area', 'num_plots', 'stratum_column', 'stratum_areas',
+            'ci_method', 'bootstrap_replicates', 'bootstrap_seed'
+        )
+    )
+    return graph
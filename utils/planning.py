@@ -0,0 +1,160 @@
+import numpy as np
+import pandas as pd
+from utils.critical_values import t_critical_value
+
+# Erro de amostragem máximo admitido (%)
+TARGET_ERROR = 20.0
+
+def population_plots(project_info):
+    """
+    Get the number of plots that fit in the project area (size of the finite population).
+
+    Args:
+        project_info (dict): Project information including plot_area and total_area
+
+    Returns:
+        int: Number of plots in the population (at least 1)
+    """
+    return max(int(project_info['total_area'] / project_info['plot_area']), 1)
+
+def expected_error(cv, n, confidence_level=0.90, population=None):
+    """
+    Get the expected sampling error of n plots for a coefficient of variation.
+
+    Args:
+        cv (float): Coefficient of variation of the plot volumes (%)
+        n (int or array-like): Number of plots (at least 2)
+        confidence_level (float): Confidence level
+        population (int): Plots in the population, for the finite-population correction
+
+    Returns:
+        float or numpy.ndarray: Sampling error (% of the mean)
+    """
+    n = np.asarray(n, dtype=np.float64)
+    error = t_critical_value(confidence_level, n - 1) * cv / np.sqrt(n)
+    if population is not None:
+        error = error * np.sqrt(np.clip(1 - n / population, 0, None))
+    return error
+
+def required_plots(cv, target_error=TARGET_ERROR, confidence_level=0.90, population=None):
+    """
+    Find the smallest number of plots whose expected sampling error meets the target.
+
+    Starts from the normal approximation, which needs no more plots than the
+    answer since z < t, and adds plots re-evaluating t with n - 1 degrees of
+    freedom until the error is within the target.
+
+    Args:
+        cv (float): Coefficient of variation of the plot volumes (%)
+        target_error (float): Target sampling error (%)
+        confidence_level (float): Confidence level
+        population (int): Plots in the population, for the finite-population correction
+
+    Returns:
+        int: Required number of plots (capped at the population)
+    """
+    if cv <= 0:
+        return 2
+    z = t_critical_value(confidence_level, np.inf)
+    n = (z * cv / target_error) ** 2
+    if population is not None:
+        n = n * population / (population + n)
+    n = max(int(np.ceil(n)), 2)
+
+    while expected_error(cv, n, confidence_level, population) > target_error:
+        if population is not None and n >= population:
+            return population
+        n += 1
+    return n
+
+def simulate_precision(plot_volumes, candidates, target_error=TARGET_ERROR, confidence_level=0.90,
+                       population=None, replicates=2000, seed=0):
+    """
+    Estimate the probability that a sample of n plots meets the target error, for each candidate n.
+
+    Samples are drawn with replacement from the observed plot volumes as one
+    (replicates × largest n) index matrix. The first n columns of a row are
+    a sample of n plots, so cumulative sums along the rows give the mean and
+    variance of every candidate size at once.
+
+    Args:
+        plot_volumes (array-like): Volume per hectare of each measured plot
+        candidates (array-like): Numbers of plots to evaluate (at least 2)
+        target_error (float): Target sampling error (%)
+        confidence_level (float): Confidence level
+        population (int): Plots in the population, for the finite-population correction
+        replicates (int): Number of simulated samples per candidate
+        seed (int): Seed of the random generator
+
+    Returns:
+        numpy.ndarray: Probability of meeting the target for each candidate
+    """
+    values = np.asarray(plot_volumes, dtype=np.float64)
+    candidates = np.asarray(candidates, dtype=np.int64)
+    # Centrar os valores reduz o cancelamento numérico na variância por somas acumuladas
+    shift = values.mean()
+    values = values - shift
+
+    rng = np.random.default_rng(seed)
+    samples = values[rng.integers(0, len(values), size=(replicates, int(candidates.max())), dtype=np.int32)]
+    squares = np.cumsum(np.square(samples), axis=1)
+    sums = np.cumsum(samples, axis=1, out=samples)
+
+    sums = sums[:, candidates - 1]
+    squares = squares[:, candidates - 1]
+    variance = np.clip((squares - sums ** 2 / candidates) / (candidates - 1), 0, None)
+    mean = sums / candidates + shift
+
+    margin = t_critical_value(confidence_level, candidates - 1) * np.sqrt(variance / candidates)
+    if population is not None:
+        margin = margin * np.sqrt(np.clip(1 - candidates / population, 0, None))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        meets = np.where(mean > 0, margin / mean * 100 <= target_error, False)
+    return meets.mean(axis=0)
+
+def sampling_plan(plot_volumes, project_info, target_error=TARGET_ERROR, confidence_level=0.90,
+                  replicates=2000, seed=0):
+    """
+    Build the sampling plan table: expected error and probability of meeting the target per number of plots.
+
+    Candidates are the current number of plots, the required number and
+    multiples of it, within the population of plots in the project area.
+    The plan treats the plots as one simple random sample.
+
+    Args:
+        plot_volumes (pandas.Series or array-like): Volume per hectare of each measured plot
+        project_info (dict): Project information including plot_area and total_area
+        target_error (float): Target sampling error (%)
+        confidence_level (float): Confidence level
+        replicates (int): Simulated samples per candidate (see simulate_precision)
+        seed (int): Seed of the simulation
+
+    Returns:
+        pandas.DataFrame: One row per candidate with 'plots', 'sampling_fraction',
+            't_critical', 'expected_error' (%), 'probability' (of an error
+            within the target) and 'required' (smallest n meeting the target)
+    """
+    values = np.asarray(plot_volumes, dtype=np.float64)
+    values = values[~np.isnan(values)]
+    if len(values) < 2 or values.mean() <= 0:
+        raise ValueError("O planejamento exige pelo menos 2 parcelas com volume")
+
+    population = population_plots(project_info)
+    cv = values.std(ddof=1) / values.mean() * 100
+    required = required_plots(cv, target_error, confidence_level, population)
+
+    candidates = {len(values), required}
+    candidates.update(int(np.ceil(required * factor)) for factor in (0.5, 0.75, 1.25, 1.5, 2.0))
+    candidates = np.array(sorted(n for n in candidates if 2 <= n <= max(population, 2)))
+
+    plan = pd.DataFrame({
+        'plots': candidates,
+        'sampling_fraction': np.round(candidates / population * 100, 2),
+        't_critical': np.round(t_critical_value(confidence_level, candidates - 1), 4),
+        'expected_error': np.round(expected_error(cv, candidates, confidence_level, population), 2),
+        'probability': np.round(simulate_precision(
+            values, candidates, target_error, confidence_level, population, replicates, seed
+        ), 4),
+        'required': candidates == required
+    })
+    return plan
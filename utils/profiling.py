@@ -0,0 +1,185 @@
+import json
+import threading
+import time
+import tracemalloc
+from collections import deque
+from contextlib import nullcontext
+
+# Contexto vazio reutilizado quando o profiler está desligado
+_DISABLED_STAGE = nullcontext()
+
+# O tracemalloc é global ao processo: os profilers das sessões o compartilham por contagem de uso
+_tracing_lock = threading.Lock()
+_tracing_users = 0
+_tracing_owned = False
+_peak_resets = 0
+
+def _start_tracing():
+    """Register a profiler as tracemalloc user, starting it for the first one."""
+    global _tracing_users, _tracing_owned
+    with _tracing_lock:
+        if _tracing_users == 0 and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            _tracing_owned = True
+        _tracing_users += 1
+
+def _stop_tracing():
+    """Unregister a profiler, stopping tracemalloc after the last one (if it was started here)."""
+    global _tracing_users, _tracing_owned
+    with _tracing_lock:
+        _tracing_users -= 1
+        if _tracing_users == 0 and _tracing_owned:
+            tracemalloc.stop()
+            _tracing_owned = False
+
+def _reset_peak():
+    """Reset the traced peak and return how many resets were made in the process so far."""
+    global _peak_resets
+    with _tracing_lock:
+        tracemalloc.reset_peak()
+        _peak_resets += 1
+        return _peak_resets
+
+class _Stage:
+    """Context manager measuring one named stage."""
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        profiler = self.profiler
+        self.depth = len(profiler._stack)
+        parent = profiler._stack[-1] if profiler._stack else None
+        # A memória só é medida se o estágio externo também a mede (mesma base de comparação)
+        self.memory = profiler.track_memory and (parent is None or parent.memory)
+        if self.memory:
+            if parent is None:
+                _start_tracing()
+            else:
+                # Guardar o pico do estágio externo antes de reiniciar a medição
+                parent.peak = max(parent.peak, tracemalloc.get_traced_memory()[1] - parent.base)
+            self.base = tracemalloc.get_traced_memory()[0]
+            self.peak = 0
+            self.shared = False
+            self.foreign_resets = profiler._reset() - profiler._own_resets
+        profiler._stack.append(self)
+        self.wall_start = time.perf_counter()
+        self.cpu_start = time.process_time()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        wall = time.perf_counter() - self.wall_start
+        cpu = time.process_time() - self.cpu_start
+        profiler = self.profiler
+        profiler._stack.pop()
+
+        peak_memory = None
+        if self.memory:
+            self.peak = max(self.peak, tracemalloc.get_traced_memory()[1] - self.base)
+            # Outro profiler reiniciou o pico durante o estágio: o valor medido não é confiável
+            self.shared = self.shared or _peak_resets - profiler._own_resets != self.foreign_resets
+            peak_memory = None if self.shared else self.peak
+            if profiler._stack:
+                parent = profiler._stack[-1]
+                parent.peak = max(parent.peak, self.base - parent.base + self.peak)
+                parent.shared = parent.shared or self.shared
+                profiler._reset()
+            else:
+                _stop_tracing()
+
+        profiler.records.append({
+            'name': self.name,
+            'start': round(self.wall_start - profiler.origin, 6),
+            'wall_time': round(wall, 6),
+            'cpu_time': round(cpu, 6),
+            'peak_memory': peak_memory,
+            'depth': self.depth
+        })
+        return False
+
+class StageProfiler:
+    """Records wall time, CPU time and peak memory for named pipeline stages."""
+
+    def __init__(self, enabled=False, track_memory=False, max_records=500):
+        """
+        Args:
+            enabled (bool): Whether stages are measured; when False stage() is a no-op
+            track_memory (bool): Also measure peak Python memory with tracemalloc.
+                Tracing slows the measured code, and it is process-wide: it
+                is started by the first profiler measuring memory and stopped
+                after the last one, and a stage whose peak was reset by
+                another profiler meanwhile records no peak
+            max_records (int): Number of most recent records kept
+        """
+        self.enabled = enabled
+        self.track_memory = track_memory
+        self.records = deque(maxlen=max_records)
+        self.origin = time.perf_counter()
+        self._stack = []
+        self._own_resets = 0
+
+    def _reset(self):
+        """Reset the traced peak, counting the reset as this profiler's own."""
+        self._own_resets += 1
+        return _reset_peak()
+
+    def stage(self, name):
+        """
+        Measure the code inside a `with` block as a named stage.
+
+        Args:
+            name (str): Stage name
+
+        Returns:
+            context manager: Measuring context, or a shared no-op context when disabled
+        """
+        if not self.enabled:
+            return _DISABLED_STAGE
+        return _Stage(self, name)
+
+    def clear(self):
+        """Remove all records."""
+        self.records.clear()
+        self.origin = time.perf_counter()
+
+    def summary(self):
+        """
+        Get the recorded stages as a list of dictionaries (oldest first).
+
+        Returns:
+            list: Stage records
+        """
+        return list(self.records)
+
+    def to_json(self):
+        """
+        Export the records as JSON.
+
+        Returns:
+            str: JSON document
+        """
+        return json.dumps({'stages': self.summary()}, indent=2, ensure_ascii=False)
+
+    def to_trace_events(self):
+        """
+        Export the records in the Chrome trace-event format (chrome://tracing, Perfetto).
+
+        Returns:
+            str: JSON document
+        """
+        events = []
+        for record in self.records:
+            events.append({
+                'name': record['name'],
+                'ph': 'X',
+                'ts': round(record['start'] * 1e6, 1),
+                'dur': round(record['wall_time'] * 1e6, 1),
+                'pid': 1,
+                'tid': 1,
+                'args': {
+                    'cpu_time_ms': round(record['cpu_time'] * 1000, 3),
+                    'peak_memory_mb': round(record['peak_memory'] / 1024 ** 2, 3) if record['peak_memory'] is not None else None
+                }
+            })
+        return json.dumps({'traceEvents': events, 'displayTimeUnit': 'ms'}, ensure_ascii=False)
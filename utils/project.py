@@ -0,0 +1,50 @@
+from utils.equations import DEFAULT_EQUATION
+from utils.statistics import T_CI, DEFAULT_BOOTSTRAP_REPLICATES
+
+def build_project_info(project_name, num_plots, plot_length, plot_width, total_area, form_factor,
+                       volume_equation=DEFAULT_EQUATION, species_equations=None, stratum_column=None,
+                       stratum_areas=None, ci_method=T_CI, bootstrap_replicates=DEFAULT_BOOTSTRAP_REPLICATES,
+                       bootstrap_seed=0):
+    """
+    Build the project information dictionary used by calculations and reports.
+
+    Args:
+        project_name (str): Project name
+        num_plots (int): Number of plots
+        plot_length (float): Plot length in meters
+        plot_width (float): Plot width in meters
+        total_area (float): Suppression area in hectares
+        form_factor (float): Form factor
+        volume_equation (str): Name of the registered volume equation
+        species_equations (dict): Species → equation name for species with their own equation
+        stratum_column (str): Column with the stratum of each plot (None for simple random sampling)
+        stratum_areas (dict): Stratum → area in hectares, for stratified sampling
+        ci_method (str): Confidence interval method (T_CI or BOOTSTRAP_CI from utils.statistics)
+        bootstrap_replicates (int): Number of bootstrap replicates
+        bootstrap_seed (int): Seed of the bootstrap resampling
+
+    Returns:
+        dict: Project information, including plot and sampled areas in hectares
+    """
+    plot_area = plot_length * plot_width / 10000  # Convert to hectares
+    total_sampled_area = plot_area * num_plots
+    sampling_percentage = (total_sampled_area / total_area) * 100
+
+    return {
+        'project_name': project_name,
+        'num_plots': num_plots,
+        'plot_length': plot_length,
+        'plot_width': plot_width,
+        'plot_area': plot_area,
+        'total_area': total_area,
+        'total_sampled_area': total_sampled_area,
+        'sampling_percentage': sampling_percentage,
+        'form_factor': form_factor,
+        'volume_equation': volume_equation,
+        'species_equations': species_equations or {},
+        'stratum_column': stratum_column,
+        'stratum_areas': stratum_areas or {},
+        'ci_method': ci_method,
+        'bootstrap_replicates': int(bootstrap_replicates),
+        'bootstrap_seed': int(bootstrap_seed)
+    }
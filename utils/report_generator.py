@@ -7,6 +7,24 @@ from reportlab.lib.units import inch
 from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
 from reportlab.lib import colors
 from reportlab.lib.enums import TA_CENTER, TA_LEFT
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font, Border, Side, Alignment
+
+# Versão do layout dos relatórios; incrementar ao mudar o conteúdo gerado
+# para invalidar os relatórios guardados em cache
+REPORT_TEMPLATE_VERSION = 1
+
+# Acima deste número de árvores o relatório Excel é gravado em modo streaming
+STREAMING_MIN_ROWS = 50000
+
+# Estilo do cabeçalho igual ao aplicado pelo pandas em to_excel
+HEADER_FONT = Font(bold=True)
+HEADER_BORDER = Border(left=Side(style='thin'), right=Side(style='thin'), top=Side(style='thin'), bottom=Side(style='thin'))
+HEADER_ALIGNMENT = Alignment(horizontal='center', vertical='top')
+
+def _no_progress(fraction):
+    """Progress callback used when none is given."""
 
 class ReportGenerator:
     """Class for generating Excel and PDF reports from forest inventory analysis."""
@@ -14,7 +32,7 @@ class ReportGenerator:
     def __init__(self):
         pass
     
-    def generate_excel_report(self, results_df, statistics, project_info):
+    def generate_excel_report(self, results_df, statistics, project_info, streaming=None, progress=None):
         """
         Generate a comprehensive Excel report.
         
@@ -22,30 +40,136 @@ class ReportGenerator:
             results_df (pandas.DataFrame): Processed data with calculations
             statistics (dict): Statistical analysis results
             project_info (dict): Project information
+            streaming (bool): Write rows incrementally with a write-only workbook.
+                By default used when results_df has more than STREAMING_MIN_ROWS rows.
+            progress (callable): Optional callback receiving the completed fraction (0 to 1)
             
         Returns:
             io.BytesIO: Excel file buffer
         """
+        progress = progress or _no_progress
+        if streaming is None:
+            streaming = len(results_df) > STREAMING_MIN_ROWS
+        if streaming:
+            return self._generate_excel_report_streaming(results_df, statistics, project_info, progress)
+        
         buffer = io.BytesIO()
         
         with pd.ExcelWriter(buffer, engine='openpyxl') as writer:
             # Sheet 1: Project Information
             self._create_project_info_sheet(writer, project_info, statistics)
+            progress(0.05)
             
             # Sheet 2: Detailed calculations
             results_df.to_excel(writer, sheet_name='Cálculos Detalhados', index=False)
+            progress(0.6)
             
             # Sheet 3: Statistical Summary
             self._create_statistics_sheet(writer, statistics, project_info)
             
             # Sheet 4: Volume Summary
             self._create_volume_summary_sheet(writer, results_df, project_info, statistics)
+            progress(0.65)
         
+        progress(1.0)
         buffer.seek(0)
         return buffer.getvalue()
     
+    def _generate_excel_report_streaming(self, results_df, statistics, project_info, progress):
+        """
+        Generate the Excel report with a write-only workbook.
+        
+        Rows are appended chunk by chunk and flushed to a temporary file by
+        openpyxl, so memory does not grow with the whole workbook. Sheets,
+        headers and values are the same as in the pandas writer path.
+        
+        Args:
+            results_df (pandas.DataFrame): Processed data with calculations
+            statistics (dict): Statistical analysis results
+            project_info (dict): Project information
+            progress (callable): Callback receiving the completed fraction
+            
+        Returns:
+            bytes: Excel file contents
+        """
+        workbook = Workbook(write_only=True)
+        
+        try:
+            self._append_sheet(workbook, 'Informações do Projeto', self._project_info_table(project_info, statistics))
+            progress(0.02)
+            # A gravação das linhas ocupa quase todo o tempo; o save final compacta o arquivo
+            self._append_sheet(
+                workbook, 'Cálculos Detalhados', results_df,
+                progress=lambda fraction: progress(0.02 + 0.83 * fraction)
+            )
+            self._append_sheet(workbook, 'Análise Estatística', self._statistics_table(statistics))
+            self._append_sheet(workbook, 'Resumo de Volumes', self._volume_summary_table(results_df, project_info, statistics))
+            progress(0.85)
+        except BaseException:
+            self._discard_workbook(workbook)
+            raise
+        
+        buffer = io.BytesIO()
+        workbook.save(buffer)
+        progress(1.0)
+        return buffer.getvalue()
+    
+    def _discard_workbook(self, workbook):
+        """
+        Close the sheets of an unfinished write-only workbook and remove their temporary files.
+        
+        Saving is the public way to close write-only sheets (which also
+        removes their temporary files), so the workbook is saved to a
+        throwaway buffer.
+        
+        Args:
+            workbook (openpyxl.Workbook): Write-only workbook
+        """
+        try:
+            workbook.save(io.BytesIO())
+        except Exception:
+            # O erro original (cancelamento ou falha) é o que interessa ao chamador
+            pass
+    
+    def _append_sheet(self, workbook, sheet_name, df, chunk_size=10000, progress=None):
+        """
+        Append a dataframe to a write-only workbook as a new sheet.
+        
+        Args:
+            workbook (openpyxl.Workbook): Write-only workbook
+            sheet_name (str): Sheet name
+            df (pandas.DataFrame): Data to write (header + rows, no index)
+            chunk_size (int): Rows converted to Python values at a time
+            progress (callable): Optional callback receiving the fraction of rows written
+        """
+        worksheet = workbook.create_sheet(sheet_name)
+        
+        # Cabeçalho com o mesmo estilo usado pelo pandas
+        header = []
+        for col in df.columns:
+            cell = WriteOnlyCell(worksheet, value=str(col))
+            cell.font = HEADER_FONT
+            cell.border = HEADER_BORDER
+            cell.alignment = HEADER_ALIGNMENT
+            header.append(cell)
+        worksheet.append(header)
+        
+        for start in range(0, len(df), chunk_size):
+            chunk = df.iloc[start:start + chunk_size]
+            # Vazios (NaN, NaT, pd.NA dos tipos anuláveis) viram células vazias
+            columns = [chunk[col].astype(object).where(chunk[col].notna(), None).tolist() for col in chunk.columns]
+            for row in zip(*columns):
+                worksheet.append(list(row))
+            if progress is not None:
+                progress(min(start + chunk_size, len(df)) / len(df))
+    
     def _create_project_info_sheet(self, writer, project_info, statistics):
         """Create project information sheet."""
+        project_df = self._project_info_table(project_info, statistics)
+        project_df.to_excel(writer, sheet_name='Informações do Projeto', index=False)
+    
+    def _project_info_table(self, project_info, statistics):
+        """Build the project information table."""
         project_data = {
             'Parâmetro': [
                 'Nome do Projeto',
@@ -77,11 +201,15 @@ class ReportGenerator:
             ]
         }
         
-        project_df = pd.DataFrame(project_data)
-        project_df.to_excel(writer, sheet_name='Informações do Projeto', index=False)
+        return pd.DataFrame(project_data)
     
     def _create_statistics_sheet(self, writer, statistics, project_info):
         """Create statistical analysis sheet."""
+        stats_df = self._statistics_table(statistics)
+        stats_df.to_excel(writer, sheet_name='Análise Estatística', index=False)
+    
+    def _statistics_table(self, statistics):
+        """Build the statistical analysis table."""
         stats_data = {
             'Estatística': [
                 'Número de Árvores',
@@ -117,11 +245,15 @@ class ReportGenerator:
             ]
         }
         
-        stats_df = pd.DataFrame(stats_data)
-        stats_df.to_excel(writer, sheet_name='Análise Estatística', index=False)
+        return pd.DataFrame(stats_data)
     
     def _create_volume_summary_sheet(self, writer, results_df, project_info, statistics):
         """Create volume summary sheet."""
+        volume_df = self._volume_summary_table(results_df, project_info, statistics)
+        volume_df.to_excel(writer, sheet_name='Resumo de Volumes', index=False)
+    
+    def _volume_summary_table(self, results_df, project_info, statistics):
+        """Build the volume summary table."""
         # Calculate volume estimates for total area
         volume_estimate = statistics['mean'] * project_info['total_area']
         volume_lower = statistics['ci_lower'] * project_info['total_area']
@@ -154,10 +286,9 @@ class ReportGenerator:
             ]
         }
         
-        volume_df = pd.DataFrame(volume_data)
-        volume_df.to_excel(writer, sheet_name='Resumo de Volumes', index=False)
+        return pd.DataFrame(volume_data)
     
-    def generate_pdf_report(self, results_df, statistics, project_info):
+    def generate_pdf_report(self, results_df, statistics, project_info, progress=None):
         """
         Generate a comprehensive PDF report.
         
@@ -165,10 +296,12 @@ class ReportGenerator:
             results_df (pandas.DataFrame): Processed data with calculations
             statistics (dict): Statistical analysis results
             project_info (dict): Project information
+            progress (callable): Optional callback receiving the completed fraction (0 to 1)
             
         Returns:
             io.BytesIO: PDF file buffer
         """
+        progress = progress or _no_progress
         buffer = io.BytesIO()
         doc = SimpleDocTemplate(buffer, pagesize=A4)
         story = []
@@ -289,7 +422,10 @@ class ReportGenerator:
         
         story.append(volume_table)
         
+        progress(0.5)
+        
         # Build PDF
         doc.build(story)
+        progress(1.0)
         buffer.seek(0)
         return buffer.getvalue()
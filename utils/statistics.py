@@ -1,6 +1,76 @@
-import pandas as pd
 import numpy as np
-from scipy import stats
+from utils.aggregates import PlotAggregates
+from utils.critical_values import t_critical_value
+from utils.planning import required_plots
+
+# Processos de amostragem (valor de 'sampling_method' nas estatísticas)
+SIMPLE_RANDOM_SAMPLING = 'Amostragem Aleatória Simples'
+STRATIFIED_SAMPLING = 'Amostragem Estratificada'
+
+# Métodos do intervalo de confiança (valor de 'ci_method' no projeto e nas estatísticas)
+T_CI = 'Distribuição t de Student'
+BOOTSTRAP_CI = 'Bootstrap percentil'
+DEFAULT_BOOTSTRAP_REPLICATES = 10000
+
+def bootstrap_means(values, replicates=DEFAULT_BOOTSTRAP_REPLICATES, seed=0, strata=None, weights=None):
+    """
+    Resample the mean of the values with replacement, all replicates at once.
+
+    Each row of a (replicates × n) index matrix is one bootstrap sample, so
+    the replicate means come from a single gather and matrix product. With
+    strata, each value is resampled within its stratum and the stratum means
+    are weighted by the stratum weights.
+
+    Args:
+        values (array-like): Plot volumes
+        replicates (int): Number of bootstrap replicates
+        seed (int): Seed of the random generator (same seed, same intervals)
+        strata (array-like): Stratum code (0 to k - 1) of each value, for stratified sampling
+        weights (array-like): Area weight of each stratum code
+
+    Returns:
+        numpy.ndarray: Mean of each replicate
+    """
+    values = np.asarray(values, dtype=np.float64)
+    n = len(values)
+    rng = np.random.default_rng(seed)
+    if strata is None:
+        index = rng.integers(0, n, size=(replicates, n), dtype=np.int32)
+        coefficients = np.full(n, 1 / n)
+    else:
+        codes = np.asarray(strata, dtype=np.int64)
+        order = np.argsort(codes, kind='stable')
+        values = values[order]
+        codes = codes[order]
+        counts = np.bincount(codes)
+        low = (np.cumsum(counts) - counts)[codes]
+        index = rng.integers(low, low + counts[codes], size=(replicates, n), dtype=np.int32)
+        coefficients = np.asarray(weights, dtype=np.float64)[codes] / counts[codes]
+    return values[index] @ coefficients
+
+def neyman_allocation(n, weights, std_devs):
+    """
+    Distribute n plots among strata proportionally to W_h · s_h (Neyman allocation).
+
+    Fractions are rounded by largest remainder, so the plots add up to n.
+
+    Args:
+        n (int): Total number of plots
+        weights (array-like): Area weight W_h of each stratum
+        std_devs (array-like): Standard deviation s_h of the plot volumes of each stratum
+
+    Returns:
+        numpy.ndarray: Plots per stratum (int)
+    """
+    shares = np.asarray(weights, dtype=np.float64) * np.asarray(std_devs, dtype=np.float64)
+    if shares.sum() <= 0:
+        shares = np.asarray(weights, dtype=np.float64)
+    exact = n * shares / shares.sum()
+    plots = np.floor(exact).astype(np.int64)
+    remainder = int(n - plots.sum())
+    if remainder > 0:
+        plots[np.argsort(-(exact - plots), kind='stable')[:remainder]] += 1
+    return plots
 
 class StatisticsAnalyzer:
     """Class for performing statistical analysis on forest inventory data."""
@@ -8,47 +78,29 @@ class StatisticsAnalyzer:
     def __init__(self):
         pass
     
-    def calculate_statistics(self, results_df, project_info):
+    def calculate_statistics(self, results_df, project_info, plot_aggregates=None):
         """
         Calculate comprehensive statistics for the forest inventory data.
         
+        The confidence interval uses the t distribution, or the bootstrap
+        percentile interval of the plot volumes when project_info['ci_method']
+        is BOOTSTRAP_CI (see bootstrap_means).
+        
         Args:
             results_df (pandas.DataFrame): Processed dataframe with volume calculations
             project_info (dict): Project information including plot details
+            plot_aggregates (PlotAggregates): Precomputed plot aggregates (optional)
             
         Returns:
             dict: Dictionary containing all statistical measures
         """
         # Para análise estatística correta em inventário florestal, precisamos agrupar por parcela
         # e calcular estatísticas baseadas na média por parcela, não por árvore individual
+        if plot_aggregates is None:
+            plot_aggregates = PlotAggregates.from_results(results_df, project_info)
         
-        # Identificar coluna UA/Parcela
-        ua_column = None
-        for col in results_df.columns:
-            if 'UA' in str(col).upper() or 'PARCELA' in str(col).upper() or 'UNIDADE' in str(col).upper():
-                ua_column = col
-                break
-        
-        if ua_column is not None:
-            # Calcular volume por hectare total para cada parcela (soma dos volumes das árvores da parcela)
-            plot_volumes = results_df.groupby(ua_column)['VT (m³/ha)'].sum()
-            volume_data = plot_volumes
-        else:
-            # Fallback: usar distribuição por parcelas
-            num_plots = project_info['num_plots'] 
-            total_trees = len(results_df)
-            trees_per_plot = total_trees // num_plots
-            
-            plot_volumes = []
-            for i in range(num_plots):
-                start_idx = i * trees_per_plot
-                end_idx = start_idx + trees_per_plot
-                if i == num_plots - 1:  # Última parcela pega o resto
-                    end_idx = total_trees
-                plot_volume = results_df.iloc[start_idx:end_idx]['VT (m³/ha)'].sum()
-                plot_volumes.append(plot_volume)
-            
-            volume_data = pd.Series(plot_volumes)
+        # Volume por hectare de cada parcela (soma dos volumes das árvores da parcela)
+        volume_data = plot_aggregates.plot_volumes()
         
         n = len(volume_data)
         
@@ -57,29 +109,211 @@ class StatisticsAnalyzer:
         variance = float(volume_data.var(ddof=1))  # Sample variance
         std_dev = float(volume_data.std(ddof=1))   # Sample standard deviation
         
+        # Additional statistics - convertendo para float
+        minimum = float(volume_data.min())
+        maximum = float(volume_data.max())
+        median = float(volume_data.median())
+        
+        replicate_means = None
+        if project_info.get('ci_method') == BOOTSTRAP_CI:
+            replicate_means = bootstrap_means(
+                volume_data.to_numpy(), project_info['bootstrap_replicates'], project_info['bootstrap_seed']
+            )
+        
+        return self._build_statistics(
+            n, mean, variance, std_dev, minimum, maximum, median, project_info, replicate_means=replicate_means
+        )
+    
+    def calculate_project_statistics(self, results_df, project_info, plot_aggregates=None):
+        """
+        Calculate the statistics with the sampling process configured in the project.
+        
+        Args:
+            results_df (pandas.DataFrame): Processed dataframe (only read for
+                stratified sampling or without plot_aggregates)
+            project_info (dict): Project information; a 'stratum_column'
+                selects stratified sampling with 'stratum_areas'
+            plot_aggregates (PlotAggregates): Precomputed plot aggregates (optional)
+            
+        Returns:
+            dict: Dictionary containing all statistical measures
+        """
+        stratum_column = project_info.get('stratum_column')
+        if not stratum_column:
+            return self.calculate_statistics(results_df, project_info, plot_aggregates)
+        if plot_aggregates is None:
+            plot_aggregates = PlotAggregates.from_results(results_df, project_info)
+        return self.calculate_stratified_statistics(
+            plot_aggregates, plot_aggregates.strata(results_df, stratum_column),
+            project_info['stratum_areas'], project_info
+        )
+    
+    def calculate_stratified_statistics(self, plot_aggregates, plot_strata, stratum_areas, project_info):
+        """
+        Calculate the statistics of a stratified random sampling.
+        
+        Per-stratum count, mean and variance of the plot volumes come from a
+        single grouped pass over the plots. The mean is weighted by the
+        stratum areas (W_h = A_h / A). The variance of the mean is
+        Σ W_h² s_h² / n_h, and the t value uses the Satterthwaite effective
+        degrees of freedom. As in calculate_statistics, no finite-population
+        correction is applied. Each stratum also gets the Neyman allocation
+        of the current number of plots. In bootstrap mode the plots are
+        resampled within their strata.
+        
+        Args:
+            plot_aggregates (PlotAggregates): Per-plot aggregates
+            plot_strata (pandas.Series): Stratum of each plot (indexed like the plot aggregates)
+            stratum_areas (dict): Stratum → area in hectares
+            project_info (dict): Project information including plot details
+            
+        Returns:
+            dict: Same keys as calculate_statistics, with 'variance' and 'std_dev'
+                pooled within strata, plus 'strata' (one dict per stratum)
+        """
+        volume_data = plot_aggregates.plot_volumes()
+        strata = plot_strata.reindex(volume_data.index)
+        if strata.isna().any():
+            raise ValueError(f"{int(strata.isna().sum())} parcelas sem estrato")
+        
+        # Uma única passada agrupada sobre as parcelas
+        grouped = volume_data.groupby(strata.to_numpy(), sort=True).agg(['count', 'mean', 'var'])
+        missing = [str(stratum) for stratum in grouped.index if stratum not in stratum_areas]
+        if missing:
+            raise ValueError(f"Área não informada para os estratos: {', '.join(missing)}")
+        if (grouped['count'] < 2).any():
+            raise ValueError("Cada estrato precisa de pelo menos 2 parcelas")
+        
+        areas = np.array([float(stratum_areas[stratum]) for stratum in grouped.index])
+        if (areas <= 0).any():
+            raise ValueError("As áreas dos estratos devem ser positivas")
+        weights = areas / areas.sum()
+        counts = grouped['count'].to_numpy(dtype=np.float64)
+        means = grouped['mean'].to_numpy()
+        variances = grouped['var'].to_numpy()
+        
+        mean = float(np.sum(weights * means))
+        variance = float(np.sum(weights * variances))
+        std_dev = float(np.sqrt(variance))
+        
+        # Variância da média estratificada e graus de liberdade efetivos (Satterthwaite)
+        terms = weights ** 2 * variances / counts
+        standard_error = float(np.sqrt(terms.sum()))
+        if terms.sum() > 0:
+            degrees_of_freedom = float(terms.sum() ** 2 / np.sum(terms ** 2 / (counts - 1)))
+        else:
+            degrees_of_freedom = float(counts.sum() - len(counts))
+        
+        n = len(volume_data)
+        allocation = neyman_allocation(n, weights, np.sqrt(variances))
+        
+        replicate_means = None
+        if project_info.get('ci_method') == BOOTSTRAP_CI:
+            replicate_means = bootstrap_means(
+                volume_data.to_numpy(), project_info['bootstrap_replicates'], project_info['bootstrap_seed'],
+                strata=grouped.index.get_indexer(strata.to_numpy()), weights=weights
+            )
+        strata_table = [
+            {
+                'stratum': stratum,
+                'area': round(float(area), 4),
+                'weight': round(float(weight), 4),
+                'plots': int(count),
+                'mean': round(float(stratum_mean), 4),
+                'variance': round(float(stratum_variance), 4),
+                'std_dev': round(float(np.sqrt(stratum_variance)), 4),
+                'neyman_plots': int(neyman_plots)
+            }
+            for stratum, area, weight, count, stratum_mean, stratum_variance, neyman_plots in zip(
+                grouped.index, areas, weights, counts, means, variances, allocation
+            )
+        ]
+        
+        statistics = self._build_statistics(
+            n, mean, variance, std_dev,
+            float(volume_data.min()), float(volume_data.max()), float(volume_data.median()), project_info,
+            standard_error=standard_error, degrees_of_freedom=degrees_of_freedom,
+            sampling_method=STRATIFIED_SAMPLING, replicate_means=replicate_means
+        )
+        statistics['degrees_of_freedom'] = round(degrees_of_freedom, 2)
+        statistics['strata'] = strata_table
+        return statistics
+    
+    def statistics_from_accumulator(self, accumulator, project_info):
+        """
+        Calculate the statistics from an accumulator of plot volumes.
+        
+        The accumulator can be fed per chunk or per worker and merged, so
+        the plot volumes never need to be in one table. The result has the
+        same keys as calculate_statistics; the median is exact while the
+        sketch was not compressed (see QuantileSketch). Without the plot
+        volumes there is nothing to resample, so the interval always uses
+        the t distribution.
+        
+        Args:
+            accumulator (StatisticsAccumulator): Accumulated VT (m³/ha) of the plots
+            project_info (dict): Project information including plot details
+            
+        Returns:
+            dict: Dictionary containing all statistical measures
+        """
+        summary = accumulator.summary()
+        return self._build_statistics(
+            summary['n'], summary['mean'], summary['variance'], summary['std_dev'],
+            summary['minimum'], summary['maximum'], summary['median'], project_info
+        )
+    
+    def _build_statistics(self, n, mean, variance, std_dev, minimum, maximum, median, project_info,
+                          standard_error=None, degrees_of_freedom=None, sampling_method=SIMPLE_RANDOM_SAMPLING,
+                          replicate_means=None):
+        """
+        Derive the sampling statistics from the descriptive statistics of the plot volumes.
+        
+        Args:
+            n (int): Number of plots
+            mean (float): Mean plot volume (m³/ha)
+            variance (float): Sample variance of the plot volumes
+            std_dev (float): Sample standard deviation of the plot volumes
+            minimum (float): Smallest plot volume
+            maximum (float): Largest plot volume
+            median (float): Median plot volume
+            project_info (dict): Project information including plot details
+            standard_error (float): Standard error of the mean (default: std_dev / √n)
+            degrees_of_freedom (float): Degrees of freedom of t (default: n - 1)
+            sampling_method (str): Sampling process recorded in the results
+            replicate_means (numpy.ndarray): Bootstrap replicate means; when given,
+                the interval is the percentile interval of the replicates and the
+                margin of error is its half-width
+            
+        Returns:
+            dict: Dictionary containing all statistical measures
+        """
         # Coefficient of variation
         cv = (std_dev / mean) * 100 if mean != 0 else 0
         
         # Standard error of the mean
-        standard_error = std_dev / np.sqrt(n)
+        if standard_error is None:
+            standard_error = std_dev / np.sqrt(n)
+        if degrees_of_freedom is None:
+            degrees_of_freedom = n - 1
         
         # 90% Confidence interval
         confidence_level = 0.90
         alpha = 1 - confidence_level
-        t_critical = stats.t.ppf(1 - alpha/2, df=n-1)
+        t_critical = t_critical_value(confidence_level, degrees_of_freedom)
         
-        margin_of_error = t_critical * standard_error
-        ci_lower = mean - margin_of_error
-        ci_upper = mean + margin_of_error
+        if replicate_means is None:
+            margin_of_error = t_critical * standard_error
+            ci_lower = mean - margin_of_error
+            ci_upper = mean + margin_of_error
+        else:
+            # Intervalo percentil: pode ser assimétrico em torno da média
+            ci_lower, ci_upper = (float(q) for q in np.quantile(replicate_means, [alpha/2, 1 - alpha/2]))
+            margin_of_error = (ci_upper - ci_lower) / 2
         
         # Sampling error (as percentage of the mean)
         sampling_error = (margin_of_error / mean) * 100 if mean != 0 else 0
         
-        # Additional statistics - convertendo para float
-        minimum = float(volume_data.min())
-        maximum = float(volume_data.max())
-        median = float(volume_data.median())
-        
         # Calculate expansion factors
         plot_area = project_info['plot_area']
         total_area = project_info['total_area']
@@ -101,8 +335,13 @@ class StatisticsAnalyzer:
             't_critical': round(float(t_critical), 4),
             'margin_of_error': round(margin_of_error, 4),
             'expansion_factor': round(expansion_factor, 4),
-            'confidence_level': confidence_level
+            'confidence_level': confidence_level,
+            'sampling_method': sampling_method,
+            'ci_method': T_CI if replicate_means is None else BOOTSTRAP_CI
         }
+        if replicate_means is not None:
+            statistics['bootstrap_replicates'] = len(replicate_means)
+            statistics['bootstrap_seed'] = project_info['bootstrap_seed']
         
         return statistics
     
@@ -144,14 +383,22 @@ class StatisticsAnalyzer:
         else:
             return f"Amostragem não atingiu a precisão desejada (erro {sampling_error:.2f}% > 20%). Recomendado aumentar o número de parcelas."
     
-    def calculate_required_plots(self, current_error, target_error=20.0, current_plots=1):
+    def calculate_required_plots(self, current_error, target_error=20.0, current_plots=1,
+                                 confidence_level=0.90, population=None):
         """
         Calculate the number of plots required to achieve target precision.
         
+        The coefficient of variation implied by the current error is used to
+        solve for n iteratively, with t re-evaluated for each n (see
+        utils.planning.required_plots).
+        
         Args:
             current_error (float): Current sampling error percentage
             target_error (float): Target sampling error percentage
             current_plots (int): Current number of plots
+            confidence_level (float): Confidence level of the sampling error
+            population (int): Plots that fit in the project area, for the
+                finite-population correction (None for none)
             
         Returns:
             int: Required number of plots
@@ -159,11 +406,9 @@ class StatisticsAnalyzer:
         if current_error <= target_error:
             return current_plots
         
-        # The relationship between number of plots and error is inversely proportional to sqrt(n)
-        error_ratio = current_error / target_error
-        required_plots = int(np.ceil(current_plots * (error_ratio ** 2)))
-        
-        return required_plots
+        # O erro atual não tem correção de população finita: erro = t · CV / √n
+        cv = current_error * np.sqrt(current_plots) / t_critical_value(confidence_level, max(current_plots - 1, 1))
+        return required_plots(cv, target_error, confidence_level, population)
     
     def generate_volume_summary(self, results_df, project_info):
         """
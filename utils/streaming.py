@@ -0,0 +1,160 @@
+import numpy as np
+import pandas as pd
+from utils.calculations import ForestryCalculator
+from utils.column_mapping import resolve_column_names, add_combined_name_column, find_ua_column, find_species_column
+from utils.aggregates import SUM_COLUMNS, aggregate_groups, basal_area
+from utils.accumulators import StatisticsAccumulator
+
+class StreamingProcessor:
+    """Class for processing large inventory CSV files in bounded-size chunks."""
+
+    def __init__(self, chunksize=100_000):
+        """
+        Args:
+            chunksize (int): Number of rows read from the CSV per chunk
+        """
+        self.chunksize = chunksize
+        self.calculator = ForestryCalculator()
+
+    def process_csv(self, source, form_factor, plot_area_ha, equation=None, species_equations=None):
+        """
+        Process a CSV file chunk by chunk, keeping only per-UA and per-species aggregates.
+
+        Column names are resolved once from the header and reused for every
+        chunk, which also gets the combined name column as in map_columns.
+        Tree-level results are discarded after each chunk, so peak memory
+        depends on the chunk size, not on the file size. The app and the
+        batch reports need the tree table, so this mode is only for
+        aggregate-level processing (statistics and per-plot/species totals).
+
+        Args:
+            source (str or file-like): CSV path or buffer
+            form_factor (float): Form factor for calculations
+            plot_area_ha (float): Plot area in hectares
+            equation (str or VolumeEquation): Volume equation (None for the default)
+            species_equations (dict): Species → equation name, for species with their own equation
+
+        Returns:
+            dict: 'plot_aggregates' and 'species_aggregates' dataframes (count
+                plus sums of DAP, HT, VT, VT/ha, VT st/ha and basal area),
+                'tree_volumes' and 'plot_volumes' StatisticsAccumulators
+                (VT (m³) per tree and VT (m³/ha) per plot, for
+                StatisticsAnalyzer.statistics_from_accumulator), the merged
+                'diagnostics' and the resolved column names
+        """
+        reader = pd.read_csv(source, chunksize=self.chunksize)
+
+        new_columns = None
+        columns = None
+        ua_column = None
+        species_column = None
+        plot_aggregates = None
+        species_aggregates = None
+        diagnostics = None
+        tree_volumes = StatisticsAccumulator()
+
+        for chunk in reader:
+            # Mapear colunas uma única vez, a partir do cabeçalho
+            first_chunk = new_columns is None
+            if first_chunk:
+                new_columns, _ = resolve_column_names(chunk.columns)
+            chunk.columns = new_columns
+            add_combined_name_column(chunk)
+            if first_chunk:
+                columns = list(chunk.columns)
+                ua_column = find_ua_column(chunk.columns)
+                species_column = find_species_column(chunk.columns)
+
+            results, chunk_diagnostics = self.calculator.process_data(
+                chunk, form_factor, plot_area_ha, equation=equation, species_equations=species_equations
+            )
+            results['AB_individual'] = basal_area(results['DAP (cm)'])
+
+            if ua_column is not None:
+                plot_aggregates = self._merge(plot_aggregates, self._aggregate(results, ua_column))
+            if species_column is not None:
+                species_aggregates = self._merge(species_aggregates, self._aggregate(results, species_column))
+            diagnostics = self._merge_diagnostics(diagnostics, chunk_diagnostics)
+            tree_volumes.update(results['VT (m³)'].to_numpy())
+
+        # Uma parcela pode estar em vários blocos: volumes por parcela só no final
+        plot_aggregates = self._finalize(plot_aggregates)
+        return {
+            'plot_aggregates': plot_aggregates,
+            'species_aggregates': self._finalize(species_aggregates),
+            'tree_volumes': tree_volumes,
+            'plot_volumes': StatisticsAccumulator.from_values(plot_aggregates['VT (m³/ha)'].to_numpy()),
+            'diagnostics': diagnostics,
+            'columns': columns,
+            'ua_column': ua_column,
+            'species_column': species_column
+        }
+
+    def _aggregate(self, results, column):
+        """
+        Aggregate the trees of a chunk per group, with plain group labels.
+
+        Each chunk builds its own categories (e.g. the combined name
+        column), so the labels are taken out of the categorical index
+        before merging.
+
+        Args:
+            results (pandas.DataFrame): Processed trees of the chunk (with 'AB_individual')
+            column (str): Group column
+
+        Returns:
+            pandas.DataFrame: Aggregates of the chunk (see aggregate_groups)
+        """
+        partial = aggregate_groups(results, column)
+        if isinstance(partial.index, pd.CategoricalIndex):
+            partial.index = pd.Index(partial.index.to_numpy(), name=partial.index.name)
+        return partial
+
+    def _merge(self, running, partial):
+        """
+        Add a chunk's partial aggregates to the running aggregates.
+
+        Args:
+            running (pandas.DataFrame or None): Aggregates accumulated so far
+            partial (pandas.DataFrame): Aggregates of the current chunk
+
+        Returns:
+            pandas.DataFrame: Updated aggregates
+        """
+        if running is None:
+            return partial
+        return running.add(partial, fill_value=0)
+
+    def _merge_diagnostics(self, running, partial):
+        """
+        Combine the diagnostics of one chunk with the diagnostics accumulated so far.
+
+        Args:
+            running (dict or None): Diagnostics accumulated so far
+            partial (dict): Diagnostics returned by process_data for the chunk
+
+        Returns:
+            dict: Merged diagnostics
+        """
+        if running is None:
+            return dict(partial)
+        merged = {}
+        for key, value in partial.items():
+            merged[key] = running[key] + value
+        return merged
+
+    def _finalize(self, aggregates):
+        """
+        Sort the aggregates by group key and restore integer tree counts.
+
+        Args:
+            aggregates (pandas.DataFrame or None): Accumulated aggregates
+
+        Returns:
+            pandas.DataFrame: Final aggregates (empty if no group column was found)
+        """
+        if aggregates is None:
+            return pd.DataFrame(columns=['n_trees'] + SUM_COLUMNS)
+        aggregates = aggregates.sort_index()
+        aggregates['n_trees'] = aggregates['n_trees'].astype(np.int64)
+        return aggregates
@@ -0,0 +1,176 @@
+import numpy as np
+import pandas as pd
+
+# Regras de validação na ordem dos bits do índice (um uint8 por árvore)
+RULES = [
+    'missing_cap',
+    'missing_ht',
+    'non_numeric_cap',
+    'non_numeric_ht',
+    'non_positive_cap',
+    'non_positive_ht',
+    'implausible_dap',
+    'implausible_ht'
+]
+
+RULE_BITS = {rule: np.uint8(1 << bit) for bit, rule in enumerate(RULES)}
+
+# Faixas plausíveis (limites inclusivos) para árvores de inventário
+PLAUSIBLE_DAP_RANGE = (1.0, 400.0)
+PLAUSIBLE_HT_RANGE = (1.0, 90.0)
+
+RULE_MESSAGES = {
+    'missing_cap': "Valores vazios encontrados na coluna CAP (cm)",
+    'missing_ht': "Valores vazios encontrados na coluna HT (m)",
+    'non_numeric_cap': "Valores não numéricos encontrados na coluna CAP (cm)",
+    'non_numeric_ht': "Valores não numéricos encontrados na coluna HT (m)",
+    'non_positive_cap': "Valores negativos ou zero encontrados na coluna CAP (cm)",
+    'non_positive_ht': "Valores negativos ou zero encontrados na coluna HT (m)",
+    'implausible_dap': f"DAP fora da faixa plausível ({PLAUSIBLE_DAP_RANGE[0]:g} a {PLAUSIBLE_DAP_RANGE[1]:g} cm)",
+    'implausible_ht': f"HT fora da faixa plausível ({PLAUSIBLE_HT_RANGE[0]:g} a {PLAUSIBLE_HT_RANGE[1]:g} m)"
+}
+
+class ValidationIndex:
+    """Per-tree bitset of the validation rules broken by each row, with per-rule counts."""
+
+    def __init__(self, flags, index, values=None):
+        """
+        Args:
+            flags (numpy.ndarray): uint8 bitset per row (bits in RULES order)
+            index (pandas.Index): Row labels of the validated dataframe
+            values (dict): Numeric CAP/HT columns used by the checks, if kept
+        """
+        self.flags = flags
+        self.index = index
+        self.values = values
+        self.counts = {rule: int(np.count_nonzero(flags & bit)) for rule, bit in RULE_BITS.items()}
+
+    def mask(self, *rules):
+        """
+        Get the rows breaking any of the given rules.
+
+        Args:
+            *rules (str): Rule names (all rules when none is given)
+
+        Returns:
+            numpy.ndarray: Boolean mask aligned with the validated rows
+        """
+        bits = np.uint8(0)
+        for rule in rules or RULES:
+            bits |= RULE_BITS[rule]
+        return (self.flags & bits) != 0
+
+    def rows(self, *rules):
+        """
+        Get the labels of the rows breaking any of the given rules.
+
+        Args:
+            *rules (str): Rule names (all rules when none is given)
+
+        Returns:
+            list: Row labels
+        """
+        return self.index[self.mask(*rules)].tolist()
+
+    def append(self, other):
+        """
+        Combine with the index of rows validated later (e.g. a new field batch).
+
+        Args:
+            other (ValidationIndex): Index of the new rows
+
+        Returns:
+            ValidationIndex: Index of all rows (converted values are not kept)
+        """
+        return ValidationIndex(np.concatenate([self.flags, other.flags]), self.index.append(other.index))
+
+    @property
+    def n_flagged(self):
+        """Number of rows breaking at least one rule."""
+        return int(np.count_nonzero(self.flags))
+
+    def errors(self):
+        """
+        Get one message per broken rule.
+
+        Returns:
+            list: Messages of the rules with at least one row
+        """
+        return [RULE_MESSAGES[rule] for rule in RULES if self.counts[rule] > 0]
+
+    def summary(self):
+        """
+        Get the broken rules as a table.
+
+        Returns:
+            pandas.DataFrame: 'Regra', 'Descrição' and 'Linhas' for the rules with at least one row
+        """
+        broken = [rule for rule in RULES if self.counts[rule] > 0]
+        return pd.DataFrame({
+            'Regra': broken,
+            'Descrição': [RULE_MESSAGES[rule] for rule in broken],
+            'Linhas': [self.counts[rule] for rule in broken]
+        })
+
+def _flag(flags, rule, mask):
+    """Set the bit of a rule on the rows selected by mask."""
+    np.bitwise_or(flags, RULE_BITS[rule], out=flags, where=mask)
+
+def numeric_column(values):
+    """
+    Convert a column to numbers, turning non-numeric values into NaN.
+
+    Args:
+        values (pandas.Series): Column values
+
+    Returns:
+        pandas.Series: Numeric values (the column itself if already numeric)
+    """
+    if pd.api.types.is_numeric_dtype(values) and not pd.api.types.is_bool_dtype(values):
+        return values
+    return pd.to_numeric(values, errors='coerce')
+
+def validate_trees(df, dap_range=PLAUSIBLE_DAP_RANGE, ht_range=PLAUSIBLE_HT_RANGE, keep_values=False):
+    """
+    Classify every tree against all validation rules in one vectorized pass.
+
+    A value is missing when empty, non-numeric when present but not
+    convertible to a number (same conversion used by process_data),
+    non-positive when <= 0, and implausible when positive but the DAP
+    (CAP/π) or HT is outside the given range.
+
+    Args:
+        df (pandas.DataFrame): Mapped dataframe with 'CAP (cm)' and 'HT (m)'
+        dap_range (tuple): Plausible (min, max) DAP in cm
+        ht_range (tuple): Plausible (min, max) HT in m
+        keep_values (bool): Keep the converted numeric columns in the result
+            (avoids converting text columns a second time)
+
+    Returns:
+        ValidationIndex: Rule bitset per row and counts per rule
+    """
+    for col in ['CAP (cm)', 'HT (m)']:
+        if col not in df.columns:
+            raise ValueError(f"Required column '{col}' not found in data")
+
+    flags = np.zeros(len(df), dtype=np.uint8)
+    numeric_columns = {}
+    checks = [
+        ('CAP (cm)', 'cap', lambda cap: cap / np.pi, dap_range, 'implausible_dap'),
+        ('HT (m)', 'ht', lambda ht: ht, ht_range, 'implausible_ht')
+    ]
+    for col, name, measure, (low, high), implausible_rule in checks:
+        raw = df[col]
+        missing = raw.isna().to_numpy()
+        numeric_columns[col] = numeric_column(raw)
+        values = numeric_columns[col].to_numpy(dtype=np.float64, na_value=np.nan)
+        numeric = ~np.isnan(values)
+        _flag(flags, f'missing_{name}', missing)
+        _flag(flags, f'non_numeric_{name}', ~missing & ~numeric)
+
+        positive = values > 0
+        _flag(flags, f'non_positive_{name}', numeric & ~positive)
+        measured = measure(values)
+        _flag(flags, implausible_rule, positive & ((measured < low) | (measured > high)))
+
+    return ValidationIndex(flags, df.index, numeric_columns if keep_values else None)